@@ -1,8 +1,23 @@
-from app import app, db, User
+from app import create_app, db, User
 from werkzeug.security import generate_password_hash
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+import argparse
+import csv
+import os
+import sys
+import time
 
-def add_user():
-    with app.app_context():
+IMPORT_COLUMNS = ['username', 'email', 'password', 'is_admin']
+MIN_PASSWORD_LENGTH = 6  # sama dengan /register
+# Baris per query cek duplikat di DB. Satu query mengikat 2 x LOOKUP_CHUNK variabel SQL
+# (username + email), di bawah batas SQLite 32766 (versi 3.32+)
+LOOKUP_CHUNK = 5000
+
+# `app` dari create_app(); tanpa argumen dibuat app baru (konfigurasi dari environment)
+def add_user(app=None):
+    with (app or create_app()).app_context():
         # Input data user baru
         print("=== TAMBAH USER BARU ===")
         username = input("Username: ")
@@ -12,6 +27,10 @@ def add_user():
         
         is_admin = True if is_admin_input in ['y', 'yes', '1'] else False
         
+        if len(password) < MIN_PASSWORD_LENGTH:
+            print(f"❌ Password minimal {MIN_PASSWORD_LENGTH} karakter!")
+            return
+        
         # Cek apakah username sudah ada
         existing_user = User.query.filter_by(username=username).first()
         if existing_user:
@@ -41,8 +60,8 @@ def add_user():
             print(f"❌ Error: {e}")
             db.session.rollback()
 
-def list_users():
-    with app.app_context():
+def list_users(app=None):
+    with (app or create_app()).app_context():
         users = User.query.all()
         print("\n=== DAFTAR USER ===")
         print("ID | Username | Email | Role")
@@ -51,7 +70,147 @@ def list_users():
             role = "Admin" if user.is_admin else "User"
             print(f"{user.id} | {user.username} | {user.email} | {role}")
 
-if __name__ == '__main__':
+# Baca baris user dari file CSV / XLSX (header: username, email, password, is_admin)
+def read_import_rows(path):
+    if path.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(value or '').strip().lower() for value in next(rows, [])]
+        for values in rows:
+            yield {key: '' if value is None else str(value).strip() for key, value in zip(header, values)}
+        workbook.close()
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            for row in csv.DictReader(f):
+                yield {(key or '').strip().lower(): (value or '').strip() for key, value in row.items()}
+
+# Validasi semua baris: kolom wajib, duplikat di file, lalu duplikat di DB (satu query set-based).
+# Return (baris valid, list (nomor baris, alasan, username, email) yang ditolak).
+def validate_import_rows(rows):
+    valid = []
+    rejected = []
+    usernames = set()
+    emails = set()
+    for number, row in enumerate(rows, start=2):  # baris 1 = header
+        username, email, password = row.get('username', ''), row.get('email', ''), row.get('password', '')
+        if not username or not email or not password:
+            rejected.append((number, 'kolom username/email/password kosong', username, email))
+        elif len(password) < MIN_PASSWORD_LENGTH:
+            rejected.append((number, f'password kurang dari {MIN_PASSWORD_LENGTH} karakter', username, email))
+        elif username in usernames:
+            rejected.append((number, 'username duplikat di file', username, email))
+        elif email in emails:
+            rejected.append((number, 'email duplikat di file', username, email))
+        else:
+            usernames.add(username)
+            emails.add(email)
+            valid.append((number, row))
+
+    taken_usernames = set()
+    taken_emails = set()
+    for start in range(0, len(valid), LOOKUP_CHUNK):
+        chunk = [row for number, row in valid[start:start + LOOKUP_CHUNK]]
+        for username, email in db.session.query(User.username, User.email).filter(or_(
+                User.username.in_([row['username'] for row in chunk]),
+                User.email.in_([row['email'] for row in chunk]))):
+            taken_usernames.add(username)
+            taken_emails.add(email)
+
+    accepted = []
+    for number, row in valid:
+        row['line'] = number
+        if row['username'] in taken_usernames:
+            rejected.append((number, 'username sudah ada', row['username'], row['email']))
+        elif row['email'] in taken_emails:
+            rejected.append((number, 'email sudah digunakan', row['username'], row['email']))
+        else:
+            accepted.append(row)
+    return accepted, rejected
+
+# Insert satu batch dalam satu transaksi. Kalau bentrok dengan user yang dibuat bersamaan,
+# batch diulang per baris supaya hanya baris yang bentrok yang ditolak.
+def insert_user_batch(batch, rejected):
+    table = User.__table__
+    values = [{key: value for key, value in user.items() if key != 'line'} for user in batch]
+    try:
+        db.session.execute(table.insert(), values)
+        db.session.commit()
+        return len(batch)
+    except IntegrityError:
+        db.session.rollback()
+
+    inserted = 0
+    for user, value in zip(batch, values):
+        try:
+            db.session.execute(table.insert(), value)
+            db.session.commit()
+            inserted += 1
+        except IntegrityError:
+            db.session.rollback()
+            rejected.append((user['line'], 'username/email sudah ada', user['username'], user['email']))
+    return inserted
+
+# Import user massal: hash password paralel di semua core, insert per batch transaksi
+def import_users(path, batch_size=500, workers=None, rejects_path=None, app=None):
+    started = time.perf_counter()
+    with (app or create_app()).app_context():
+        rows, rejected = validate_import_rows(read_import_rows(path))
+        total = len(rows)
+        print(f"=== IMPORT USER: {path} ===")
+        print(f"{total} user siap diimport, {len(rejected)} baris ditolak")
+
+        imported = 0
+        done = 0
+        if rows:
+            # generate_password_hash sengaja lambat: bagi ke worker process, hasil diambil berurutan
+            passwords = [row['password'] for row in rows]
+            chunksize = max(1, min(batch_size, total // ((workers or os.cpu_count() or 1) * 4)))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                batch = []
+                for row, password_hash in zip(rows, pool.map(generate_password_hash, passwords, chunksize=chunksize)):
+                    batch.append({
+                        'line': row['line'],
+                        'username': row['username'],
+                        'email': row['email'],
+                        'password_hash': password_hash,
+                        'is_admin': row.get('is_admin', '').lower() in ['y', 'yes', '1', 'true', 'admin'],
+                    })
+                    if len(batch) >= batch_size or done + len(batch) == total:
+                        imported += insert_user_batch(batch, rejected)
+                        done += len(batch)
+                        batch = []
+                        print(f"  {done}/{total} baris diproses, {imported} user diimport "
+                              f"({time.perf_counter() - started:.1f}s)")
+
+    rejected.sort()
+    for number, reason, username, email in rejected:
+        print(f"❌ Baris {number}: {reason} ({username or '-'} / {email or '-'})")
+    if rejects_path and rejected:
+        with open(rejects_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['baris', 'alasan', 'username', 'email'])
+            writer.writerows(rejected)
+        print(f"Baris yang ditolak disimpan di {rejects_path}")
+
+    print(f"✅ {imported} user berhasil diimport dalam {time.perf_counter() - started:.1f}s")
+    return imported, rejected
+
+def main(argv, app=None):
+    parser = argparse.ArgumentParser(description='Manajemen user (tanpa argumen = menu interaktif)')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    import_parser = subcommands.add_parser('import', help='Import user massal dari CSV/XLSX')
+    import_parser.add_argument('file', help='File .csv / .xlsx dengan kolom ' + ', '.join(IMPORT_COLUMNS))
+    import_parser.add_argument('--batch-size', type=int, default=500)
+    import_parser.add_argument('--workers', type=int, default=None, help='Jumlah process hash (default semua core)')
+    import_parser.add_argument('--rejects', help='Simpan baris yang ditolak ke file CSV ini')
+    args = parser.parse_args(argv)
+
+    if args.command == 'import':
+        imported, rejected = import_users(args.file, args.batch_size, args.workers, args.rejects, app)
+        return 1 if rejected and not imported else 0
+
+def interactive(app=None):
     while True:
         print("\n=== MANAJEMEN USER ===")
         print("1. Tambah User")
@@ -61,10 +220,16 @@ if __name__ == '__main__':
         choice = input("Pilih (1-3): ")
         
         if choice == '1':
-            add_user()
+            add_user(app)
         elif choice == '2':
-            list_users()
+            list_users(app)
         elif choice == '3':
             break
         else:
-            print("❌ Pilihan tidak valid!")
\ No newline at end of file
+            print("❌ Pilihan tidak valid!")
+
+if __name__ == '__main__':
+    app = create_app()
+    if len(sys.argv) > 1:
+        sys.exit(main(sys.argv[1:], app))
+    interactive(app)
\ No newline at end of file
@@ -0,0 +1,237 @@
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+EPOCH = date(1970, 1, 1)
+
+WEEKDAYS = ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat', 'Sabtu', 'Minggu']
+
+
+# Kolom ringkasan absensi harian (attendance_daily_summary) satu rentang tanggal sebagai
+# array numpy (bukan objek per baris)
+class AttendanceColumns:
+    FIELDS = ('user_id', 'day', 'arrival', 'checked_out', 'late', 'worked', 'overtime')
+
+    def __init__(self, user_id, day, arrival, checked_out, late, worked, overtime):
+        self.user_id = user_id          # int32
+        self.day = day                  # int32, hari sejak 1970-01-01
+        self.arrival = arrival          # float32 menit sejak 00:00 saat check-in, NaN = tidak tercatat
+        self.checked_out = checked_out  # bool
+        self.late = late                # bool, check-in setelah jam masuk
+        self.worked = worked            # int32 menit kerja (0 kalau belum check-out)
+        self.overtime = overtime        # int32 menit lembur
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, np.int32), np.empty(0, np.int32), np.empty(0, np.float32),
+                   np.empty(0, bool), np.empty(0, bool), np.empty(0, np.int32), np.empty(0, np.int32))
+
+    # Dari hasil query: tiap baris 7 bilangan bulat berurutan seperti FIELDS (menit datang -1 =
+    # kosong), semua baris digabung dengan koma (lihat load_analytics_columns di app.py)
+    @classmethod
+    def parse(cls, values):
+        if not values:
+            return cls.empty()
+        with warnings.catch_warnings():
+            # Teks yang tidak bisa dibaca sampai habis: error, bukan array yang terpotong diam-diam
+            warnings.simplefilter('error', DeprecationWarning)
+            numbers = np.fromstring(values, dtype=np.int64, sep=',')
+        if len(numbers) % len(cls.FIELDS):
+            raise ValueError(f'{len(numbers)} nilai bukan kelipatan {len(cls.FIELDS)} kolom')
+        user_id, day, arrival, checked_out, late, worked, overtime = numbers.reshape(-1, len(cls.FIELDS)).T
+        return cls(user_id.astype(np.int32), day.astype(np.int32),
+                   np.where(arrival < 0, np.nan, arrival).astype(np.float32),
+                   checked_out.astype(bool), late.astype(bool),
+                   worked.astype(np.int32), overtime.astype(np.int32))
+
+    def arrays(self):
+        return [getattr(self, field) for field in self.FIELDS]
+
+    @classmethod
+    def concatenate(cls, parts):
+        return cls(*(np.concatenate(arrays) for arrays in zip(*(part.arrays() for part in parts))))
+
+    def take(self, mask):
+        return AttendanceColumns(*(array[mask] for array in self.arrays()))
+
+    # Ganti baris pada hari-hari `days` dengan `fresh` (hasil muat ulang hari tsb)
+    def replace_days(self, days, fresh):
+        keep = ~np.isin(self.day, np.array([(day - EPOCH).days for day in days], dtype=np.int32))
+        return AttendanceColumns.concatenate([self.take(keep), fresh])
+
+    def __len__(self):
+        return len(self.user_id)
+
+
+def _round(value, digits=2):
+    return None if value is None or np.isnan(value) else round(float(value), digits)
+
+
+def _clock(minutes):
+    if minutes is None or np.isnan(minutes):
+        return None
+    minutes = int(minutes)
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+# Hitung analitik absensi (vectorized): tingkat terlambat dan rata-rata jam kerja per karyawan,
+# heatmap jam kedatangan per hari dan jam, serta tren bulanan. Terlambat, menit kerja dan lembur
+# sudah dihitung per hari di ringkasan harian (sama dengan laporan dan payroll).
+def compute_attendance_analytics(columns):
+    frame = pd.DataFrame({
+        'user_id': columns.user_id,
+        'day': columns.day,
+        'arrival': columns.arrival.astype(np.float64),
+        'late': columns.late,
+        'complete': columns.checked_out,
+        'worked': np.where(columns.checked_out, columns.worked / 60, 0.0),
+        'overtime': columns.overtime / 60,
+    })
+
+    per_employee = frame.groupby('user_id').agg(
+        days_present=('day', 'size'),
+        late_days=('late', 'sum'),
+        complete_days=('complete', 'sum'),
+        worked_hours=('worked', 'sum'),
+        overtime_hours=('overtime', 'sum'),
+        mean_arrival=('arrival', 'mean'),
+    )
+    per_employee['late_rate'] = per_employee['late_days'] / per_employee['days_present']
+    per_employee['avg_hours'] = per_employee['worked_hours'] / per_employee['complete_days'].replace(0, np.nan)
+    per_employee = per_employee.sort_values(['late_rate', 'days_present'], ascending=[False, False])
+
+    employees = [{
+        'user_id': int(user_id),
+        'days_present': int(row.days_present),
+        'late_days': int(row.late_days),
+        'late_rate': _round(row.late_rate, 4),
+        'complete_days': int(row.complete_days),
+        'avg_hours': _round(row.avg_hours),
+        'overtime_hours': _round(row.overtime_hours),
+        'avg_arrival': _clock(row.mean_arrival),
+    } for user_id, row in zip(per_employee.index, per_employee.itertuples(index=False))]
+
+    # Heatmap kedatangan: 1970-01-01 hari Kamis, jadi (hari + 3) % 7 -> Senin = 0
+    arrived = frame[frame['arrival'].notna()]
+    weekday = (arrived['day'].to_numpy() + 3) % 7
+    hour = np.minimum(arrived['arrival'].to_numpy() // 60, 23).astype(np.int64)
+    heatmap = np.bincount(weekday * 24 + hour, minlength=7 * 24).reshape(7, 24)
+
+    months = frame['day'].to_numpy().astype('datetime64[D]').astype('datetime64[M]')
+    trend = frame.groupby(months).agg(
+        days_present=('day', 'size'),
+        late_days=('late', 'sum'),
+        complete_days=('complete', 'sum'),
+        worked_hours=('worked', 'sum'),
+    )
+
+    total_present = len(frame)
+    total_complete = int(frame['complete'].sum())
+    total_late = int(frame['late'].sum())
+    return {
+        'summary': {
+            'employees': len(per_employee),
+            'days_present': total_present,
+            'late_days': total_late,
+            'late_rate': _round(total_late / total_present, 4) if total_present else None,
+            'complete_days': total_complete,
+            'avg_hours': _round(frame['worked'].sum() / total_complete) if total_complete else None,
+            'overtime_hours': _round(frame['overtime'].sum()),
+        },
+        'employees': employees,
+        'heatmap': {'weekdays': WEEKDAYS, 'hours': list(range(24)), 'counts': heatmap.tolist()},
+        'trend': [{
+            'month': str(month)[:7],
+            'days_present': int(row.days_present),
+            'late_rate': _round(row.late_days / row.days_present, 4),
+            'avg_hours': _round(row.worked_hours / row.complete_days) if row.complete_days else None,
+        } for month, row in zip(trend.index, trend.itertuples(index=False))],
+    }
+
+
+# Memo analitik per (rentang, filter), per process. Kolom mentah rentang ikut disimpan:
+# scan baru hanya menandai harinya kotor, lalu request berikutnya memuat ulang hari kotor saja
+# (satu query kecil) dan menghitung ulang metrik dari kolom di memori.
+# Scan di worker lain tidak terlihat di sini: setelah `ttl` detik, `recent_days` hari terakhir
+# dalam rentang dianggap kotor dan dimuat ulang.
+class AnalyticsCache:
+    def __init__(self, max_ranges=4, ttl=None, recent_days=7):
+        self.max_ranges = max_ranges
+        self.ttl = ttl
+        self.recent_days = recent_days
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._entries = OrderedDict()  # (start, end, user_id) -> {'columns', 'dirty', 'result', 'computed_at'}
+        self._lock = threading.Lock()
+
+    def _recent_days(self, start, end):
+        today = date.today()
+        first = max(start, today - timedelta(days=self.recent_days - 1))
+        return {first + timedelta(days=offset) for offset in range((min(end, today) - first).days + 1)}
+
+    # key = (start, end, user_id). load(days): AttendanceColumns rentang key (days=None) atau
+    # hanya hari-hari tsb; compute(columns): hasil yang di-memo
+    def get(self, key, load, compute):
+        start, end, user_id = key
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if self.ttl is not None and time.monotonic() - entry['computed_at'] >= self.ttl:
+                    entry['dirty'] |= self._recent_days(start, end)
+                    entry['result'] = None
+                if entry['result'] is not None:
+                    self.hits += 1
+                    return entry['result']
+                dirty = set(entry['dirty'])
+                columns = entry['columns']
+            self.misses += 1
+
+        computed_at = time.monotonic()
+        if entry is None:
+            columns = load(None)
+            dirty = set()
+        elif dirty:
+            columns = columns.replace_days(dirty, load(sorted(dirty)))
+        result = compute(columns)
+
+        with self._lock:
+            if entry is not None and dirty:
+                self.refreshes += 1
+            current = self._entries.get(key)
+            pending = (current['dirty'] - dirty) if current is not None else set()
+            self._entries[key] = {'columns': columns, 'dirty': pending, 'computed_at': computed_at,
+                                  'result': None if pending else result}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_ranges:
+                self._entries.popitem(last=False)
+        return result
+
+    # Absensi user pada `day` berubah: hasil yang mencakup hari itu tidak berlaku lagi
+    def mark_dirty(self, day, user_id=None):
+        with self._lock:
+            for (start, end, filter_user), entry in self._entries.items():
+                if start <= day <= end and (filter_user is None or user_id is None or filter_user == user_id):
+                    entry['dirty'].add(day)
+                    entry['result'] = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_ranges,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            'rows': sum(len(entry['columns']) for entry in list(self._entries.values())),
+        }
@@ -1,82 +1,178 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Blueprint, Flask, current_app, render_template, request, redirect, url_for, flash, jsonify, abort, make_response, Response, stream_with_context, g, has_request_context, session, send_from_directory
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import bindparam, case, cast, event, func, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import make_url
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
+from werkzeug.local import LocalProxy
 from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime, date
-import qrcode
+from datetime import datetime, date, timedelta, time as dt_time
+import click
+import csv
+import logging
 import io
-import base64
+import tempfile
+import hashlib
+import hmac
+import json
 import os
-import secrets
-import socket
 import os, time
-os.environ['TZ'] = 'Asia/Jakarta'
-time.tzset()
+import sqlite3
+import heapq
+import itertools
+import mimetypes
+import migrations
+from archive import AttendanceArchive
+from assets import AssetManifest, ENCODINGS as ASSET_ENCODINGS, build_assets
+from cache import LRUCache
+from base_url import BaseURLResolver
+from qr_service import QRCache, MIMETYPES, start_daily_job
+from qr_tokens import QRTokenSigner, QRTokenError, QRTokenExpired
+from scan_buffer import ScanBuffer
+from roster import TodayRoster, OUT as ROSTER_OUT, STATE_NAMES as ROSTER_STATE_NAMES
+from event_stream import EventBroker, format_event
+from metrics import Registry, Counter, Histogram, CallbackMetric
+import queue
+import threading
+from types import SimpleNamespace
 
 
-app = Flask(__name__)
-
 #  path DB Brow
 basedir = os.path.abspath(os.path.dirname(__file__))
-instance_dir = os.path.join(basedir, 'instance')
+instance_dir = os.path.join(basedir, 'instance')  # dibuat di configure_process()
+
+# Konfigurasi app; environment dibaca saat create_app, `config` menimpa nilai default
+# (misalnya database lain untuk test)
+def load_config(app, config=None):
+    app.config['TIMEZONE'] = 'Asia/Jakarta'  # jam absensi disimpan sebagai waktu lokal zona ini
+    app.config['SECRET_KEY'] = 'your-secret-key-here-change-this'
+    # Hanya SQLite: skema (migrations.py), upsert dan tuning koneksi memakai fitur SQLite.
+    # DATABASE_URL database lain ditolak saat start (check_database_url).
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+        'DATABASE_URL', f'sqlite:///{os.path.join(instance_dir, "database.db")}'
+    )
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Tuning SQLite per koneksi (lihat configure_sqlite_connection); busy timeout dalam ms
+    app.config['SQLITE_BUSY_TIMEOUT'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    app.config['SQLITE_JOURNAL_MODE'] = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    # Gambar QR (~1 KB PNG) dirender saat pertama diminta dashboard, tidak di-pre-render per user.
+    # Token berganti tiap QR_TOKEN_ROTATION, jadi cukup sebesar jumlah dashboard yang terbuka bersamaan.
+    app.config['QR_CACHE_SIZE'] = int(os.environ.get('QR_CACHE_SIZE', 1024))
+    app.config['QR_TOKEN_ROTATION'] = int(os.environ.get('QR_TOKEN_ROTATION', 120))  # detik; QR dashboard berganti, token sekali pakai
+    app.config['BASE_URL_CACHE_TTL'] = 30  # detik; base URL QR dibaca ulang dari DB + cek IP lokal
+    app.config['REPORT_PAGE_SIZE'] = 100
+    app.config['EXPORT_BATCH_SIZE'] = 1000
+    app.config['USERS_PAGE_SIZE'] = 50
+    app.config['USER_CACHE_SIZE'] = 4096
+    app.config['USER_CACHE_TTL'] = 60  # detik; umur entry (perubahan dari worker lain dicek lewat cache_version)
+    app.config['PAGE_CACHE_SIZE'] = 4096
+    app.config['PAGE_CACHE_TTL'] = 30  # detik; umur entry (scan dari worker lain dicek lewat cache_version)
+    # Analitik absensi: jumlah rentang yang kolomnya disimpan di memori (5 tahun x 2000 karyawan ~ 80 MB),
+    # dan umur hasil sebelum beberapa hari terakhir dimuat ulang (scan dari worker lain)
+    app.config['ANALYTICS_CACHE_RANGES'] = 4
+    app.config['ANALYTICS_CACHE_TTL'] = 60  # detik
+    app.config['WORK_START_TIME'] = '08:00'  # check-in setelah jam ini dihitung terlambat
+    app.config['WORK_END_TIME'] = '17:00'    # check-out setelah jam ini dihitung lembur
+    app.config['PAYSLIP_DIR'] = os.path.join(instance_dir, 'payslips')
+    app.config['ASSET_DIST_DIR'] = os.path.join(app.static_folder, 'dist')  # hasil flask build-assets
+    app.config['ASSET_MAX_AGE'] = 365 * 24 * 3600  # detik; URL asset berisi hash isi, jadi aman di-cache lama
+    app.config['ARCHIVE_DIR'] = os.path.join(instance_dir, 'archive')
+    app.config['ARCHIVE_KEEP_MONTHS'] = 3  # bulan terakhir (termasuk bulan ini) yang tetap di tabel attendance
+    app.config['ARCHIVE_CACHE_PARTITIONS'] = 4  # partisi arsip yang disimpan ter-decode di memori per process
+    app.config['PAYSLIP_WORKERS'] = None  # None = semua core CPU
+    # Buffer tulis-belakang untuk /qr_scan: scan dicatat ke journal + antrian, ditulis ke DB per batch
+    app.config['SCAN_BUFFER_ENABLED'] = os.environ.get('SCAN_BUFFER', '0') == '1'  # butuh Linux/macOS (flock)
+    app.config['SCAN_BUFFER_FLUSH_INTERVAL'] = 0.1  # detik
+    app.config['SCAN_BUFFER_MAX_BATCH'] = 500
+    app.config['SCAN_JOURNAL_DIR'] = os.path.join(instance_dir, 'scan_journal')
+    app.config['SCAN_JOURNAL_FSYNC'] = False  # True = tahan listrik mati, lebih lambat per scan
+    app.config['ROSTER_REFRESH_INTERVAL'] = 60  # detik; sinkron ulang index hari ini dengan scan worker lain
+    app.config['EVENT_STREAM_HEARTBEAT'] = 25   # detik; ping SSE + cek ganti hari / scan dari worker lain
+    app.config['EVENT_STREAM_MAX_AGE'] = 1800   # detik; stream ditutup lalu browser reconnect otomatis
+    # Stream SSE terbuka per worker. Setiap stream memegang satu thread gthread, jadi harus di bawah
+    # THREADS (lihat gunicorn.conf.py); dashboard yang ditolak (503) pindah ke polling API status.
+    app.config['EVENT_STREAM_MAX_CONNECTIONS'] = int(os.environ.get(
+        'EVENT_STREAM_MAX_CONNECTIONS', int(os.environ.get('THREADS', 16)) // 2))
+    # Sinkronisasi kiosk offline: key per kiosk (header X-Kiosk-Key), dipisah koma
+    app.config['KIOSK_KEYS'] = [key for key in os.environ.get('KIOSK_KEYS', '').split(',') if key]
+    app.config['KIOSK_SYNC_MAX_EVENTS'] = 1000
+    app.config['KIOSK_MAX_CLOCK_SKEW'] = 300  # detik; scan dengan waktu lebih dari ini di masa depan ditolak
+    # Request lebih lambat dari ini (detik) dicatat ke log beserta daftar query; None = mati
+    app.config['SLOW_REQUEST_THRESHOLD'] = float(os.environ['SLOW_REQUEST_MS']) / 1000 if os.environ.get('SLOW_REQUEST_MS') else None
+    # /metrics: scraper memakai header "Authorization: Bearer <METRICS_TOKEN>". Tanpa token hanya
+    # admin yang login, atau request langsung dari localhost (bukan lewat reverse proxy)
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+
+    app.config.update(config or {})
+    check_database_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS',
+                          database_engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+
+# Pool koneksi per worker process. SQLite in-memory memakai pool khusus tanpa opsi ukuran.
+def database_engine_options(uri):
+    if uri.startswith('sqlite') and (':memory:' in uri or uri.rstrip('/') == 'sqlite:'):
+        return {}
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    }
 
-# buat instance 
-if not os.path.exists(instance_dir):
-    os.makedirs(instance_dir)
+# Tolak DATABASE_URL selain SQLite sebelum engine dibuat
+def check_database_url(uri):
+    backend = make_url(uri).get_backend_name()
+    if backend != 'sqlite':
+        raise RuntimeError(f"DATABASE_URL {backend} tidak didukung, aplikasi ini hanya untuk SQLite")
 
-app.config['SECRET_KEY'] = 'your-secret-key-here-change-this'
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(instance_dir, "database.db")}'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Inisialisasi Database (di-bind ke app di create_app)
+db = SQLAlchemy()
 
-# Inisialisasi Database
-db = SQLAlchemy(app)
+# Semua route, filter template dan perintah CLI (flask --app app <perintah>, di level atas)
+bp = Blueprint('main', __name__, cli_group=None)
 
 # Inisialisasi Login Manager
 login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'login'
+login_manager.login_view = 'main.login'
 
-# Fungsi untuk  IP lokal
-def get_local_ip():
-    try:
-        # Connect ke Google DNS untuk mendapatkan IP lokal
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-            s.connect(("8.8.8.8", 80))
-            return s.getsockname()[0]
-    except:
-        return "127.0.0.1"
+# Cache, roster, broker SSE dan metrik dibuat per app di init_state (app.extensions['absensi']).
+# Nama modul di bawah (qr_cache, today_roster, ...) adalah proxy ke objek milik current_app.
+def app_state():
+    return current_app.extensions['absensi']
+
+def state_proxy(name):
+    return LocalProxy(lambda: getattr(app_state(), name))
+
+# Metrik performa per process (format Prometheus di /metrics)
+metrics_registry = state_proxy('metrics_registry')
+request_seconds = state_proxy('request_seconds')
+requests_total = state_proxy('requests_total')
+request_sql_queries = state_proxy('request_sql_queries')
+request_sql_seconds = state_proxy('request_sql_seconds')
+sql_query_seconds = state_proxy('sql_query_seconds')
+
+# Cache gambar QR (LRU, key = hash payload)
+qr_cache = state_proxy('qr_cache')
+
+# Token QR bertanda tangan (HMAC) yang berganti berkala; nonce terpakai dicatat di qr_token_use
+qr_signer = state_proxy('qr_signer')
+asset_manifest = state_proxy('asset_manifest')
+attendance_archive = state_proxy('attendance_archive')
+
+# Base URL QR di-resolve sekali dan di-cache per process (NGROK_URL > /config > BASE_URL > IP lokal)
+def load_base_url_setting(app):
+    with app.app_context():  # bisa dipanggil dari thread tanpa app context
+        return get_setting('base_url')
+
+base_url_resolver = state_proxy('base_url_resolver')
 
 # Fungsi untuk generate QR URL yang dinamis
-def generate_qr_url(user_id, token, date):
-    # Priority: ngrok URL > IP lokal > localhost
-    
-    # 1. Cek environment variable untuk ngrok
-    ngrok_url = os.getenv('NGROK_URL')
-    if ngrok_url:
-        base_url = ngrok_url.rstrip('/')
-        print(f" Menggunakan ngrok URL: {base_url}")
-        return f"{base_url}/qr_scan?user_id={user_id}&token={token}&date={date}"
-    
-    # 2. Cek apakah ada config manual untuk base URL
-    manual_url = os.getenv('BASE_URL')
-    if manual_url:
-        base_url = manual_url.rstrip('/')
-        print(f" Menggunakan manual URL: {base_url}")
-        return f"{base_url}/qr_scan?user_id={user_id}&token={token}&date={date}"
-    
-    # 3. Gunakan IP lokal untuk akses dari HP di WiFi yang sama
-    local_ip = get_local_ip()
-    if local_ip != "127.0.0.1":
-        base_url = f"http://{local_ip}:5000"
-        print(f" Menggunakan IP lokal: {base_url}")
-        print(f" Pastikan HP dan laptop di WiFi yang sama!")
-        return f"{base_url}/qr_scan?user_id={user_id}&token={token}&date={date}"
-    
-    # 4. Fallback ke localhost
-    base_url = "http://localhost:5000"
-    print(f" Menggunakan localhost: {base_url}")
-    print(f"  Hanya bisa diakses dari komputer yang sama!")
-    return f"{base_url}/qr_scan?user_id={user_id}&token={token}&date={date}"
+def generate_qr_url(token):
+    return f"{base_url_resolver.base_url()}/qr_scan?token={token}"
+
+# Payload URL QR user untuk periode rotasi saat ini (sama di semua worker sampai berganti)
+def current_qr_url(user_id, now=None):
+    return generate_qr_url(qr_signer.issue(user_id, now))
 
 # Model Database
 class User(UserMixin, db.Model):
@@ -95,19 +191,799 @@ class Attendance(db.Model):
     time_out = db.Column(db.DateTime, nullable=True)
     status = db.Column(db.String(20), default='hadir')
 
+# Satu baris absensi per user per hari (target ON CONFLICT untuk upsert scan),
+# urut date desc untuk riwayat per user. Index date untuk laporan per rentang tanggal.
+# Dibuat lewat migrations.py, definisi di sini harus sama.
+db.Index('uq_attendance_user_date_desc', Attendance.user_id, Attendance.date.desc(), unique=True)
+db.Index('ix_attendance_date', Attendance.date)
+
+# Ringkasan absensi per user per hari, diperbarui setiap scan
+class AttendanceDailySummary(db.Model):
+    __tablename__ = 'attendance_daily_summary'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    checked_in = db.Column(db.Boolean, nullable=False, default=False)
+    checked_out = db.Column(db.Boolean, nullable=False, default=False)
+    is_late = db.Column(db.Boolean, nullable=False, default=False)
+    worked_minutes = db.Column(db.Integer, nullable=False, default=0)
+    arrival_minute = db.Column(db.Integer)  # menit sejak 00:00 saat check-in
+    overtime_minutes = db.Column(db.Integer, nullable=False, default=0)
+
+# Ringkasan absensi per user per bulan (month = tanggal 1 bulan tsb)
+class AttendanceMonthlySummary(db.Model):
+    __tablename__ = 'attendance_monthly_summary'
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)
+    days_present = db.Column(db.Integer, nullable=False, default=0)
+    days_complete = db.Column(db.Integer, nullable=False, default=0)
+    late_days = db.Column(db.Integer, nullable=False, default=0)
+    worked_minutes = db.Column(db.Integer, nullable=False, default=0)
+
+db.Index('ix_attendance_daily_summary_date', AttendanceDailySummary.date)
+db.Index('ix_attendance_monthly_summary_month', AttendanceMonthlySummary.month)
+
+# Tarif gaji karyawan
+class EmployeeSalary(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    daily_wage = db.Column(db.Float, default=0)
+    overtime_rate = db.Column(db.Float, default=0)
+    meal_allowance = db.Column(db.Float, default=25000)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    user = db.relationship('User', backref=db.backref('salary_info', uselist=False))
+
+# Hutang karyawan, dipotong setiap minggu dari gaji
+class EmployeeDebt(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    debt_amount = db.Column(db.Float, default=0)
+    weekly_deduction = db.Column(db.Float, default=0)
+    description = db.Column(db.String(200))
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    user = db.relationship('User', backref=db.backref('debt_info', uselist=False))
+
+# Payroll mingguan per karyawan
+class Payroll(db.Model):
+    __tablename__ = 'weekly_payroll'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    week_start = db.Column(db.Date, nullable=False)
+    week_end = db.Column(db.Date, nullable=False)
+    total_days_worked = db.Column(db.Integer, default=0)
+    total_late_days = db.Column(db.Integer, default=0)
+    total_overtime_hours = db.Column(db.Float, default=0)
+    total_meal_allowances = db.Column(db.Integer, default=0)
+    basic_pay = db.Column(db.Float, default=0)
+    overtime_pay = db.Column(db.Float, default=0)
+    meal_pay = db.Column(db.Float, default=0)
+    gross_pay = db.Column(db.Float, default=0)
+    debt_deduction = db.Column(db.Float, default=0)
+    net_pay = db.Column(db.Float, default=0)
+    is_paid = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    user = db.relationship('User', backref='payrolls')
+
+# Event scan yang sudah diterapkan ke Attendance (dedup per event id), beserta hasilnya
+# (lihat scan_outcome) supaya sync ulang event yang sama dijawab dengan hasil yang sama
+class ScanEvent(db.Model):
+    __tablename__ = 'scan_event'
+    event_id = db.Column(db.String(64), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    scanned_at = db.Column(db.DateTime, nullable=False)
+    recorded_at = db.Column(db.DateTime, nullable=False, index=True)
+    outcome = db.Column(db.String(16))
+    time_in = db.Column(db.DateTime)
+    time_out = db.Column(db.DateTime)
+
+# Setting yang diubah dari UI admin, dibagi ke semua worker lewat database
+class AppSetting(db.Model):
+    __tablename__ = 'app_setting'
+    key = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.Text, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+# Nonce token QR yang sudah dipakai scan, dibagi semua worker (primary key = sekali pakai)
+class QRTokenUse(db.Model):
+    __tablename__ = 'qr_token_use'
+    nonce = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    used_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+# Versi data per user di database, dinaikkan di transaksi yang mengubah user tsb. Cache per
+# process menyimpan versi saat entry dibuat dan membandingkannya dengan tabel ini (satu
+# lookup primary key per request), jadi perubahan lewat worker lain langsung terlihat.
+class CacheVersion(db.Model):
+    __tablename__ = 'cache_version'
+    user_id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+def get_setting(key):
+    setting = db.session.get(AppSetting, key)
+    return setting.value if setting else None
+
+# Simpan setting (None = hapus); commit dilakukan pemanggil
+def set_setting(key, value):
+    setting = db.session.get(AppSetting, key)
+    if value is None:
+        if setting:
+            db.session.delete(setting)
+    elif setting:
+        setting.value = value
+        setting.updated_at = datetime.now()
+    else:
+        db.session.add(AppSetting(key=key, value=value, updated_at=datetime.now()))
+
+# Pencarian prefix username/email (LIKE 'abc%' case-insensitive) memakai index NOCASE
+db.Index('ix_user_username_nocase', db.collate(User.username, 'NOCASE'))
+db.Index('ix_user_email_nocase', db.collate(User.email, 'NOCASE'))
+db.Index('uq_employee_salary_user', EmployeeSalary.user_id, unique=True)
+db.Index('uq_employee_debt_user', EmployeeDebt.user_id, unique=True)
+db.Index('ix_weekly_payroll_week_user', Payroll.week_start, Payroll.user_id)
+
+# INSERT SQLite yang mendukung ON CONFLICT
+def upsert_insert(model):
+    return sqlite_insert(model)
+
+def attendance_insert():
+    return upsert_insert(Attendance)
+
+# Check-in terlambat kalau lewat WORK_START_TIME
+def is_late_check_in(time_in):
+    work_start = dt_time.fromisoformat(current_app.config['WORK_START_TIME'])
+    return time_in is not None and time_in.time() > work_start
+
+def worked_minutes(time_in, time_out):
+    if not time_in or not time_out:
+        return 0
+    return int((time_out - time_in).total_seconds() // 60)
+
+def arrival_minute(time_in):
+    return time_in.hour * 60 + time_in.minute
+
+# Lembur seperti payroll: dari jam pulang normal (atau jam masuk kalau lebih telat) sampai check-out
+def overtime_minutes(day, time_in, time_out):
+    if not time_in or not time_out:
+        return 0
+    work_end = datetime.combine(day, dt_time.fromisoformat(current_app.config['WORK_END_TIME']))
+    return max(int((time_out - max(time_in, work_end)).total_seconds() // 60), 0)
+
+# Statement upsert scan dibangun sekali per process, nilai dikirim sebagai parameter saat
+# execute (construct ON CONFLICT tidak masuk cache compile SQLAlchemy, jadi hemat di sisi build).
+prepared_statements = {}
+
+# Dijalankan di koneksi session (transaksi yang sama), tanpa jalur bulk insert ORM
+def execute_prepared(builder, params):
+    stmt = prepared_statements.get(builder.__name__)
+    if stmt is None:
+        stmt = prepared_statements[builder.__name__] = builder()
+    return db.session.connection().execute(stmt, params)
+
+def daily_summary_upsert():
+    stmt = upsert_insert(AttendanceDailySummary)
+    return stmt.on_conflict_do_update(
+        index_elements=['user_id', 'date'],
+        set_={column: getattr(stmt.excluded, column)
+              for column in ('checked_out', 'worked_minutes', 'overtime_minutes')}
+    )
+
+# Nilai bulanan = delta event ini, dijumlahkan ke baris yang sudah ada
+def monthly_summary_upsert():
+    stmt = upsert_insert(AttendanceMonthlySummary)
+    return stmt.on_conflict_do_update(
+        index_elements=['user_id', 'month'],
+        set_={
+            column: getattr(AttendanceMonthlySummary, column) + getattr(stmt.excluded, column)
+            for column in ('days_present', 'days_complete', 'late_days', 'worked_minutes')
+        }
+    )
+
+# Check-in kalau belum, check-out kalau sudah check-in; tidak berubah kalau sudah selesai
+# atau kalau waktu scan lebih awal dari check-in (event kiosk offline yang datang terlambat)
+def toggle_upsert():
+    stmt = attendance_insert()
+    return stmt.on_conflict_do_update(
+        index_elements=['user_id', 'date'],
+        set_={
+            'time_in': func.coalesce(Attendance.time_in, stmt.excluded.time_in),
+            'time_out': case(
+                (Attendance.time_in.isnot(None), stmt.excluded.time_in),
+                else_=Attendance.time_out
+            ),
+        },
+        where=Attendance.time_out.is_(None) & (
+            Attendance.time_in.is_(None) | (Attendance.time_in <= stmt.excluded.time_in)
+        )
+    ).returning(Attendance.time_in, Attendance.time_out)
+
+def scan_event_insert():
+    return upsert_insert(ScanEvent).on_conflict_do_nothing(
+        index_elements=['event_id']
+    ).returning(ScanEvent.event_id)
+
+def scan_event_outcome_update():
+    table = ScanEvent.__table__
+    return update(table).where(table.c.event_id == bindparam('b_event_id')).values(
+        outcome=bindparam('b_outcome'), time_in=bindparam('b_time_in'), time_out=bindparam('b_time_out'))
+
+def cache_version_upsert():
+    stmt = upsert_insert(CacheVersion)
+    return stmt.on_conflict_do_update(
+        index_elements=['user_id'],
+        set_={'version': CacheVersion.version + 1}
+    )
+
+# Naikkan versi cache user (tanpa commit, ikut transaksi perubahan datanya)
+def bump_cache_version(user_id):
+    execute_prepared(cache_version_upsert, {'user_id': user_id, 'version': 1})
+    if has_request_context():
+        g.get('cache_versions', {}).pop(user_id, None)
+
+# Versi cache user saat ini; dibaca sekali per request (user loader + halaman memakai nilai yang sama)
+def cache_version(user_id):
+    versions = g.setdefault('cache_versions', {})
+    if user_id not in versions:
+        versions[user_id] = db.session.query(CacheVersion.version) \
+            .filter(CacheVersion.user_id == user_id).scalar() or 0
+    return versions[user_id]
+
+def qr_token_use_insert():
+    return upsert_insert(QRTokenUse).on_conflict_do_nothing(
+        index_elements=['nonce']
+    ).returning(QRTokenUse.nonce)
+
+# Tandai nonce token QR terpakai, di transaksi yang sama dengan absensinya (tanpa commit).
+# False kalau token sudah pernah dipakai scan lewat worker mana pun.
+def consume_qr_token(user_id, nonce, expires_at, used_at):
+    return execute_prepared(qr_token_use_insert, {
+        'nonce': nonce, 'user_id': user_id, 'used_at': used_at,
+        'expires_at': datetime.fromtimestamp(expires_at),
+    }).first() is not None
+
+# Nonce yang tokennya sudah kadaluarsa tidak perlu disimpan (token itu ditolak verify)
+def prune_qr_token_uses():
+    QRTokenUse.query.filter(QRTokenUse.expires_at < datetime.now()).delete()
+    db.session.commit()
+
+def restore_attendance_insert():
+    return attendance_insert().on_conflict_do_nothing()
+
+# Scan terlambat (kiosk offline) untuk hari di bulan yang sudah diarsip: baris arsip user hari
+# itu dikembalikan dulu ke tabel dengan id yang sama, jadi toggle dan ringkasan melanjutkan
+# absensi yang sudah ada (bukan baris kedua). Laporan memakai versi tabel untuk (date, id)
+# yang sama, dan archive-attendance berikutnya menimpa versi di partisi.
+def restore_archived_attendance(user_id, day):
+    if not attendance_archive.partitions(day, day):
+        return
+    row = next(attendance_archive.rows(day, day, user_id), None)
+    if row is not None:
+        execute_prepared(restore_attendance_insert, row._asdict())
+
+# Update ringkasan harian + bulanan secara inkremental untuk satu event scan.
+# time_out None = event check-in, selain itu event check-out. Dipanggil sebelum commit,
+# jadi ikut transaksi yang sama dengan perubahan Attendance.
+def record_attendance_summary(user_id, day, time_in, time_out):
+    late = is_late_check_in(time_in)
+    minutes = worked_minutes(time_in, time_out)
+    checkout = time_out is not None
+    
+    execute_prepared(daily_summary_upsert, {
+        'user_id': user_id, 'date': day, 'checked_in': True, 'checked_out': checkout,
+        'is_late': late, 'worked_minutes': minutes, 'arrival_minute': arrival_minute(time_in),
+        'overtime_minutes': overtime_minutes(day, time_in, time_out),
+    })
+    execute_prepared(monthly_summary_upsert, {
+        'user_id': user_id, 'month': day.replace(day=1),
+        'days_present': 0 if checkout else 1,
+        'days_complete': 1 if checkout else 0,
+        'late_days': int(late and not checkout),
+        'worked_minutes': minutes,
+    })
+
+# Scan QR: check-in kalau belum, check-out kalau sudah check-in, dalam satu statement.
+# Return (time_in, time_out) baris hasil, atau None kalau absensi hari ini sudah selesai.
+# Tanpa commit: dipakai juga oleh penulisan batch apply_scan_events.
+def apply_toggle(user_id, today, now):
+    row = execute_prepared(toggle_upsert, {
+        'user_id': user_id, 'date': today, 'time_in': now, 'status': 'hadir',
+    }).first()
+    if row is not None:
+        record_attendance_summary(user_id, today, row.time_in, row.time_out)
+        bump_cache_version(user_id)
+    return row
+
+def toggle_attendance(user_id, today, now):
+    row = apply_toggle(user_id, today, now)
+    db.session.commit()
+    return row
+
+# Hasil satu event scan sebagai (outcome, time_in, time_out); outcome 'check_in', 'check_out',
+# 'ignored' (tidak mengubah absensi) atau 'replayed' (token QR sudah dipakai)
+def scan_outcome(row):
+    if row == 'replayed':
+        return 'replayed', None, None
+    if row is None:
+        return 'ignored', None, None
+    return ('check_out' if row.time_out is not None else 'check_in'), row.time_in, row.time_out
+
+# Terapkan banyak event scan ({id, user_id, scanned_at}, plus nonce + token_exp dari token
+# QR) berurutan dalam satu transaksi. Event yang id-nya sudah tercatat di scan_event
+# dilewati, jadi aman di-replay; token QR yang sudah dipakai event lain tidak diterapkan.
+# Hasil tiap event ikut disimpan di scan_event (satu executemany per batch).
+# Return dict event id -> (time_in, time_out) / None (tidak mengubah absensi) / 'duplicate' / 'replayed'.
+def apply_scan_events(events):
+    results = {}
+    outcomes = []
+    recorded_at = datetime.now()
+    for scan in events:
+        scanned_at = scan['scanned_at']
+        if isinstance(scanned_at, str):
+            scanned_at = datetime.fromisoformat(scanned_at)
+        
+        inserted = execute_prepared(scan_event_insert, {
+            'event_id': scan['id'], 'user_id': scan['user_id'],
+            'scanned_at': scanned_at, 'recorded_at': recorded_at,
+        }).first()
+        if inserted is None:
+            results[scan['id']] = 'duplicate'
+            continue
+        if scan.get('nonce') and not consume_qr_token(scan['user_id'], scan['nonce'],
+                                                      scan['token_exp'], recorded_at):
+            results[scan['id']] = 'replayed'
+        else:
+            restore_archived_attendance(scan['user_id'], scanned_at.date())
+            results[scan['id']] = apply_toggle(scan['user_id'], scanned_at.date(), scanned_at)
+        outcome, time_in, time_out = scan_outcome(results[scan['id']])
+        outcomes.append({'b_event_id': scan['id'], 'b_outcome': outcome,
+                         'b_time_in': time_in, 'b_time_out': time_out})
+    if outcomes:
+        execute_prepared(scan_event_outcome_update, outcomes)
+    db.session.commit()
+    return results
+
+# Check-in eksplisit; False kalau sudah check-in hari ini
+def check_in(user_id, today, now):
+    stmt = attendance_insert().values(user_id=user_id, date=today, time_in=now, status='hadir')
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'date'],
+        set_={'time_in': stmt.excluded.time_in},
+        where=Attendance.time_in.is_(None)
+    ).returning(Attendance.id)
+    
+    row = db.session.execute(stmt).first()
+    if row is not None:
+        record_attendance_summary(user_id, today, now, None)
+        bump_cache_version(user_id)
+    db.session.commit()
+    return row is not None
+
+# Check-out eksplisit lewat UPDATE bersyarat; False kalau belum check-in / sudah check-out
+def check_out(user_id, today, now):
+    result = db.session.execute(
+        update(Attendance)
+        .where(Attendance.user_id == user_id,
+               Attendance.date == today,
+               Attendance.time_in.isnot(None),
+               Attendance.time_out.is_(None))
+        .values(time_out=now)
+        .returning(Attendance.time_in)
+    )
+    row = result.first()
+    if row is not None:
+        record_attendance_summary(user_id, today, row.time_in, now)
+        bump_cache_version(user_id)
+    db.session.commit()
+    return row is not None
+
+# Tanggal 1 bulan berikutnya
+def next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+# Bangun ulang ringkasan dari data Attendance mentah (backfill / perbaikan).
+# Rentang diperluas ke bulan penuh supaya ringkasan bulanan tetap konsisten.
+def rebuild_attendance_summaries(start=None, end=None, batch_size=1000):
+    daily_query = AttendanceDailySummary.query
+    monthly_query = AttendanceMonthlySummary.query
+    rows_query = db.session.query(Attendance.user_id, Attendance.date, Attendance.time_in, Attendance.time_out) \
+        .filter(Attendance.time_in.isnot(None))
+    
+    if start:
+        start = start.replace(day=1)
+        daily_query = daily_query.filter(AttendanceDailySummary.date >= start)
+        monthly_query = monthly_query.filter(AttendanceMonthlySummary.month >= start)
+        rows_query = rows_query.filter(Attendance.date >= start)
+    if end:
+        end = next_month(end)
+        daily_query = daily_query.filter(AttendanceDailySummary.date < end)
+        monthly_query = monthly_query.filter(AttendanceMonthlySummary.month < end)
+        rows_query = rows_query.filter(Attendance.date < end)
+    
+    daily_query.delete(synchronize_session=False)
+    monthly_query.delete(synchronize_session=False)
+    
+    # Bulan yang sudah diarsip ikut dibaca dari partisinya
+    archived_rows = ((row.user_id, row.date, row.time_in, row.time_out)
+                     for row in attendance_archive.rows(start, end - timedelta(days=1) if end else None)
+                     if row.time_in is not None)
+    
+    daily_rows = []
+    monthly = {}
+    count = 0
+    for user_id, day, time_in, time_out in itertools.chain(rows_query.yield_per(batch_size), archived_rows):
+        late = is_late_check_in(time_in)
+        minutes = worked_minutes(time_in, time_out)
+        daily_rows.append({
+            'user_id': user_id, 'date': day, 'checked_in': True,
+            'checked_out': time_out is not None, 'is_late': late, 'worked_minutes': minutes,
+            'arrival_minute': arrival_minute(time_in),
+            'overtime_minutes': overtime_minutes(day, time_in, time_out),
+        })
+        
+        totals = monthly.setdefault((user_id, day.replace(day=1)), [0, 0, 0, 0])
+        totals[0] += 1
+        totals[1] += time_out is not None
+        totals[2] += late
+        totals[3] += minutes
+        
+        count += 1
+        if len(daily_rows) >= batch_size:
+            db.session.execute(db.insert(AttendanceDailySummary), daily_rows)
+            daily_rows = []
+    
+    if daily_rows:
+        db.session.execute(db.insert(AttendanceDailySummary), daily_rows)
+    if monthly:
+        db.session.execute(db.insert(AttendanceMonthlySummary), [
+            {'user_id': user_id, 'month': month, 'days_present': totals[0], 'days_complete': totals[1],
+             'late_days': totals[2], 'worked_minutes': totals[3]}
+            for (user_id, month), totals in monthly.items()
+        ])
+    db.session.commit()
+    return count
+
+# Total ringkasan untuk rentang tanggal (inklusif): bulan penuh dibaca dari tabel
+# bulanan, sisa hari di ujung rentang dari tabel harian
+def attendance_summary_totals(start=None, end=None, user_id=None):
+    month_start = None if start is None else (start if start.day == 1 else next_month(start))
+    month_end = None if end is None else (end + timedelta(days=1)).replace(day=1)  # eksklusif
+    
+    queries = []
+    if month_start and month_end and month_start >= month_end:
+        # Rentang tidak mencakup satu bulan penuh pun
+        day_ranges = [(start, end)]
+    else:
+        day_ranges = []
+        if start and start < month_start:
+            day_ranges.append((start, month_start - timedelta(days=1)))
+        if end and month_end <= end:
+            day_ranges.append((month_end, end))
+        
+        monthly = db.session.query(
+            func.sum(AttendanceMonthlySummary.days_present),
+            func.sum(AttendanceMonthlySummary.days_complete),
+            func.sum(AttendanceMonthlySummary.late_days),
+            func.sum(AttendanceMonthlySummary.worked_minutes),
+        )
+        if month_start:
+            monthly = monthly.filter(AttendanceMonthlySummary.month >= month_start)
+        if month_end:
+            monthly = monthly.filter(AttendanceMonthlySummary.month < month_end)
+        if user_id:
+            monthly = monthly.filter(AttendanceMonthlySummary.user_id == user_id)
+        queries.append(monthly)
+    
+    for range_start, range_end in day_ranges:
+        daily = db.session.query(
+            func.count(),
+            func.sum(case((AttendanceDailySummary.checked_out, 1), else_=0)),
+            func.sum(case((AttendanceDailySummary.is_late, 1), else_=0)),
+            func.sum(AttendanceDailySummary.worked_minutes),
+        )
+        if range_start:
+            daily = daily.filter(AttendanceDailySummary.date >= range_start)
+        if range_end:
+            daily = daily.filter(AttendanceDailySummary.date <= range_end)
+        if user_id:
+            daily = daily.filter(AttendanceDailySummary.user_id == user_id)
+        queries.append(daily)
+    
+    totals = {'days_present': 0, 'days_complete': 0, 'late_days': 0, 'worked_minutes': 0}
+    for query in queries:
+        for key, value in zip(totals, query.one()):
+            totals[key] += value or 0
+    return totals
+
+# Data user ringan untuk current_user (terlepas dari session SQLAlchemy, aman di-cache)
+class CachedUser(UserMixin):
+    __slots__ = ('id', 'username', 'email', 'is_admin')
+    
+    def __init__(self, id, username, email, is_admin):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.is_admin = bool(is_admin)
+
+# Cache user loader per process (LRU + TTL), entry berlaku selama versi user di cache_version sama
+user_cache = state_proxy('user_cache')
+
+def fetch_cached_user(user_id):
+    row = db.session.query(User.id, User.username, User.email, User.is_admin) \
+        .filter(User.id == user_id).first()
+    return CachedUser(*row) if row else None
+
+def cached_user(user_id):
+    return user_cache.get_or_load(user_id, lambda: fetch_cached_user(user_id), version=cache_version(user_id))
+
+# Panggil setiap kali data user dibuat, diubah atau dihapus (setelah commit perubahannya):
+# versi dinaikkan untuk semua worker, entry di process ini langsung dibuang
+def invalidate_user(user_id):
+    bump_cache_version(int(user_id))
+    db.session.commit()
+    user_cache.invalidate(int(user_id))
+    invalidate_attendance_pages(int(user_id))
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return cached_user(int(user_id))
+
+# Halaman riwayat absensi (publik dan /attendance) per user, disimpan sebagai HTML jadi
+# + ETag/Last-Modified. Berlaku selama versi user di cache_version sama (absensi atau data
+# user berubah di worker mana pun); di process yang mencatat scan-nya langsung dihapus.
+page_cache = state_proxy('page_cache')
+
+def invalidate_attendance_pages(user_id):
+    page_cache.invalidate(('public', user_id))
+    page_cache.invalidate(('attendance', user_id))
+
+# Layani halaman dari cache (atau 304), render(): (html, list Attendance) kalau belum ada
+def cached_attendance_page(kind, user_id, render):
+    version = cache_version(user_id)
+    entry = page_cache.get((kind, user_id), version=version)
+    if entry is None:
+        html, attendances = render()
+        body = html.encode()
+        # Last-Modified = scan terakhir yang tampil di halaman
+        changes = [attendance.time_out or attendance.time_in for attendance in attendances
+                   if attendance.time_in or attendance.time_out]
+        entry = (body, hashlib.sha1(body).hexdigest(), max(changes).astimezone() if changes else None)
+        page_cache.set((kind, user_id), entry, version=version)
+    
+    body, etag, last_modified = entry
+    response = make_response(body)
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+# Index status absensi hari ini per process (belum masuk / masuk / pulang)
+today_roster = state_proxy('today_roster')
+roster_lock = state_proxy('roster_lock')
+
+def load_today_roster(day):
+    rows = db.session.query(Attendance.user_id, Attendance.time_in, Attendance.time_out) \
+        .filter(Attendance.date == day)
+    today_roster.rebuild(day, rows)
+
+# Roster hari ini; dibangun ulang saat ganti hari dan berkala (scan dari worker lain)
+def current_roster():
+    today = date.today()
+    interval = current_app.config['ROSTER_REFRESH_INTERVAL']
+    with roster_lock:
+        stale = interval and time.monotonic() - today_roster.built_at > interval
+        if today_roster.day != today or stale:
+            load_today_roster(today)
+    return today_roster
+
+# Event SSE ke tab dashboard yang terbuka (per process, dibatasi EVENT_STREAM_MAX_CONNECTIONS)
+attendance_events = state_proxy('attendance_events')
+
+# Catat hasil scan ke roster dan beri tahu tab dashboard user
+# (row = (time_in, time_out), None = absensi hari itu sudah selesai)
+def record_scan_result(user_id, day, row):
+    checked_out = row is None or row[1] is not None
+    invalidate_attendance_pages(user_id)
+    analytics_cache = app_state().analytics_cache
+    if analytics_cache is not None:
+        analytics_cache.mark_dirty(day, user_id)
+    if today_roster.day == day:
+        if row is None:
+            today_roster.mark_out(user_id)
+        else:
+            today_roster.record(user_id, row[0], row[1])
+    if day == date.today():
+        attendance_events.publish(user_id, 'status', {'state': 'out' if checked_out else 'in'})
+
+# Terapkan batch event scan (apply_scan_events) lalu update roster + SSE untuk yang berubah
+def record_scan_events(events):
+    try:
+        results = apply_scan_events(events)
+    except Exception:
+        db.session.rollback()
+        raise
+    for scan in events:
+        row = results[scan['id']]
+        if row is not None and not isinstance(row, str):  # 'duplicate' sudah tercatat sebelumnya
+            record_scan_result(scan['user_id'], date.fromisoformat(scan['scanned_at'][:10]), row)
+    return results
+
+# Listener engine per app, dipasang di create_app setelah db.init_app
+def register_engine_events(app, engine):
+    config = app.config
+    query_seconds = app.extensions['absensi'].sql_query_seconds
+    
+    # Setiap koneksi SQLite baru: busy_timeout supaya worker lain menunggu lock (bukan langsung
+    # "database is locked"), WAL supaya pembaca tidak memblok penulis, synchronous=NORMAL
+    # (aman dengan WAL, fsync hanya saat checkpoint)
+    @event.listens_for(engine, 'connect')
+    def configure_sqlite_connection(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT'])}")
+        cursor.execute(f"PRAGMA journal_mode = {config['SQLITE_JOURNAL_MODE']}")
+        cursor.execute(f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}")
+        cursor.close()
+    
+    # Waktu setiap query SQL (termasuk thread background), dikumpulkan juga per request untuk
+    # log request lambat
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+    
+    @event.listens_for(engine, 'after_cursor_execute')
+    def record_query_time(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_started'].pop()
+        query_seconds.observe(value=elapsed)
+        if has_request_context():
+            queries = g.get('sql_queries')
+            if queries is not None:
+                queries.append((statement, elapsed))
+    
+    @event.listens_for(engine, 'handle_error')
+    def discard_query_timer(context):
+        started = context.connection.info.get('query_started') if context.connection else None
+        if started:
+            started.pop()
+
+@bp.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.sql_queries = []
+
+@bp.after_app_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    queries = g.get('sql_queries', [])
+    sql_seconds = sum(seconds for _, seconds in queries)
+    
+    request_seconds.observe(request.method, route, value=elapsed)
+    requests_total.inc(request.method, route, str(response.status_code))
+    request_sql_queries.observe(route, value=len(queries))
+    request_sql_seconds.observe(route, value=sql_seconds)
+    
+    threshold = current_app.config['SLOW_REQUEST_THRESHOLD']
+    if threshold is not None and elapsed >= threshold:
+        current_app.logger.warning(
+            "Request lambat %s %s: %.1f ms, %d query (%.1f ms)\n%s",
+            request.method, request.full_path.rstrip('?'), elapsed * 1000, len(queries), sql_seconds * 1000,
+            '\n'.join(f"  {seconds * 1000:7.2f} ms  {' '.join(statement.split())[:300]}"
+                      for statement, seconds in queries)
+        )
+    return response
+
+# Statistik cache per app, dibaca saat /metrics di-scrape
+def cache_stats(state=None):
+    state = state or app_state()
+    stats = {'user_loader': state.user_cache.stats(), 'qr_image': state.qr_cache.stats(),
+             'attendance_page': state.page_cache.stats()}
+    if state.analytics_cache is not None:
+        stats['analytics'] = state.analytics_cache.stats()
+    stats['archive_partition'] = state.attendance_archive.cache.stats()
+    return stats
+
+# Metrik, cache, roster dan broker SSE satu app. Buffer scan dan memo analitik dibuat saat
+# pertama dipakai (get_scan_buffer, get_analytics_cache).
+def init_state(app):
+    config = app.config
+    metrics = Registry()
+    state = SimpleNamespace(
+        metrics_registry=metrics,
+        request_seconds=metrics.register(Histogram(
+            'http_request_duration_seconds', 'Latency request per route (sampai header dikirim)', ['method', 'route'])),
+        requests_total=metrics.register(Counter(
+            'http_requests_total', 'Jumlah request per route dan status', ['method', 'route', 'status'])),
+        request_sql_queries=metrics.register(Histogram(
+            'http_request_sql_queries', 'Jumlah query SQL per request', ['route'],
+            buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100))),
+        request_sql_seconds=metrics.register(Histogram(
+            'http_request_sql_duration_seconds', 'Total waktu query SQL per request', ['route'])),
+        sql_query_seconds=metrics.register(Histogram(
+            'sql_query_duration_seconds', 'Waktu per query SQL (termasuk thread background)')),
+        qr_render_seconds=metrics.register(Histogram(
+            'qr_render_duration_seconds', 'Waktu render gambar QR', ['format'])),
+        qr_signer=QRTokenSigner(config['SECRET_KEY'], rotation=config['QR_TOKEN_ROTATION']),
+        asset_manifest=AssetManifest(app.static_folder, config['ASSET_DIST_DIR']),
+        attendance_archive=AttendanceArchive(config['ARCHIVE_DIR'],
+                                             cache_partitions=config['ARCHIVE_CACHE_PARTITIONS']),
+        base_url_resolver=BaseURLResolver(lambda: load_base_url_setting(app), ttl=config['BASE_URL_CACHE_TTL']),
+        user_cache=LRUCache(config['USER_CACHE_SIZE'], ttl=config['USER_CACHE_TTL']),
+        page_cache=LRUCache(config['PAGE_CACHE_SIZE'], ttl=config['PAGE_CACHE_TTL']),
+        today_roster=TodayRoster(),
+        roster_lock=threading.Lock(),
+        attendance_events=EventBroker(max_connections=config['EVENT_STREAM_MAX_CONNECTIONS']),
+        scan_buffer=None,
+        scan_buffer_lock=threading.Lock(),
+        analytics_cache=None,
+        analytics_cache_lock=threading.Lock(),
+    )
+    state.qr_cache = QRCache(config['QR_CACHE_SIZE'],
+                             on_render=lambda fmt, seconds: state.qr_render_seconds.observe(fmt, value=seconds))
+    
+    def cache_stat_samples(field):
+        return lambda: (((name,), stats[field]) for name, stats in cache_stats(state).items())
+    
+    metrics.register(CallbackMetric(
+        'cache_hits_total', 'Cache hit', cache_stat_samples('hits'), ['cache'], type='counter'))
+    metrics.register(CallbackMetric(
+        'cache_misses_total', 'Cache miss', cache_stat_samples('misses'), ['cache'], type='counter'))
+    metrics.register(CallbackMetric(
+        'cache_hit_ratio', 'Rasio hit cache sejak process start', cache_stat_samples('hit_rate'), ['cache']))
+    metrics.register(CallbackMetric(
+        'cache_entries', 'Jumlah entry di cache', cache_stat_samples('entries'), ['cache']))
+    metrics.register(CallbackMetric(
+        'scan_buffer_pending', 'Event scan di antrian buffer yang belum ditulis ke DB',
+        lambda: [((), state.scan_buffer.pending() if state.scan_buffer else 0)]))
+    metrics.register(CallbackMetric(
+        'event_stream_connections', 'Koneksi SSE dashboard yang terbuka',
+        lambda: [((), state.attendance_events.connections())]))
+    
+    app.extensions['absensi'] = state
+    return state
+
+# URL asset statis ber-fingerprint untuk template: {{ asset_url('css/style.css') }}.
+# Mode debug selalu dari file sumber, jadi perubahan CSS/JS langsung terlihat tanpa build.
+@bp.app_template_global()
+def asset_url(name):
+    return url_for('main.asset', filename=asset_manifest.hashed_name(name, use_build=not current_app.debug))
+
+# Asset statis (/assets/css/style.<hash>.css): isi URL yang sama tidak pernah berubah, jadi
+# di-cache browser selamanya. Versi .br / .gz hasil build-assets dikirim kalau browser mendukung.
+@bp.route('/assets/<path:filename>')
+def asset(filename):
+    located = asset_manifest.locate(filename, use_build=not current_app.debug)
+    if located is None:
+        abort(404)
+    directory, path = located
+    mimetype = mimetypes.guess_type(path)[0]
+    encoding = None
+    for candidate, suffix in ASSET_ENCODINGS:
+        if request.accept_encodings[candidate] and os.path.exists(os.path.join(directory, path + suffix)):
+            encoding, path = candidate, path + suffix
+            break
+    
+    response = send_from_directory(directory, path, mimetype=mimetype, max_age=current_app.config['ASSET_MAX_AGE'])
+    if encoding:
+        response.content_encoding = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    return response
 
 # Route untuk halaman utama
-@app.route('/')
+@bp.route('/')
 def index():
     if current_user.is_authenticated:
-        return redirect(url_for('dashboard'))
-    return redirect(url_for('login'))
+        return redirect(url_for('main.dashboard'))
+    return redirect(url_for('main.login'))
 
 # Route untuk login
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form['username']
@@ -117,27 +993,27 @@ def login():
         
         if user and check_password_hash(user.password_hash, password):
             login_user(user)
-            return redirect(url_for('dashboard'))
+            return redirect(url_for('main.dashboard'))
         else:
             flash('Username atau password salah!')
     
     return render_template('login.html')
 
 # Route untuk logout
-@app.route('/logout')
+@bp.route('/logout')
 @login_required
 def logout():
     logout_user()
-    return redirect(url_for('login'))
+    return redirect(url_for('main.login'))
 
 # Route untuk register user baru
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 @login_required
 def register():
     # Hanya admin yang bisa register user baru
     if not current_user.is_admin:
         flash('Hanya admin yang dapat mendaftarkan user baru!')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     if request.method == 'POST':
         username = request.form['username']
@@ -169,63 +1045,142 @@ def register():
         try:
             db.session.add(new_user)
             db.session.commit()
+            invalidate_user(new_user.id)
             role = "Admin" if is_admin else "User"
             flash(f'User {username} berhasil ditambahkan sebagai {role}!')
-            return redirect(url_for('manage_users'))
+            return redirect(url_for('main.manage_users'))
         except Exception as e:
             flash(f'Error: {str(e)}')
             db.session.rollback()
     
     return render_template('register.html')
 
+# Filter prefix username/email; pola LIKE dibuat di Python supaya index NOCASE terpakai
+def user_search_filter(query, q):
+    q = (q or '').strip()
+    if not q:
+        return query
+    pattern = q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    return query.filter(db.or_(User.username.like(pattern, escape='\\'),
+                               User.email.like(pattern, escape='\\')))
+
+# Typeahead karyawan non-admin (index NOCASE username/email, lihat explain-queries)
+def user_search_query(q, limit):
+    query = db.session.query(User.id, User.username, User.email).filter(User.is_admin.isnot(True))
+    return user_search_filter(query, q).order_by(User.username).limit(limit)
+
+# Daftar user di manajemen user, difilter prefix username/email
+def user_list_query(q):
+    return user_search_filter(User.query, q).order_by(User.username)
+
 # Route untuk manajemen user
-@app.route('/manage_users')
+@bp.route('/manage_users')
 @login_required
 def manage_users():
     # Hanya admin yang bisa akses
     if not current_user.is_admin:
         flash('Akses ditolak! Hanya admin yang dapat mengelola user.')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
-    users = User.query.all()
-    total_users = len(users)
-    total_admins = len([u for u in users if u.is_admin])
-    total_regular_users = total_users - total_admins
+    q = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
+    
+    # Hitung admin / user biasa di database (COUNT ... GROUP BY is_admin)
+    counts = dict(db.session.query(User.is_admin, func.count()).group_by(User.is_admin).all())
+    total_admins = counts.get(True, 0)
+    total_regular_users = sum(count for is_admin, count in counts.items() if not is_admin)
+    total_users = total_admins + total_regular_users
+    
+    pagination = db.paginate(user_list_query(q), page=page, per_page=current_app.config['USERS_PAGE_SIZE'], error_out=False)
     
     return render_template('manage_users.html', 
-                         users=users,
+                         users=pagination.items,
+                         pagination=pagination,
+                         q=q,
                          total_users=total_users,
                          total_admins=total_admins,
                          total_regular_users=total_regular_users)
 
+# Route API typeahead karyawan (filter laporan), Admin only
+@bp.route('/api/users/search')
+@login_required
+def user_search_api():
+    if not current_user.is_admin:
+        return jsonify({'error': 'Akses ditolak!'}), 403
+    
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    users = user_search_query(request.args.get('q'), limit).all()
+    return jsonify([{'id': user.id, 'username': user.username, 'email': user.email} for user in users])
+
+# Route API statistik cache per process (Admin only)
+@bp.route('/api/cache/stats')
+@login_required
+def cache_stats_api():
+    if not current_user.is_admin:
+        return jsonify({'error': 'Akses ditolak!'}), 403
+    return jsonify({**cache_stats(),
+                    'event_stream': {'connections': attendance_events.connections()}})
+
+# Akses /metrics: Bearer token, admin, atau localhost langsung (request lewat proxy membawa
+# X-Forwarded-For, jadi tidak dihitung localhost walaupun proxy-nya di mesin yang sama)
+def metrics_authorized():
+    token = current_app.config['METRICS_TOKEN']
+    authorization = request.headers.get('Authorization', '')
+    if token and authorization:
+        return hmac.compare_digest(authorization, f'Bearer {token}')
+    if current_user.is_authenticated and current_user.is_admin:
+        return True
+    return (not token and request.remote_addr in ('127.0.0.1', '::1')
+            and 'X-Forwarded-For' not in request.headers)
+
+# Route metrik Prometheus (per process worker)
+@bp.route('/metrics')
+def metrics_endpoint():
+    if not metrics_authorized():
+        abort(403)
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
 # Route untuk delete user
-@app.route('/delete_user/<int:user_id>')
+@bp.route('/delete_user/<int:user_id>')
 @login_required
 def delete_user(user_id):
     if not current_user.is_admin:
         flash('Akses ditolak!')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     user = User.query.get_or_404(user_id)
     if user.id == current_user.id:
         flash('Tidak bisa menghapus akun sendiri!')
-        return redirect(url_for('manage_users'))
+        return redirect(url_for('main.manage_users'))
     
     try:
-        # Hapus semua data absensi user
+        # Hapus semua data absensi user (termasuk ringkasannya)
         Attendance.query.filter_by(user_id=user_id).delete()
+        AttendanceDailySummary.query.filter_by(user_id=user_id).delete()
+        AttendanceMonthlySummary.query.filter_by(user_id=user_id).delete()
+        Payroll.query.filter_by(user_id=user_id).delete()
+        EmployeeSalary.query.filter_by(user_id=user_id).delete()
+        EmployeeDebt.query.filter_by(user_id=user_id).delete()
+        ScanEvent.query.filter_by(user_id=user_id).delete()
+        QRTokenUse.query.filter_by(user_id=user_id).delete()
         # Hapus user
         db.session.delete(user)
         db.session.commit()
+        invalidate_user(user_id)
+        today_roster.forget(user_id)
+        attendance_archive.forget_user(user_id, date.today())
+        analytics_cache = app_state().analytics_cache
+        if analytics_cache is not None:
+            analytics_cache.clear()
         flash(f'User {user.username} dan semua data absensinya berhasil dihapus!')
     except Exception as e:
         flash(f'Error: {str(e)}')
         db.session.rollback()
     
-    return redirect(url_for('manage_users'))
+    return redirect(url_for('main.manage_users'))
 
 # Route untuk dashboard
-@app.route('/dashboard')
+@bp.route('/dashboard')
 @login_required
 def dashboard():
     today = date.today()
@@ -234,263 +1189,978 @@ def dashboard():
         date=today
     ).first()
     
-    # Generate QR Code dengan URL untuk absensi
-    token = secrets.token_urlsafe(16)  # Generate secure token
+    qr_url, qr_key = dashboard_qr(current_user.id)
+    
+    return render_template('dashboard.html', 
+                         attendance=attendance_today, 
+                         qr_key=qr_key,
+                         qr_url=qr_url,  # Tambah URL untuk testing
+                         today=today)
+
+# QR user saat ini: token bertanda tangan (tidak perlu disimpan di session), gambarnya
+# dilayani terpisah lewat /qr/<key>.png (tidak di-inline base64)
+def dashboard_qr(user_id, now=None):
+    qr_url = current_qr_url(user_id, now)
+    return qr_url, qr_cache.register(qr_url)
+
+# Data QR terbaru untuk dashboard (event SSE 'qr' dan API status)
+def dashboard_qr_payload(user_id):
+    qr_url, qr_key = dashboard_qr(user_id)
+    return {'image': url_for('main.qr_image', key=qr_key, fmt='png'), 'url': qr_url}
+
+# Fungsi untuk ringkasan status absensi hari ini (dipakai API polling dashboard)
+def attendance_status_payload(attendance, today):
+    return {
+        'date': today.isoformat(),
+        'checked_in': bool(attendance and attendance.time_in),
+        'checked_out': bool(attendance and attendance.time_out),
+        'time_in': attendance.time_in.strftime('%H:%M') if attendance and attendance.time_in else None,
+        'time_out': attendance.time_out.strftime('%H:%M') if attendance and attendance.time_out else None,
+        'status': attendance.status if attendance else None,
+    }
+
+# Route API status absensi hari ini (JSON ringan + ETag, tanpa render QR). Ikut berisi
+# URL QR terbaru untuk dashboard yang polling (tanpa SSE), jadi ETag berubah saat rotasi.
+@bp.route('/api/attendance/status')
+@login_required
+def attendance_status_api():
+    today = date.today()
+    attendance = Attendance.query.filter_by(
+        user_id=current_user.id,
+        date=today
+    ).first()
+    
+    payload = attendance_status_payload(attendance, today)
+    payload['qr'] = dashboard_qr_payload(current_user.id)
+    etag = hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+    
+    # Status tidak berubah -> 304 tanpa body
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+# Route SSE dashboard: event 'status' saat absensi user tercatat, 'qr' saat token QR berganti.
+# Tab yang idle cukup menahan satu koneksi, tanpa polling atau reload halaman. Kalau stream
+# di worker ini sudah penuh: 503, dashboard memakai polling /api/attendance/status (ETag).
+@bp.route('/api/attendance/events')
+@login_required
+def attendance_events_stream():
+    user_id = current_user.id
+    heartbeat = current_app.config['EVENT_STREAM_HEARTBEAT']
+    deadline = time.monotonic() + current_app.config['EVENT_STREAM_MAX_AGE']
+    broker = app_state().attendance_events  # call_on_close jalan di luar app context
+    subscription = broker.subscribe(user_id)
+    if subscription is None:
+        return Response('Terlalu banyak stream SSE terbuka', status=503, mimetype='text/plain')
+    
+    def stream():
+        slot = qr_signer.slot()
+        last_state = current_roster().state(user_id)
+        db.session.close()  # jangan tahan koneksi DB selama stream terbuka
+        yield 'retry: 5000\n\n'
+        while time.monotonic() < deadline:
+            # Bangun tepat saat rotasi QR berikutnya kalau lebih dulu dari heartbeat
+            until_rotation = qr_signer.rotation - time.time() % qr_signer.rotation
+            try:
+                event, data = subscription.get(timeout=min(heartbeat, until_rotation))
+                last_state = today_roster.state(user_id)
+                yield format_event(event, data)
+                continue
+            except queue.Empty:
+                pass
+            
+            # Tidak ada event: cek rotasi QR dan scan yang lewat worker lain
+            if qr_signer.slot() != slot:
+                slot = qr_signer.slot()
+                yield format_event('qr', dashboard_qr_payload(user_id))
+            state = current_roster().state(user_id)
+            db.session.close()
+            if state != last_state:
+                last_state = state
+                yield format_event('status', {'state': ROSTER_STATE_NAMES[state]})
+            else:
+                yield ': ping\n\n'
     
-    # Simpan token di session untuk verifikasi
-    session['qr_token'] = token
-    session['qr_user_id'] = current_user.id
-    session['qr_date'] = today.isoformat()
+    # Dilepas saat response ditutup, juga kalau client putus sebelum stream mulai
+    response = Response(stream_with_context(stream()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(lambda: broker.unsubscribe(user_id, subscription))
+    return response
+
+# Route untuk gambar QR (PNG/SVG), content-addressed jadi aman di-cache lama
+@bp.route('/qr/<key>.<any(png, svg):fmt>')
+@login_required
+def qr_image(key, fmt):
+    image = qr_cache.get(key, fmt)
+    if image is None:
+        # Worker lain yang render dashboard: bangun ulang QR user periode ini (atau periode
+        # sebelumnya, halaman yang dirender tepat sebelum rotasi)
+        now = time.time()
+        for issued in (now, now - qr_signer.rotation):
+            if qr_cache.register(current_qr_url(current_user.id, issued)) == key:
+                image = qr_cache.get(key, fmt)
+                break
+        else:
+            abort(404)
     
-    # Generate QR URL dengan prioritas
-    qr_url = generate_qr_url(current_user.id, token, today)
+    response = make_response(image)
+    response.mimetype = MIMETYPES[fmt]
+    response.set_etag(key)
+    response.headers['Cache-Control'] = 'private, max-age=86400, immutable'
+    return response.make_conditional(request)
+
+# Pekerjaan harian (saat start + lewat tengah malam): roster hari baru lalu buang nonce QR
+# kadaluarsa. Gambar QR tidak di-pre-render: dirender saat dashboard memintanya.
+def daily_rollover(app):
+    with app.app_context():
+        current_roster()
+        prune_qr_token_uses()
+
+# Route untuk papan "hadir sekarang" (admin), dari roster di memori tanpa query Attendance
+@bp.route('/present')
+@login_required
+def present_now():
+    if not current_user.is_admin:
+        flash('Akses ditolak!')
+        return redirect(url_for('main.dashboard'))
     
-    qr = qrcode.QRCode(version=1, box_size=10, border=5)
-    qr.add_data(qr_url)
-    qr.make(fit=True)
+    roster = current_roster()
+    now = datetime.now()
+    present_users = roster.present()
+    usernames = dict(db.session.query(User.id, User.username)
+                     .filter(User.id.in_([user_id for user_id, _ in present_users])))
     
-    qr_img = qr.make_image(fill_color="black", back_color="white")
+    present = []
+    for user_id, time_in in present_users:
+        if user_id in usernames:
+            minutes = int((now - time_in).total_seconds() // 60)
+            present.append((usernames[user_id], time_in, f'{minutes // 60} jam {minutes % 60} menit'))
     
-    # Convert ke base64 untuk ditampilkan di HTML
-    buffer = io.BytesIO()
-    qr_img.save(buffer, format='PNG')
-    buffer.seek(0)
-    qr_code_base64 = base64.b64encode(buffer.getvalue()).decode()
+    counts = roster.counts()
+    total_users = db.session.query(func.count(User.id)).scalar()
+    built_at = now - timedelta(seconds=time.monotonic() - roster.built_at)
     
-    return render_template('dashboard.html', 
-                         attendance=attendance_today, 
-                         qr_code=qr_code_base64,
-                         qr_url=qr_url,  # Tambah URL untuk testing
-                         today=today)
+    return render_template('present_now.html',
+                         present=present,
+                         counts=counts,
+                         absent=max(total_users - counts['in'] - counts['out'], 0),
+                         built_at=built_at,
+                         today=roster.day)
+
+# Riwayat absensi terbaru satu user (index user_id, date desc)
+def attendance_history_query(user_id, limit=30):
+    return Attendance.query.filter_by(user_id=user_id).order_by(Attendance.date.desc()).limit(limit)
 
 # Route untuk halaman absensi
-@app.route('/attendance')
+@bp.route('/attendance')
 @login_required
 def attendance_page():
-    attendances = Attendance.query.filter_by(user_id=current_user.id).order_by(Attendance.date.desc()).limit(30).all()
-    return render_template('attendance.html', attendances=attendances)
+    def render():
+        attendances = attendance_history_query(current_user.id).all()
+        return render_template('attendance.html', attendances=attendances), attendances
+    
+    # Ada pesan flash yang menunggu: ikut ter-render, jadi jangan dari/ke cache
+    if session.get('_flashes'):
+        return render()[0]
+    return cached_attendance_page('attendance', current_user.id, render)
 
 # Route untuk melihat riwayat absensi via QR (tidak perlu login)
-@app.route('/attendance/<int:user_id>/<token>')
+@bp.route('/attendance/<int:user_id>/<token>')
 def public_attendance(user_id, token):
-    # Validasi user
-    user = User.query.get_or_404(user_id)
-    
-    # Get attendances
-    attendances = Attendance.query.filter_by(user_id=user_id).order_by(Attendance.date.desc()).limit(30).all()
+    def render():
+        # Validasi user
+        user = User.query.get_or_404(user_id)
+        
+        # Get attendances
+        attendances = attendance_history_query(user_id).all()
+        
+        return render_template('public_attendance.html', 
+                             attendances=attendances,
+                             user=user), attendances
     
-    return render_template('public_attendance.html', 
-                         attendances=attendances,
-                         user=user)
+    # Halaman yang sering di-refresh dari HP: dari cache / 304 sampai absensinya berubah
+    return cached_attendance_page('public', user_id, render)
+
+# Buffer scan per process, dibuat saat scan pertama (setelah fork worker WSGI)
+def write_scan_batch(app, events):
+    with app.app_context():
+        record_scan_events(events)
+
+def get_scan_buffer():
+    state = app_state()
+    with state.scan_buffer_lock:
+        if state.scan_buffer is None:
+            app = current_app._get_current_object()  # thread writer tidak punya app context
+            state.scan_buffer = ScanBuffer(
+                app.config['SCAN_JOURNAL_DIR'], lambda events: write_scan_batch(app, events),
+                flush_interval=app.config['SCAN_BUFFER_FLUSH_INTERVAL'],
+                max_batch=app.config['SCAN_BUFFER_MAX_BATCH'],
+                fsync=app.config['SCAN_JOURNAL_FSYNC'],
+            ).start()
+        return state.scan_buffer
 
 # Route untuk scan QR dari URL
-@app.route('/qr_scan')
+@bp.route('/qr_scan')
 def qr_scan_url():
-    user_id = request.args.get('user_id')
     token = request.args.get('token')
-    scan_date = request.args.get('date')
+    today = date.today()
     
     # Validasi parameter
-    if not user_id or not token or not scan_date:
+    if not token:
         return render_template('qr_result.html', 
                              success=False, 
                              message='QR Code tidak valid atau sudah kadaluarsa!',
-                             today=date.today())
+                             today=today)
     
-    # Cek apakah user ada
-    user = User.query.get(user_id)
-    if not user:
+    # Verifikasi token (tanda tangan + masa berlaku), tanpa session/DB. Sekali pakai
+    # dicek saat absensi ditulis (consume_qr_token).
+    try:
+        claims = qr_signer.verify(token)
+    except QRTokenExpired:
         return render_template('qr_result.html', 
                              success=False, 
-                             message='User tidak ditemukan!',
-                             today=date.today())
-    
-    # Parse tanggal
-    try:
-        scan_date_obj = datetime.strptime(scan_date, '%Y-%m-%d').date()
-    except:
+                             message='QR Code sudah kadaluarsa! Scan QR Code terbaru di dashboard.',
+                             today=today)
+    except QRTokenError:
         return render_template('qr_result.html', 
                              success=False, 
-                             message='Format tanggal tidak valid!',
-                             today=date.today())
+                             message='QR Code tidak valid atau sudah kadaluarsa!',
+                             today=today)
     
-    # Cek apakah QR Code masih valid (hanya untuk hari ini)
-    today = date.today()
-    if scan_date_obj != today:
+    user_id = claims['u']
+    
+    # Cek apakah user ada
+    user = cached_user(user_id)
+    if not user:
         return render_template('qr_result.html', 
                              success=False, 
-                             message='QR Code sudah kadaluarsa! Gunakan QR Code hari ini.',
+                             message='User tidak ditemukan!',
                              today=today)
     
-    # Proses absensi
     now = datetime.now()
-    attendance = Attendance.query.filter_by(
-        user_id=user_id,
-        date=today
-    ).first()
+    roster = current_roster()
     
-    # Tentukan aksi berdasarkan status absensi
-    if not attendance or not attendance.time_in:
-        # Check-in
-        if not attendance:
-            attendance = Attendance(
-                user_id=user_id,
-                date=today,
-                time_in=now,
-                status='hadir'
-            )
-            db.session.add(attendance)
-        else:
-            attendance.time_in = now
-        
-        db.session.commit()
+    if roster.state(user_id) == ROSTER_OUT:
+        # Sudah pulang menurut roster: tolak tanpa menyentuh DB
+        row = None
+    elif current_app.config['SCAN_BUFFER_ENABLED']:
+        # Mode buffer: DB ditulis thread writer per batch. Roster process ini bisa tertinggal
+        # dari scan lewat worker lain, jadi jawabannya netral; hasil check-in/out yang benar
+        # dikirim ke dashboard (SSE) oleh writer setelah commit (record_scan_events).
+        # Token yang sudah dipakai dilewati writer (apply_scan_events).
+        get_scan_buffer().submit(user_id, now, nonce=claims['n'], token_exp=claims['exp'])
         return render_template('qr_result.html', 
                              success=True, 
-                             message=f'Check-in berhasil untuk {user.username}!',
+                             message=f'Scan {user.username} berhasil diterima dan sedang dicatat.',
                              user=user,
                              time=now.strftime('%H:%M:%S'),
-                             action='Check-in',
+                             action='Scan diterima',
                              today=today)
-    
-    elif attendance.time_in and not attendance.time_out:
-        # Check-out
-        attendance.time_out = now
-        db.session.commit()
-        
-        # Hitung durasi kerja
-        duration = now - attendance.time_in
-        hours = duration.seconds // 3600
-        minutes = (duration.seconds % 3600) // 60
-        
+    elif not consume_qr_token(user_id, claims['n'], claims['exp'], now):
+        db.session.rollback()
         return render_template('qr_result.html', 
-                             success=True, 
-                             message=f'Check-out berhasil untuk {user.username}!',
-                             user=user,
-                             time=now.strftime('%H:%M:%S'),
-                             action='Check-out',
-                             duration=f'{hours} jam {minutes} menit',
+                             success=False, 
+                             message='QR Code sudah digunakan! Scan QR Code terbaru di dashboard.',
                              today=today)
-    
     else:
+        # Proses absensi: satu statement upsert, tanpa read-before-write (commit bersama nonce)
+        row = toggle_attendance(user_id, today, now)
+        record_scan_result(user_id, today, row)
+    
+    if row is None:
         # Sudah check-in dan check-out
         return render_template('qr_result.html', 
                              success=False, 
                              message=f'{user.username} sudah menyelesaikan absensi hari ini!',
                              today=today)
+    
+    time_in, time_out = row
+    if time_out is None:
+        # Check-in
+        return render_template('qr_result.html', 
+                             success=True, 
+                             message=f'Check-in berhasil untuk {user.username}!',
+                             user=user,
+                             time=now.strftime('%H:%M:%S'),
+                             action='Check-in',
+                             today=today)
+    
+    # Check-out: hitung durasi kerja
+    duration = time_out - time_in
+    hours = duration.seconds // 3600
+    minutes = (duration.seconds % 3600) // 60
+    
+    return render_template('qr_result.html', 
+                         success=True, 
+                         message=f'Check-out berhasil untuk {user.username}!',
+                         user=user,
+                         time=now.strftime('%H:%M:%S'),
+                         action='Check-out',
+                         duration=f'{hours} jam {minutes} menit',
+                         today=today)
+
+# Kiosk boleh sync dengan key kiosk atau session admin
+def kiosk_authorized():
+    key = request.headers.get('X-Kiosk-Key')
+    if key:
+        return any(hmac.compare_digest(key, allowed) for allowed in current_app.config['KIOSK_KEYS'])
+    return current_user.is_authenticated and current_user.is_admin
+
+# Validasi satu event kiosk {id, token, scanned_at}; return (event, waktu scan) atau raise ValueError
+def parse_kiosk_event(raw, latest):
+    if not isinstance(raw, dict):
+        raise ValueError('event harus berupa object')
+    event_id = raw.get('id')
+    if not isinstance(event_id, str) or not 0 < len(event_id) <= 64:
+        raise ValueError('id event tidak valid')
+    
+    try:
+        scanned_at = datetime.fromisoformat(str(raw.get('scanned_at')))
+    except ValueError:
+        raise ValueError('scanned_at bukan waktu ISO 8601')
+    if scanned_at.tzinfo is not None:
+        scanned_at = scanned_at.astimezone().replace(tzinfo=None)  # ke waktu lokal server
+    if scanned_at > latest:
+        raise ValueError('scanned_at di masa depan')
+    
+    # Token QR harus berlaku pada waktu scan (bukan waktu sync)
+    try:
+        claims = qr_signer.verify(str(raw.get('token', '')), now=scanned_at.timestamp())
+    except QRTokenExpired:
+        raise ValueError('QR Code sudah kadaluarsa pada waktu scan')
+    except QRTokenError:
+        raise ValueError('QR Code tidak valid')
+    
+    return {'id': event_id, 'user_id': claims['u'], 'scanned_at': scanned_at.isoformat(),
+            'nonce': claims['n'], 'token_exp': claims['exp']}, scanned_at
+
+# Route sinkronisasi kiosk offline: banyak event scan sekaligus, idempotent per event id.
+# Body: {"events": [{"id": "...", "token": "<token QR>", "scanned_at": "ISO 8601"}, ...]}
+# Event diurutkan per waktu scan lalu diterapkan dalam satu transaksi; hasil per event.
+# Batch yang dikirim ulang (kiosk tidak menerima jawaban) dijawab dengan hasil yang tersimpan.
+@bp.route('/api/kiosk/sync', methods=['POST'])
+def kiosk_sync():
+    if not kiosk_authorized():
+        return jsonify({'error': 'Akses ditolak!'}), 403
+    
+    payload = request.get_json(silent=True)
+    events = payload.get('events') if isinstance(payload, dict) else None
+    if not isinstance(events, list):
+        return jsonify({'error': 'Body harus berisi list "events"'}), 400
+    if len(events) > current_app.config['KIOSK_SYNC_MAX_EVENTS']:
+        return jsonify({'error': f"Maksimal {current_app.config['KIOSK_SYNC_MAX_EVENTS']} event per request"}), 413
+    
+    latest = datetime.now() + timedelta(seconds=current_app.config['KIOSK_MAX_CLOCK_SKEW'])
+    results = []
+    accepted = []
+    seen_ids = set()
+    for raw in events:
+        event_id = raw.get('id') if isinstance(raw, dict) else None
+        try:
+            scan, scanned_at = parse_kiosk_event(raw, latest)
+        except ValueError as e:
+            results.append({'id': event_id, 'status': 'rejected', 'reason': str(e)})
+            continue
+        if scan['id'] in seen_ids:
+            results.append({'id': event_id, 'status': 'duplicate'})
+            continue
+        seen_ids.add(scan['id'])
+        results.append({'id': event_id, 'status': None})
+        accepted.append((scanned_at, scan))
+    
+    # User yang sudah dihapus: satu query untuk semua user di batch
+    user_ids = {scan['user_id'] for _, scan in accepted}
+    known_users = {user_id for (user_id,) in db.session.query(User.id).filter(User.id.in_(user_ids))}
+    unknown = {scan['id'] for _, scan in accepted if scan['user_id'] not in known_users}
+    
+    ordered = [scan for _, scan in sorted(accepted, key=lambda item: item[0])
+               if scan['id'] not in unknown]
+    applied = record_scan_events(ordered) if ordered else {}
+    duplicates = [event_id for event_id, row in applied.items() if row == 'duplicate']
+    stored = {event.event_id: event for event in
+              ScanEvent.query.filter(ScanEvent.event_id.in_(duplicates))} if duplicates else {}
+    
+    for result in results:
+        if result['status'] is not None:
+            continue
+        if result['id'] in unknown:
+            result.update(status='rejected', reason='User tidak ditemukan')
+            continue
+        row = applied[result['id']]
+        if row == 'duplicate':
+            event = stored.get(result['id'])
+            if event is None or event.outcome is None:  # dicatat sebelum hasil disimpan
+                result['status'] = 'duplicate'
+                continue
+            outcome, time_in, time_out = event.outcome, event.time_in, event.time_out
+        else:
+            outcome, time_in, time_out = scan_outcome(row)
+        if outcome == 'replayed':
+            result.update(status='rejected', reason='QR Code sudah digunakan')
+        elif outcome == 'ignored':
+            result.update(status='ignored', reason='Absensi hari itu sudah selesai atau scan sebelum check-in')
+        else:
+            result.update(
+                status=outcome,
+                time_in=time_in.isoformat(),
+                time_out=time_out.isoformat() if time_out else None,
+            )
+    
+    summary = {}
+    for result in results:
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    return jsonify({'results': results, 'summary': summary})
 
 # Route untuk scan QR (simulasi) - yang lama tetap ada
-@app.route('/scan_qr', methods=['POST'])
+@bp.route('/scan_qr', methods=['POST'])
 @login_required
 def scan_qr():
     action = request.json.get('action')  # 'checkin' atau 'checkout'
     today = date.today()
     now = datetime.now()
     
-    attendance = Attendance.query.filter_by(
-        user_id=current_user.id,
-        date=today
-    ).first()
-    
     if action == 'checkin':
-        if not attendance:
-            # Buat record absensi baru
-            attendance = Attendance(
-                user_id=current_user.id,
-                date=today,
-                time_in=now,
-                status='hadir'
-            )
-            db.session.add(attendance)
-            db.session.commit()
+        if check_in(current_user.id, today, now):
+            record_scan_result(current_user.id, today, (now, None))
             return jsonify({'success': True, 'message': 'Check-in berhasil!'})
-        elif not attendance.time_in:
-            attendance.time_in = now
-            db.session.commit()
-            return jsonify({'success': True, 'message': 'Check-in berhasil!'})
-        else:
-            return jsonify({'success': False, 'message': 'Anda sudah check-in hari ini!'})
+        return jsonify({'success': False, 'message': 'Anda sudah check-in hari ini!'})
     
     elif action == 'checkout':
-        if attendance and attendance.time_in and not attendance.time_out:
-            attendance.time_out = now
-            db.session.commit()
+        if check_out(current_user.id, today, now):
+            record_scan_result(current_user.id, today, (None, now))
             return jsonify({'success': True, 'message': 'Check-out berhasil!'})
-        elif not attendance or not attendance.time_in:
+        
+        # Gagal: baca baris hanya untuk memilih pesan error
+        attendance = Attendance.query.filter_by(
+            user_id=current_user.id,
+            date=today
+        ).first()
+        if not attendance or not attendance.time_in:
             return jsonify({'success': False, 'message': 'Anda harus check-in terlebih dahulu!'})
-        else:
-            return jsonify({'success': False, 'message': 'Anda sudah check-out hari ini!'})
+        return jsonify({'success': False, 'message': 'Anda sudah check-out hari ini!'})
     
     return jsonify({'success': False, 'message': 'Aksi tidak valid!'})
 
+# Parse tanggal filter laporan, None kalau kosong / tidak valid
+def parse_report_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+    except ValueError:
+        return None
+
+# Terapkan filter laporan (tanggal mulai/akhir, karyawan) ke query Attendance
+def apply_report_filters(query, start_date, end_date, user_filter, notify=True):
+    if start_date:
+        try:
+            start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
+            query = query.filter(Attendance.date >= start_date_obj)
+        except ValueError:
+            if notify:
+                flash('Format tanggal mulai tidak valid!')
+    
+    if end_date:
+        try:
+            end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
+            query = query.filter(Attendance.date <= end_date_obj)
+        except ValueError:
+            if notify:
+                flash('Format tanggal akhir tidak valid!')
+    
+    if user_filter:
+        query = query.filter(Attendance.user_id == user_filter)
+    
+    return query
+
+# Baris laporan dari arsip (bulan yang sudah dipindah dari tabel attendance), dengan filter
+# yang sama seperti apply_report_filters; before = posisi keyset (date, id)
+def archived_report_rows(start_date, end_date, user_filter, before=None):
+    if user_filter and not str(user_filter).isdigit():
+        return iter(())
+    return attendance_archive.rows(parse_report_date(start_date), parse_report_date(end_date),
+                                   int(user_filter) if user_filter else None, before)
+
+# Gabung baris tabel dan arsip yang sama-sama urut (date, id) desc. Baris yang ada di
+# keduanya (bulan yang sedang diarsip, atau baris yang dikembalikan oleh
+# restore_archived_attendance) diambil sekali, versi tabel yang dipakai.
+def merge_attendance_rows(hot, archived, key):
+    previous = None
+    for item in heapq.merge(hot, archived, key=key, reverse=True):
+        current = key(item)
+        if current != previous:
+            yield item
+        previous = current
+
+# Pasangkan baris arsip dengan User-nya (seperti join di query laporan, user terhapus dilewati)
+def with_report_users(rows, batch_size=500):
+    while batch := list(itertools.islice(rows, batch_size)):
+        users = {user.id: user for user in User.query.filter(User.id.in_({row.user_id for row in batch}))}
+        for row in batch:
+            if row.user_id in users:
+                yield row, users[row.user_id]
+
+# Cursor keyset laporan: "<tanggal>_<id>" dari baris terakhir halaman sebelumnya
+def encode_report_cursor(attendance):
+    return f"{attendance.date.isoformat()}_{attendance.id}"
+
+def decode_report_cursor(cursor):
+    try:
+        cursor_date, cursor_id = cursor.split('_', 1)
+        return datetime.strptime(cursor_date, '%Y-%m-%d').date(), int(cursor_id)
+    except ValueError:
+        return None
+
+# Query halaman laporan: Attendance + User dengan filter, urut (date, id) desc, mulai
+# setelah posisi keyset (date, id) kalau ada
+def attendance_report_query(start_date, end_date, user_filter, position=None, notify=True):
+    query = db.session.query(Attendance, User).join(User, Attendance.user_id == User.id)
+    query = apply_report_filters(query, start_date, end_date, user_filter, notify)
+    if position:
+        query = query.filter(tuple_(Attendance.date, Attendance.id) < tuple_(*position))
+    return query.order_by(Attendance.date.desc(), Attendance.id.desc())
+
 # Route untuk laporan absensi (Admin only)
-@app.route('/attendance_report')
+@bp.route('/attendance_report')
 @login_required
 def attendance_report():
     if not current_user.is_admin:
         flash('Akses ditolak! Hanya admin yang dapat melihat laporan.')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     # Get filter parameters
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     user_filter = request.args.get('user_id')
+    cursor = request.args.get('after')
+    page_size = current_app.config['REPORT_PAGE_SIZE']
     
-    # Base query
-    query = db.session.query(Attendance, User).join(User, Attendance.user_id == User.id)
-    
-    # Apply filters
-    if start_date:
-        try:
-            start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
-            query = query.filter(Attendance.date >= start_date_obj)
-        except:
-            flash('Format tanggal mulai tidak valid!')
+    # Keyset pagination pada (date, id): lanjut dari baris terakhir halaman sebelumnya
+    position = decode_report_cursor(cursor) if cursor else None
+    if not position:
+        cursor = None
     
-    if end_date:
-        try:
-            end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
-            query = query.filter(Attendance.date <= end_date_obj)
-        except:
-            flash('Format tanggal akhir tidak valid!')
+    # Ambil satu baris ekstra untuk tahu apakah masih ada halaman berikutnya
+    query = attendance_report_query(start_date, end_date, user_filter, position)
+    rows = query.limit(page_size + 1).all()
     
-    if user_filter:
-        query = query.filter(Attendance.user_id == user_filter)
+    # Bulan yang sudah diarsip: gabung dengan baris dari partisi arsip. Kalau halaman sudah
+    # penuh dari tabel, hanya partisi yang tanggalnya >= baris terakhir yang perlu dibuka.
+    archive_start = start_date
+    if len(rows) > page_size:
+        last_date = rows[-1][0].date
+        archive_start = max(parse_report_date(start_date) or last_date, last_date).isoformat()
+    archived = with_report_users(archived_report_rows(archive_start, end_date, user_filter, position))
+    rows = list(itertools.islice(merge_attendance_rows(
+        rows, archived, key=lambda pair: (pair[0].date, pair[0].id)), page_size + 1))
+    attendances = rows[:page_size]
+    next_cursor = encode_report_cursor(attendances[-1][0]) if len(rows) > page_size else None
+    # Nama karyawan yang sedang difilter; daftar lengkapnya lewat /api/users/search
+    filter_user = User.query.get(user_filter) if user_filter else None
     
-    # Get results
-    attendances = query.order_by(Attendance.date.desc()).limit(100).all()
-    users = User.query.filter_by(is_admin=False).all()  # For filter dropdown
+    # Angka ringkasan seluruh rentang filter, dari tabel ringkasan (bukan baris mentah)
+    summary = attendance_summary_totals(parse_report_date(start_date),
+                                        parse_report_date(end_date),
+                                        user_filter or None)
     
     return render_template('attendance_report.html', 
                          attendances=attendances,
-                         users=users,
+                         summary=summary,
+                         filter_user=filter_user,
                          start_date=start_date,
                          end_date=end_date,
-                         user_filter=user_filter)
+                         user_filter=user_filter,
+                         cursor=cursor,
+                         next_cursor=next_cursor)
+
+# Memo analitik per process, dibuat saat dipakai pertama kali (pandas baru diimport saat itu)
+def get_analytics_cache():
+    state = app_state()
+    with state.analytics_cache_lock:
+        if state.analytics_cache is None:
+            from analytics import AnalyticsCache
+            state.analytics_cache = AnalyticsCache(current_app.config['ANALYTICS_CACHE_RANGES'],
+                                                   ttl=current_app.config['ANALYTICS_CACHE_TTL'])
+        return state.analytics_cache
+
+# Kolom analitik dari ringkasan harian (attendance_daily_summary, termasuk bulan yang sudah
+# diarsip) dalam satu query: tiap baris jadi 7 angka "user,hari,menit datang,pulang,terlambat,
+# menit kerja,menit lembur" lalu digabung group_concat, jadi jutaan baris tidak perlu dibuat
+# jadi tuple Python satu per satu. days: hanya muat ulang hari-hari tsb (hari kotor karena scan baru)
+def load_analytics_columns(start, end, user_id=None, days=None):
+    from analytics import AttendanceColumns
+    
+    summary = AttendanceDailySummary
+    row = func.printf('%d,%d,%d,%d,%d,%d,%d',
+                      summary.user_id,
+                      cast(func.julianday(summary.date) - 2440587.5, db.Integer),
+                      func.coalesce(summary.arrival_minute, -1),
+                      summary.checked_out,
+                      summary.is_late,
+                      summary.worked_minutes,
+                      summary.overtime_minutes)
+    query = db.session.query(func.group_concat(row)).filter(summary.date >= start, summary.date <= end)
+    if user_id:
+        query = query.filter(summary.user_id == user_id)
+    if days is not None:
+        query = query.filter(summary.date.in_(days))
+    return AttendanceColumns.parse(query.scalar())
+
+# Route API analitik absensi (Admin only): tingkat terlambat, rata-rata jam kerja, heatmap
+# kedatangan dan tren bulanan. ?start_date=&end_date= (default 30 hari terakhir) &user_id=
+@bp.route('/api/analytics/attendance')
+@login_required
+def attendance_analytics_api():
+    if not current_user.is_admin:
+        return jsonify({'error': 'Akses ditolak!'}), 403
+    
+    end = parse_report_date(request.args.get('end_date')) or date.today()
+    start = parse_report_date(request.args.get('start_date')) or end - timedelta(days=29)
+    if start > end:
+        return jsonify({'error': 'Tanggal mulai harus sebelum tanggal akhir!'}), 400
+    user_id = request.args.get('user_id', type=int)
+    
+    from analytics import compute_attendance_analytics
+    result = get_analytics_cache().get(
+        (start, end, user_id),
+        lambda days: load_analytics_columns(start, end, user_id, days),
+        compute_attendance_analytics,
+    )
+    
+    usernames = dict(db.session.query(User.id, User.username))
+    return jsonify({
+        'start_date': start.isoformat(),
+        'end_date': end.isoformat(),
+        'user_id': user_id,
+        'work_start': current_app.config['WORK_START_TIME'],
+        'work_end': current_app.config['WORK_END_TIME'],
+        'summary': result['summary'],
+        'employees': [{**employee, 'username': usernames.get(employee['user_id'])}
+                      for employee in result['employees']],
+        'heatmap': result['heatmap'],
+        'trend': result['trend'],
+    })
+
+# Baris export laporan: kolom skalar saja (tanpa objek ORM), dibaca per batch,
+# digabung dengan baris bulan yang sudah diarsip
+def report_export_rows():
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    user_filter = request.args.get('user_id')
+    query = db.session.query(
+        Attendance.date, Attendance.id, User.username, Attendance.time_in, Attendance.time_out, Attendance.status
+    ).join(User, Attendance.user_id == User.id)
+    query = apply_report_filters(query, start_date, end_date, user_filter, notify=False)
+    query = query.order_by(Attendance.date.desc(), Attendance.id.desc())
+    
+    archived = ()
+    if attendance_archive.partitions(parse_report_date(start_date), parse_report_date(end_date)):
+        usernames = dict(db.session.query(User.id, User.username))
+        archived = ((row.date, row.id, usernames[row.user_id], row.time_in, row.time_out, row.status)
+                    for row in archived_report_rows(start_date, end_date, user_filter)
+                    if row.user_id in usernames)
+    rows = merge_attendance_rows(query.yield_per(current_app.config['EXPORT_BATCH_SIZE']), archived,
+                                 key=lambda row: (row[0], row[1]))
+    
+    for att_date, row_id, username, time_in, time_out, status in rows:
+        duration = (time_out - time_in).seconds // 60 if time_in and time_out else None
+        yield [
+            att_date.isoformat(),
+            username,
+            time_in.strftime('%H:%M:%S') if time_in else '',
+            time_out.strftime('%H:%M:%S') if time_out else '',
+            duration if duration is not None else '',
+            status,
+        ]
+
+REPORT_EXPORT_HEADER = ['Tanggal', 'Karyawan', 'Check-in', 'Check-out', 'Durasi (menit)', 'Status']
+
+# Export laporan (Admin only). Hanya CSV yang di-stream: byte pertama keluar setelah batch pertama.
+# XLSX adalah arsip zip yang baru lengkap setelah workbook.save() (openpyxl tidak bisa menulis
+# zip sebagian), jadi di-spool dulu ke file sementara lalu dikirim per 64 KB.
+@bp.route('/attendance_report/export.<any(csv, xlsx):fmt>')
+@login_required
+def export_attendance_report(fmt):
+    if not current_user.is_admin:
+        flash('Akses ditolak! Hanya admin yang dapat melihat laporan.')
+        return redirect(url_for('main.dashboard'))
+    
+    filename = f"laporan_absensi_{date.today().isoformat()}.{fmt}"
+    
+    if fmt == 'csv':
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(REPORT_EXPORT_HEADER)
+            for i, row in enumerate(report_export_rows(), 1):
+                writer.writerow(row)
+                # Kirim per batch supaya byte pertama langsung keluar
+                if i % current_app.config['EXPORT_BATCH_SIZE'] == 0:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        
+        mimetype = 'text/csv'
+        body = stream_with_context(generate())
+    else:
+        from openpyxl import Workbook
+        
+        # Mode write-only: baris langsung ditulis ke file sementara, memori tetap datar.
+        # Download baru mulai setelah seluruh laporan selesai ditulis (lihat komentar route).
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Laporan Absensi')
+        sheet.append(REPORT_EXPORT_HEADER)
+        for row in report_export_rows():
+            sheet.append(row)
+        
+        spool = tempfile.TemporaryFile()
+        workbook.save(spool)
+        spool.seek(0)
+        
+        def generate():
+            with spool:
+                while chunk := spool.read(64 * 1024):
+                    yield chunk
+        
+        mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        body = generate()
+    
+    response = Response(body, mimetype=mimetype)
+    if fmt == 'xlsx':
+        # Ukuran file spool sudah diketahui: browser bisa menampilkan progres download
+        response.content_length = os.fstat(spool.fileno()).st_size
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+# Senin-Minggu untuk minggu ini (+ offset minggu)
+def payroll_week(week_offset=0):
+    week_start = date.today() - timedelta(days=date.today().weekday()) + timedelta(weeks=week_offset)
+    return week_start, week_start + timedelta(days=6)
+
+# Generate payroll satu minggu untuk semua karyawan: satu query Attendance,
+# perhitungan vectorized (payroll.py), lalu bulk insert. Payroll yang sudah dibayar
+# tidak diubah; payroll lama yang belum dibayar diganti dan potongan hutangnya dikembalikan.
+def generate_weekly_payroll(week_start, week_end):
+    from payroll import compute_weekly_payroll
+    
+    paid_user_ids = {user_id for (user_id,) in db.session.query(Payroll.user_id)
+                     .filter(Payroll.week_start == week_start, Payroll.is_paid.is_(True))}
+    
+    # Kembalikan potongan hutang dari payroll belum dibayar yang akan diganti
+    previous = db.session.query(Payroll.user_id, Payroll.debt_deduction) \
+        .filter(Payroll.week_start == week_start, Payroll.is_paid.isnot(True)).all()
+    refunds = {user_id: deduction or 0 for user_id, deduction in previous}
+    
+    employees = [
+        (user_id, daily_wage, overtime_rate, meal_allowance, (debt_amount or 0) + refunds.get(user_id, 0), weekly_deduction)
+        for user_id, daily_wage, overtime_rate, meal_allowance, debt_amount, weekly_deduction in db.session.query(
+            User.id, EmployeeSalary.daily_wage, EmployeeSalary.overtime_rate, EmployeeSalary.meal_allowance,
+            EmployeeDebt.debt_amount, EmployeeDebt.weekly_deduction
+        ).outerjoin(EmployeeSalary, EmployeeSalary.user_id == User.id)
+         .outerjoin(EmployeeDebt, EmployeeDebt.user_id == User.id)
+         .filter(User.is_admin.isnot(True))
+        if user_id not in paid_user_ids
+    ]
+    attendance = db.session.query(Attendance.user_id, Attendance.date, Attendance.time_in, Attendance.time_out) \
+        .filter(Attendance.date >= week_start, Attendance.date <= week_end).all()
+    attendance += [(row.user_id, row.date, row.time_in, row.time_out)
+                   for row in attendance_archive.rows(week_start, week_end)]
+    
+    result = compute_weekly_payroll(attendance, employees,
+                                    dt_time.fromisoformat(current_app.config['WORK_START_TIME']),
+                                    dt_time.fromisoformat(current_app.config['WORK_END_TIME']))
+    
+    db.session.query(Payroll).filter(Payroll.week_start == week_start, Payroll.is_paid.isnot(True)) \
+        .delete(synchronize_session=False)
+    
+    now = datetime.now()
+    columns = ['user_id', 'total_days_worked', 'total_late_days', 'total_overtime_hours', 'total_meal_allowances',
+               'basic_pay', 'overtime_pay', 'meal_pay', 'gross_pay', 'debt_deduction', 'net_pay']
+    records = result[columns].to_dict('records')
+    for record in records:
+        record.update(week_start=week_start, week_end=week_end, is_paid=False, created_at=now)
+    if records:
+        db.session.execute(db.insert(Payroll), records)
+    
+    # Sisa hutang diperbarui sekaligus (bulk update by user_id)
+    debts = result[result['user_id'].isin(
+        [user_id for (user_id,) in db.session.query(EmployeeDebt.user_id)]
+    )]
+    if len(debts):
+        debt_table = EmployeeDebt.__table__
+        db.session.execute(
+            update(debt_table).where(debt_table.c.user_id == bindparam('b_user_id'))
+            .values(debt_amount=bindparam('b_debt_amount'), updated_at=now),
+            [{'b_user_id': int(user_id), 'b_debt_amount': float(remaining)}
+             for user_id, remaining in zip(debts['user_id'], debts['remaining_debt'])]
+        )
+    
+    db.session.commit()
+    return len(records)
+
+@bp.app_template_filter('terbilang')
+def terbilang_filter(value):
+    from payroll import terbilang
+    return terbilang(value)
+
+# Route untuk dashboard payroll (Admin only)
+@bp.route('/payroll')
+@login_required
+def payroll_dashboard():
+    if not current_user.is_admin:
+        flash('Akses ditolak!')
+        return redirect(url_for('main.dashboard'))
+    
+    week_offset = request.args.get('week_offset', 0, type=int)
+    week_start, week_end = payroll_week(week_offset)
+    employees = User.query.filter(User.is_admin.isnot(True)) \
+        .options(db.joinedload(User.salary_info), db.joinedload(User.debt_info)) \
+        .order_by(User.username).all()
+    current_payrolls = Payroll.query.filter_by(week_start=week_start).all()
+    total_weekly_pay = sum(payroll.net_pay or 0 for payroll in current_payrolls)
+    
+    return render_template('payroll_dashboard.html',
+                         employees=employees,
+                         current_payrolls=current_payrolls,
+                         total_weekly_pay=total_weekly_pay,
+                         week_start=week_start,
+                         week_end=week_end,
+                         week_offset=week_offset)
+
+# Route untuk generate payroll mingguan (Admin only)
+@bp.route('/generate_payroll')
+@login_required
+def generate_payroll():
+    if not current_user.is_admin:
+        flash('Akses ditolak!')
+        return redirect(url_for('main.dashboard'))
+    
+    week_offset = request.args.get('week_offset', 0, type=int)
+    week_start, week_end = payroll_week(week_offset)
+    
+    try:
+        count = generate_weekly_payroll(week_start, week_end)
+        flash(f'Payroll {count} karyawan untuk minggu {week_start.strftime("%d/%m/%Y")} berhasil dibuat!')
+    except Exception as e:
+        flash(f'Error: {str(e)}')
+        db.session.rollback()
+    
+    return redirect(url_for('main.payroll_dashboard', week_offset=week_offset))
+
+# Route untuk edit gaji & hutang karyawan (Admin only)
+@bp.route('/employee_salary/<int:user_id>', methods=['GET', 'POST'])
+@login_required
+def employee_salary(user_id):
+    if not current_user.is_admin:
+        flash('Akses ditolak!')
+        return redirect(url_for('main.dashboard'))
+    
+    user = User.query.get_or_404(user_id)
+    salary = user.salary_info
+    debt = user.debt_info
+    
+    if request.method == 'POST':
+        try:
+            if not salary:
+                salary = EmployeeSalary(user_id=user.id)
+                db.session.add(salary)
+            salary.daily_wage = request.form.get('daily_wage', 0, type=float)
+            salary.overtime_rate = request.form.get('overtime_rate', 0, type=float)
+            salary.meal_allowance = request.form.get('meal_allowance', 0, type=float)
+            
+            if not debt:
+                debt = EmployeeDebt(user_id=user.id)
+                db.session.add(debt)
+            debt.debt_amount = request.form.get('debt_amount', 0, type=float)
+            debt.weekly_deduction = request.form.get('weekly_deduction', 0, type=float)
+            debt.description = request.form.get('debt_description', '').strip()
+            
+            db.session.commit()
+            flash(f'Pengaturan gaji {user.username} berhasil disimpan!')
+            return redirect(url_for('main.payroll_dashboard'))
+        except Exception as e:
+            flash(f'Error: {str(e)}')
+            db.session.rollback()
+    
+    return render_template('employee_salary.html', user=user, salary=salary, debt=debt)
+
+# Route untuk slip gaji (Admin only)
+@bp.route('/payslip/<int:payroll_id>')
+@login_required
+def payslip(payroll_id):
+    if not current_user.is_admin:
+        flash('Akses ditolak!')
+        return redirect(url_for('main.dashboard'))
+    
+    payroll = Payroll.query.get_or_404(payroll_id)
+    return render_template('payslip.html', payroll=payroll)
+
+def week_payslip_dir(week_start):
+    return os.path.join(current_app.config['PAYSLIP_DIR'], week_start.isoformat())
+
+# Render PDF slip gaji semua karyawan untuk satu minggu (paralel, slip yang tidak
+# berubah dilewati). Return (daftar path, jumlah yang di-render ulang).
+def render_week_payslips(week_start, output_dir=None):
+    from payslip_pdf import payslip_record, render_payslips
+    
+    payrolls = Payroll.query.filter_by(week_start=week_start) \
+        .options(db.joinedload(Payroll.user).joinedload(User.debt_info)) \
+        .order_by(Payroll.id).all()
+    records = [payslip_record(payroll) for payroll in payrolls]
+    output_dir = output_dir or week_payslip_dir(week_start)
+    return render_payslips(records, output_dir, workers=current_app.config['PAYSLIP_WORKERS'])
+
+# Route untuk download semua slip gaji satu minggu sebagai zip (Admin only)
+@bp.route('/payroll/payslips.zip')
+@login_required
+def download_payslips():
+    if not current_user.is_admin:
+        flash('Akses ditolak!')
+        return redirect(url_for('main.dashboard'))
+    
+    from payslip_pdf import stream_zip
+    
+    week_offset = request.args.get('week_offset', 0, type=int)
+    week_start, week_end = payroll_week(week_offset)
+    paths, rendered = render_week_payslips(week_start)
+    if not paths:
+        flash('Belum ada payroll untuk minggu ini!')
+        return redirect(url_for('main.payroll_dashboard', week_offset=week_offset))
+    
+    response = Response(stream_zip(paths), mimetype='application/zip')
+    response.headers['Content-Disposition'] = f'attachment; filename="slip_gaji_{week_start.isoformat()}.zip"'
+    return response
 
 # Route untuk konfigurasi URL (Admin only)
-@app.route('/config', methods=['GET', 'POST'])
+@bp.route('/config', methods=['GET', 'POST'])
 @login_required
 def config():
     if not current_user.is_admin:
         flash('Akses ditolak!')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     if request.method == 'POST':
-        base_url = request.form.get('base_url', '').strip()
+        base_url = request.form.get('base_url', '').strip().rstrip('/')
+        if base_url and not base_url.startswith(('http://', 'https://')):
+            flash('Base URL harus diawali http:// atau https://')
+            return redirect(url_for('main.config'))
+        # Disimpan di DB supaya semua worker ikut berubah (paling lambat setelah BASE_URL_CACHE_TTL)
+        set_setting('base_url', base_url or None)
+        db.session.commit()
+        base_url_resolver.invalidate()
         if base_url:
-            os.environ['BASE_URL'] = base_url
             flash(f'Base URL berhasil diset ke: {base_url}')
         else:
-            if 'BASE_URL' in os.environ:
-                del os.environ['BASE_URL']
             flash('Base URL berhasil di-reset ke otomatis')
+        return redirect(url_for('main.config'))
     
-    current_url = os.getenv('BASE_URL', 'Otomatis')
-    local_ip = get_local_ip()
+    info = base_url_resolver.info()
     
     return render_template('config.html', 
-                         current_url=current_url,
-                         local_ip=local_ip)
+                         current_url=info['configured'] or 'Otomatis',
+                         base_url=info['base_url'],
+                         source=info['source'],
+                         local_ip=info['local_ip'])
 
 # Fungsi untuk membuat user admin default
 def create_admin_user():
@@ -517,22 +2187,222 @@ def create_admin_user():
         print(" Admin: admin / admin123")
         print(" User: user1 / password123")
 
-# Inisialisasi database
+# Jalankan migrasi; isi ringkasan absensi dari data lama kalau tabelnya baru dibuat
+def upgrade_schema():
+    applied = migrations.upgrade(db.engine)
+    for version, name in applied:
+        print(f" Migrasi: {name}")
+    if any(version in migrations.SUMMARY_REBUILD_VERSIONS for version, name in applied):
+        count = rebuild_attendance_summaries()
+        print(f" Ringkasan absensi dibangun dari {count} baris")
+    return applied
+
+# Inisialisasi database: skema terbaru + user default. Tidak pernah jalan otomatis saat
+# import / start server, tapi lewat flask --app app init-db
 def init_database():
-    try:
-        with app.app_context():
-            db.create_all()
-            create_admin_user()
-            print(f" Database: {os.path.join(instance_dir, 'database.db')}")
-    except Exception as e:
-        print(f" Error database: {e}")
+    upgrade_schema()
+    create_admin_user()
+    print(f" Database: {db.engine.url.render_as_string(hide_password=True)}")
+
+# Migrasi yang belum diterapkan ke database (server menolak start kalau masih ada)
+def pending_migrations():
+    return migrations.pending(db.engine)
+
+# CLI: flask --app app init-db
+@bp.cli.command('init-db')
+def init_db_command():
+    init_database()
+
+# CLI: flask --app app migrate
+@bp.cli.command('migrate')
+def migrate_command():
+    if not upgrade_schema():
+        print(" Skema sudah versi terbaru")
+
+# CLI: flask --app app rebuild-summaries [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+@bp.cli.command('rebuild-summaries')
+@click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), default=None)
+@click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), default=None)
+def rebuild_summaries_command(start, end):
+    count = rebuild_attendance_summaries(start.date() if start else None, end.date() if end else None)
+    print(f" Ringkasan absensi dibangun ulang dari {count} baris")
+
+# Pindahkan bulan yang sudah tutup (sebelum ARCHIVE_KEEP_MONTHS bulan terakhir) dari tabel
+# attendance ke partisi arsip, satu bulan per transaksi: partisi ditulis dulu, baru barisnya
+# dihapus (satu DELETE per bulan). Ringkasan harian/bulanan tetap di database, jadi angka
+# ringkasan laporan tidak berubah. Return list (bulan, jumlah baris, entry manifest).
+def archive_closed_months(keep_months=None):
+    keep_months = current_app.config['ARCHIVE_KEEP_MONTHS'] if keep_months is None else keep_months
+    cutoff = date.today().replace(day=1)
+    for _ in range(keep_months - 1):
+        cutoff = (cutoff - timedelta(days=1)).replace(day=1)
+    
+    columns = (Attendance.id, Attendance.user_id, Attendance.date,
+               Attendance.time_in, Attendance.time_out, Attendance.status)
+    archived = []
+    oldest = db.session.query(func.min(Attendance.date)).filter(Attendance.date < cutoff).scalar()
+    month = oldest.replace(day=1) if oldest else cutoff
+    while month < cutoff:
+        in_month = (Attendance.date >= month, Attendance.date < next_month(month))
+        rows = [tuple(row) for row in db.session.query(*columns).filter(*in_month)]
+        if rows:
+            entry = attendance_archive.write_month(month, rows)
+            deleted = [tuple(row) for row in db.session.execute(
+                db.delete(Attendance).where(*in_month).returning(*columns))]
+            # Riwayat absensi user-user ini berubah (baris pindah ke arsip)
+            changed_users = {row[1] for row in deleted}
+            if changed_users:
+                execute_prepared(cache_version_upsert, [{'user_id': user_id, 'version': 1}
+                                                        for user_id in changed_users])
+            # Ada scan/sync yang mengubah bulan ini sejak dibaca: simpan versi yang dihapus
+            if set(deleted) != set(rows):
+                entry = attendance_archive.write_month(month, deleted)
+            db.session.commit()
+            archived.append((month, len(deleted), entry))
+        month = next_month(month)
+    return archived
+
+# CLI: flask --app app build-assets
+# Fingerprint dan kompres (gzip, brotli kalau terinstall) semua CSS/JS ke static/dist
+@bp.cli.command('build-assets')
+def build_assets_command():
+    for name, hashed, size, gzip_size, brotli_size in build_assets(current_app.static_folder, current_app.config['ASSET_DIST_DIR']):
+        brotli_info = f", br {brotli_size / 1024:.1f} KB" if brotli_size is not None else ''
+        print(f" {name} -> {hashed}  ({size / 1024:.1f} KB, gzip {gzip_size / 1024:.1f} KB{brotli_info})")
+
+# CLI: flask --app app archive-attendance [--keep-months N] [--vacuum]
+@bp.cli.command('archive-attendance')
+@click.option('--keep-months', type=click.IntRange(min=1), default=None)
+@click.option('--vacuum', is_flag=True, help='VACUUM database SQLite setelah arsip (ukuran file mengecil)')
+def archive_attendance_command(keep_months, vacuum):
+    archived = archive_closed_months(keep_months)
+    for month, count, entry in archived:
+        print(f" Arsip {month:%Y-%m}: {count} baris -> {entry['file']} ({entry['bytes'] // 1024} KB)")
+    if not archived:
+        print(" Tidak ada bulan yang perlu diarsip")
+    
+    removed = attendance_archive.purge_deleted_users()
+    if removed:
+        print(f" {removed} baris arsip milik user terhapus dibuang")
+    
+    if vacuum:
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.exec_driver_sql('VACUUM')
+        print(" VACUUM selesai")
+
+# Query panas yang dipakai route (builder yang sama), dengan contoh parameter.
+# Index yang harus dipakai masing-masing dicek di tests/test_query_plans.py.
+def hot_queries():
+    today = date.today()
+    week_ago = (today - timedelta(days=7)).isoformat()
+    page = current_app.config['REPORT_PAGE_SIZE'] + 1
+    return {
+        'riwayat per user': attendance_history_query(1),
+        'laporan rentang tanggal': attendance_report_query(week_ago, today.isoformat(), None).limit(page),
+        'laporan terbaru': attendance_report_query(None, None, None).limit(page),
+        'laporan halaman berikutnya': attendance_report_query(None, None, None, (today, 1)).limit(page),
+        'laporan per karyawan': attendance_report_query(week_ago, today.isoformat(), '1').limit(page),
+        'cari karyawan': user_search_query('abc', 10),
+        'manajemen user': user_list_query('abc').limit(current_app.config['USERS_PAGE_SIZE']),
+    }
+
+# Detail EXPLAIN QUERY PLAN satu query ORM (satu string per langkah plan)
+def explain_query_plan(query):
+    compiled = query.statement.compile(dialect=db.engine.dialect)
+    params = compiled.construct_params()
+    args = tuple(params[key] for key in compiled.positiontup)
+    plan = db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", args).fetchall()
+    return [row[-1] for row in plan]
+
+# Langkah plan yang membaca seluruh tabel tanpa index
+def full_table_scans(details):
+    return [detail for detail in details if detail.startswith('SCAN ') and 'INDEX' not in detail]
+
+# CLI: flask --app app explain-queries
+# Cek query panas pakai index (EXPLAIN QUERY PLAN), exit 1 kalau ada full scan
+@bp.cli.command('explain-queries')
+def explain_queries_command():
+    full_scans = 0
+    for name, query in hot_queries().items():
+        details = explain_query_plan(query)
+        scan = bool(full_table_scans(details))
+        full_scans += scan
+        print(f" {'FULL SCAN' if scan else 'OK'}: {name}")
+        for detail in details:
+            print(f"     {detail}")
+    
+    if full_scans:
+        raise SystemExit(1)
+
+# CLI: flask --app app render-payslips [--week-offset N] [--output DIR] [--zip FILE]
+@bp.cli.command('render-payslips')
+@click.option('--week-offset', type=int, default=0)
+@click.option('--output', type=click.Path(file_okay=False), default=None)
+@click.option('--zip', 'zip_path', type=click.Path(dir_okay=False), default=None)
+def render_payslips_command(week_offset, output, zip_path):
+    from payslip_pdf import stream_zip
+    
+    week_start, week_end = payroll_week(week_offset)
+    paths, rendered = render_week_payslips(week_start, output)
+    print(f" {len(paths)} slip gaji, {rendered} di-render ulang, {len(paths) - rendered} tidak berubah")
+    
+    if zip_path:
+        with open(zip_path, 'wb') as f:
+            for chunk in stream_zip(paths):
+                f.write(chunk)
+        print(f" Zip: {zip_path}")
+
+def configure_logging():
+    logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO'),
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+# Konfigurasi process, bukan saat import: zona waktu jam absensi, logging, folder instance
+def configure_process(app):
+    if os.environ.get('TZ') != app.config['TIMEZONE']:
+        os.environ['TZ'] = app.config['TIMEZONE']
+        time.tzset()
+    configure_logging()
+    os.makedirs(instance_dir, exist_ok=True)
+
+# App factory: semua entry point (wsgi.py, python app.py, perintah CLI, add_user.py, test) lewat
+# sini. Setiap panggilan membuat app baru dengan config, engine database, cache dan metrik sendiri;
+# `config` menimpa default (misalnya create_app({'SQLALCHEMY_DATABASE_URI': ...}) untuk test).
+# Import app.py sendiri tidak mengubah process dan tidak menyentuh database; library berat
+# (qrcode/Pillow, pandas, openpyxl, fpdf) baru diimport saat pertama dipakai.
+def create_app(config=None):
+    app = Flask(__name__)
+    load_config(app, config)
+    configure_process(app)
+    db.init_app(app)
+    login_manager.init_app(app)
+    init_state(app)
+    with app.app_context():
+        register_engine_events(app, db.engine)
+    app.register_blueprint(bp)
+    return app
+
+# Pekerjaan latar per process server. Dipanggil di setiap worker setelah fork: koneksi DB
+# warisan master dibuang, lalu roster harian dan buffer scan dijalankan di worker itu.
+def start_worker(app):
+    with app.app_context():
+        db.engine.dispose(close=False)
+        if app.config['SCAN_BUFFER_ENABLED']:
+            get_scan_buffer()  # replay journal sisa crash sebelum menerima scan
+    start_daily_job(lambda: daily_rollover(app))
+
+# Tulis sisa antrian buffer scan sebelum worker berhenti
+def stop_worker(app):
+    scan_buffer = app.extensions['absensi'].scan_buffer
+    if scan_buffer is not None:
+        scan_buffer.stop()
 
 def print_startup_info():
     print("\n" + "="*60)
     print(" SISTEM ABSENSI QR CODE")
     print("="*60)
     
-    local_ip = get_local_ip()
+    info = base_url_resolver.info()
+    local_ip = info['local_ip']
     
     print(f" Localhost: http://127.0.0.1:5000")
     if local_ip != "127.0.0.1":
@@ -548,12 +2418,18 @@ def print_startup_info():
     print(f"\n ENVIRONMENT VARIABLES (optional):")
     print(f"   NGROK_URL=https://your-ngrok-url.ngrok.app")
     print(f"   BASE_URL=http://your-custom-url.com")
+    print(f"\n Base URL QR: {info['base_url']} ({info['source']})")
     
     print("\n" + "="*60 + "\n")
 
 if __name__ == '__main__':
-    init_database()
-    print_startup_info()
+    app = create_app()
+    with app.app_context():
+        if pending_migrations():
+            print(" Skema database belum dibuat / belum terbaru. Jalankan dulu: flask --app app init-db")
+            raise SystemExit(1)
+        print_startup_info()
+    start_worker(app)
     
     # Jalankan dengan host 0.0.0.0 agar bisa diakses dari HP
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,244 @@
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from cache import LRUCache
+
+try:
+    import fcntl
+except ImportError:  # Windows: tanpa flock, jangan jalankan arsip bersamaan dengan hapus user
+    fcntl = None
+
+# Satu baris absensi dari arsip, atribut sama dengan model Attendance (dipakai template laporan)
+ArchivedAttendance = namedtuple('ArchivedAttendance', ['id', 'user_id', 'date', 'time_in', 'time_out', 'status'])
+FIELDS = list(ArchivedAttendance._fields)
+
+MANIFEST_VERSION = 1
+
+
+def _month_key(day):
+    return f'{day.year:04d}-{day.month:02d}'
+
+
+def _format_datetime(value):
+    return value.isoformat(sep=' ', timespec='microseconds') if value else ''
+
+
+def _parse_datetime(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+# Arsip data dingin Attendance: satu file CSV gzip per bulan (attendance-YYYY-MM-<hash>.csv.gz)
+# plus manifest.json berisi ringkasan tiap partisi (jumlah baris, tanggal min/max, ukuran,
+# sha256), jadi pembaca bisa melewati partisi di luar rentang tanpa membuka filenya.
+# File partisi tidak pernah ditimpa: versi baru ditulis dengan nama baru, manifest diganti
+# atomik, baru file lama dihapus. Manifest dibaca ulang kalau berubah (arsip dari process lain).
+class AttendanceArchive:
+    def __init__(self, directory, cache_partitions=4):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, 'manifest.json')
+        self.partitions_read = 0
+        self._manifest = None
+        self._manifest_stat = None
+        self.cache = LRUCache(cache_partitions)  # nama file -> baris terurut (date, id) desc
+
+    def _empty_manifest(self):
+        return {'version': MANIFEST_VERSION, 'partitions': {}, 'deleted_users': {}}
+
+    def manifest(self):
+        try:
+            stat = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            self._manifest, self._manifest_stat = None, None
+            return self._empty_manifest()
+        signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if self._manifest is None or signature != self._manifest_stat:
+            with open(self.manifest_path) as f:
+                self._manifest = json.load(f)
+            self._manifest_stat = signature
+        return self._manifest
+
+    def _write_manifest(self, manifest):
+        temp_path = self.manifest_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.manifest_path)
+
+    # Kunci antar process untuk read-modify-write manifest (arsip vs hapus user)
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, 'manifest.lock'), 'w') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            self._manifest = None
+            try:
+                yield self.manifest()
+            finally:
+                self._manifest = None  # salinan yang diubah di dalam blok tidak dipakai lagi
+
+    # Entry manifest yang tanggalnya beririsan dengan [start, end], bulan terbaru dulu
+    def partitions(self, start=None, end=None):
+        entries = []
+        for month, entry in self.manifest()['partitions'].items():
+            if start and entry['max_date'] < start.isoformat():
+                continue
+            if end and entry['min_date'] > end.isoformat():
+                continue
+            entries.append(dict(entry, month=month))
+        return sorted(entries, key=lambda entry: entry['month'], reverse=True)
+
+    def path(self, entry):
+        return os.path.join(self.directory, entry['file'])
+
+    def _read_file(self, path):
+        with gzip.open(path, 'rt', newline='') as f:
+            reader = csv.reader(f)
+            next(reader)  # header
+            return [ArchivedAttendance(int(row_id), int(user_id), date.fromisoformat(day),
+                                       _parse_datetime(time_in), _parse_datetime(time_out), status or None)
+                    for row_id, user_id, day, time_in, time_out, status in reader]
+
+    def read_partition(self, entry):
+        def load():
+            self.partitions_read += 1
+            rows = self._read_file(self.path(entry))
+            rows.sort(key=lambda row: (row.date, row.id), reverse=True)
+            return rows
+        return self.cache.get_or_load(entry['file'], load)
+
+    # Baris arsip urut (date, id) desc, difilter rentang tanggal (inklusif), user dan
+    # `before` = (date, id) posisi keyset. Baris user yang sudah dihapus tidak ikut.
+    def rows(self, start=None, end=None, user_id=None, before=None):
+        if before is not None:
+            end = min(end, before[0]) if end else before[0]
+        deleted = self.manifest()['deleted_users']
+        for entry in self.partitions(start, end):
+            try:
+                rows = self.read_partition(entry)
+            except FileNotFoundError:
+                # Partisi baru saja diganti process lain: ambil dari manifest terbaru
+                entry = self.manifest()['partitions'].get(entry['month'])
+                if entry is None:
+                    continue
+                rows = self.read_partition(entry)
+            for row in rows:
+                if end and row.date > end:
+                    continue
+                if start and row.date < start:
+                    break
+                if before is not None and (row.date, row.id) >= before:
+                    continue
+                if user_id and row.user_id != user_id:
+                    continue
+                if str(row.user_id) in deleted and row.date.isoformat() <= deleted[str(row.user_id)]:
+                    continue
+                yield row
+
+    def _write_partition(self, manifest, month, rows):
+        rows = sorted(rows, key=lambda row: (row.date, row.id))
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(FIELDS)
+        for row in rows:
+            writer.writerow([row.id, row.user_id, row.date.isoformat(), _format_datetime(row.time_in),
+                             _format_datetime(row.time_out), row.status or ''])
+        data = gzip.compress(buffer.getvalue().encode(), compresslevel=6, mtime=0)
+        digest = hashlib.sha256(data).hexdigest()
+
+        old = manifest['partitions'].get(month)
+        if not rows:
+            manifest['partitions'].pop(month, None)
+        else:
+            filename = f'attendance-{month}-{digest[:12]}.csv.gz'
+            temp_path = os.path.join(self.directory, filename + '.tmp')
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, os.path.join(self.directory, filename))
+            manifest['partitions'][month] = {
+                'file': filename,
+                'rows': len(rows),
+                'users': len({row.user_id for row in rows}),
+                'min_date': rows[0].date.isoformat(),
+                'max_date': rows[-1].date.isoformat(),
+                'bytes': len(data),
+                'sha256': digest,
+                'archived_at': datetime.now().isoformat(timespec='seconds'),
+            }
+        self._write_manifest(manifest)
+        if old and (not rows or old['file'] != manifest['partitions'][month]['file']):
+            try:
+                os.remove(os.path.join(self.directory, old['file']))
+            except FileNotFoundError:
+                pass
+        return manifest['partitions'].get(month)
+
+    # Simpan baris satu bulan ke partisinya. Kalau bulan itu sudah diarsip, baris lama
+    # digabung: baris baru menang untuk (user_id, date) yang sama. Return entry manifest.
+    # Baris baru boleh dihapus dari tabel setelah fungsi ini selesai.
+    def write_month(self, month, rows):
+        month = _month_key(month)
+        with self._locked() as manifest:
+            merged = {}
+            if month in manifest['partitions']:
+                for row in self._read_file(self.path(manifest['partitions'][month])):
+                    merged[(row.user_id, row.date)] = row
+            for row in rows:
+                row = ArchivedAttendance(*row)
+                if _month_key(row.date) != month:
+                    raise ValueError(f'Baris {row.date} bukan bulan {month}')
+                merged[(row.user_id, row.date)] = row
+            return self._write_partition(manifest, month, merged.values())
+
+    # User dihapus: baris arsipnya sampai `day` langsung disembunyikan dari pembaca, lalu
+    # dibuang dari file saat purge_deleted_users() (CLI archive-attendance)
+    def forget_user(self, user_id, day):
+        if not os.path.exists(self.manifest_path):
+            return
+        with self._locked() as manifest:
+            if not manifest['partitions']:
+                return
+            manifest['deleted_users'][str(user_id)] = day.isoformat()
+            self._write_manifest(manifest)
+
+    # Tulis ulang partisi yang berisi baris user terhapus. Return jumlah baris yang dibuang.
+    def purge_deleted_users(self):
+        if not os.path.exists(self.manifest_path):
+            return 0
+        removed = 0
+        with self._locked() as manifest:
+            deleted = manifest['deleted_users']
+            if not deleted:
+                return 0
+            for month, entry in sorted(manifest['partitions'].items()):
+                if entry['min_date'] > max(deleted.values()):
+                    continue
+                rows = self._read_file(self.path(entry))
+                kept = [row for row in rows
+                        if not (str(row.user_id) in deleted and row.date.isoformat() <= deleted[str(row.user_id)])]
+                if len(kept) != len(rows):
+                    removed += len(rows) - len(kept)
+                    self._write_partition(manifest, month, kept)
+            manifest['deleted_users'] = {}
+            self._write_manifest(manifest)
+        return removed
+
+    def stats(self):
+        partitions = self.manifest()['partitions']
+        return {
+            'partitions': len(partitions),
+            'rows': sum(entry['rows'] for entry in partitions.values()),
+            'bytes': sum(entry['bytes'] for entry in partitions.values()),
+            'partitions_read': self.partitions_read,
+            'cache': self.cache.stats(),
+        }
@@ -0,0 +1,155 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+try:
+    import brotli
+except ImportError:  # opsional: tanpa paket Brotli hanya versi .gz yang dibuat
+    brotli = None
+
+# Folder di dalam static/ yang berisi asset sumber (CSS/JS halaman ada di subfolder pages/)
+SOURCE_DIRS = ('css', 'js')
+SOURCE_EXTENSIONS = ('.css', '.js')
+MANIFEST = 'manifest.json'
+# Versi terkompresi yang dicoba berurutan saat menyajikan asset
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+# css/style.css -> css/style.<hash isi>.css
+def fingerprint(name, data):
+    base, ext = os.path.splitext(name)
+    return f'{base}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+
+
+def _is_source_name(name):
+    parts = name.split('/')
+    return parts[0] in SOURCE_DIRS and '..' not in parts and name.endswith(SOURCE_EXTENSIONS)
+
+
+# Nama asset sumber relatif ke static/, contoh 'css/pages/dashboard.css'
+def source_names(static_dir):
+    for source_dir in SOURCE_DIRS:
+        for root, dirs, files in os.walk(os.path.join(static_dir, source_dir)):
+            dirs.sort()
+            for filename in sorted(files):
+                if filename.endswith(SOURCE_EXTENSIONS):
+                    yield os.path.relpath(os.path.join(root, filename), static_dir).replace(os.sep, '/')
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+# Build asset ke dist_dir: salinan ber-hash setiap file sumber plus .gz (dan .br kalau
+# Brotli terinstall), lalu manifest.json. File build sebelumnya tetap disimpan satu generasi
+# supaya halaman yang sudah terbuka saat deploy masih bisa memuat asset lamanya.
+# Return list (nama, nama ber-hash, ukuran asli, ukuran gzip, ukuran brotli atau None).
+def build_assets(static_dir, dist_dir):
+    previous = {}
+    try:
+        with open(os.path.join(dist_dir, MANIFEST)) as f:
+            previous = json.load(f)
+    except FileNotFoundError:
+        pass
+
+    assets = {}
+    built = []
+    for name in source_names(static_dir):
+        with open(os.path.join(static_dir, name), 'rb') as f:
+            data = f.read()
+        hashed = fingerprint(name, data)
+        assets[name] = hashed
+        target = os.path.join(dist_dir, hashed)
+        if not os.path.exists(target):
+            _write_atomic(target + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write_atomic(target + '.br', brotli.compress(data, quality=11))
+            _write_atomic(target, data)  # terakhir: file ada = versi kompresinya juga sudah ada
+        compressed = os.path.getsize(target + '.gz')
+        brotli_size = os.path.getsize(target + '.br') if os.path.exists(target + '.br') else None
+        built.append((name, hashed, len(data), compressed, brotli_size))
+
+    files = sorted(set(assets.values()) | set(previous.get('assets', {}).values()))
+    _write_atomic(os.path.join(dist_dir, MANIFEST),
+                  json.dumps({'assets': assets, 'files': files}, indent=1, sort_keys=True).encode())
+
+    # Hapus file build yang lebih tua dari satu generasi
+    keep = {os.path.normpath(os.path.join(dist_dir, hashed)) for hashed in files}
+    for root, dirs, filenames in os.walk(dist_dir):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            base = path
+            for suffix in ('.gz', '.br'):
+                base = base[:-len(suffix)] if base.endswith(suffix) else base
+            if filename != MANIFEST and os.path.normpath(base) not in keep:
+                os.remove(path)
+    return built
+
+
+# Peta nama asset -> nama ber-hash untuk URL. Memakai dist/manifest.json hasil build_assets
+# kalau ada (dibaca ulang kalau berubah); tanpa build, atau use_build=False (mode debug),
+# hash dihitung dari file sumber dan dihitung ulang kalau filenya diubah.
+class AssetManifest:
+    def __init__(self, static_dir, dist_dir):
+        self.static_dir = static_dir
+        self.dist_dir = dist_dir
+        self._built = None
+        self._built_signature = None
+        self._sources = {}  # nama -> (signature file, nama ber-hash)
+        self._lock = threading.Lock()
+
+    def built(self):
+        path = os.path.join(self.dist_dir, MANIFEST)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if signature != self._built_signature:
+                with open(path) as f:
+                    manifest = json.load(f)
+                self._built = (manifest['assets'], set(manifest['files']))
+                self._built_signature = signature
+            return self._built
+
+    def _source_hash(self, name):
+        path = os.path.join(self.static_dir, name)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._sources.get(name)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        with open(path, 'rb') as f:
+            hashed = fingerprint(name, f.read())
+        self._sources[name] = (signature, hashed)
+        return hashed
+
+    def hashed_name(self, name, use_build=True):
+        built = self.built() if use_build else None
+        if built is not None and name in built[0]:
+            return built[0][name]
+        return self._source_hash(name)
+
+    # Nama ber-hash dari URL -> (direktori, nama file) untuk dikirim, None kalau tidak dikenal
+    # atau hash-nya bukan isi file saat ini
+    def locate(self, hashed, use_build=True):
+        built = self.built() if use_build else None
+        if built is not None and hashed in built[1]:
+            return self.dist_dir, hashed
+        base, ext = os.path.splitext(hashed)
+        name = base.rpartition('.')[0] + ext
+        if not _is_source_name(name):
+            return None
+        try:
+            if self._source_hash(name) == hashed:
+                return self.static_dir, name
+        except FileNotFoundError:
+            pass
+        return None
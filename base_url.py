@@ -0,0 +1,86 @@
+import logging
+import os
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+LOCALHOST = '127.0.0.1'
+
+
+# IP lokal: "connect" UDP ke Google DNS (tidak ada paket yang dikirim), 127.0.0.1 kalau offline
+def detect_local_ip():
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(("8.8.8.8", 80))
+            return s.getsockname()[0]
+    except OSError:
+        return LOCALHOST
+
+
+# Base URL untuk payload QR, di-resolve sekali lalu di-cache per process selama `ttl` detik.
+# Prioritas: NGROK_URL > setting dari /config (DB) > BASE_URL > IP lokal > localhost.
+# Setelah ttl habis setting dibaca ulang dan IP lokal dicek lagi, jadi perubahan dari worker
+# lain atau pindah jaringan (IP berubah) terlihat paling lambat setelah ttl.
+class BaseURLResolver:
+    def __init__(self, load_setting, ttl=30, port=5000):
+        self.load_setting = load_setting  # callable -> URL dari DB atau None
+        self.ttl = ttl
+        self.port = port
+        self.refreshes = 0
+        self._state = None  # dict base_url/source/configured/local_ip
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def _resolve(self, configured, local_ip):
+        ngrok_url = os.getenv('NGROK_URL')
+        if ngrok_url:
+            return ngrok_url.rstrip('/'), 'ngrok'
+        if configured:
+            return configured.rstrip('/'), 'config'
+        manual_url = os.getenv('BASE_URL')
+        if manual_url:
+            return manual_url.rstrip('/'), 'env'
+        if local_ip != LOCALHOST:
+            return f'http://{local_ip}:{self.port}', 'local_ip'
+        return f'http://localhost:{self.port}', 'localhost'
+
+    def _refresh(self):
+        previous = self._state or {}
+        local_ip = detect_local_ip()
+        if previous and local_ip != previous['local_ip']:
+            logger.info("Jaringan berubah: IP lokal %s -> %s", previous['local_ip'], local_ip)
+        try:
+            configured = self.load_setting()
+        except Exception:
+            # DB tidak bisa dibaca: pakai setting terakhir yang diketahui
+            logger.warning("Gagal membaca base URL dari database", exc_info=True)
+            configured = previous.get('configured')
+
+        base_url, source = self._resolve(configured, local_ip)
+        if base_url != previous.get('base_url'):
+            logger.info("Base URL QR: %s (%s)", base_url, source)
+        self._state = {'base_url': base_url, 'source': source,
+                       'configured': configured, 'local_ip': local_ip}
+        self._expires_at = time.monotonic() + self.ttl
+        self.refreshes += 1
+
+    def info(self):
+        state = self._state
+        if state is not None and time.monotonic() < self._expires_at:
+            return state
+        with self._lock:
+            if self._state is None or time.monotonic() >= self._expires_at:
+                self._refresh()
+            return self._state
+
+    def base_url(self):
+        return self.info()['base_url']
+
+    def local_ip(self):
+        return self.info()['local_ip']
+
+    # Paksa resolve ulang pada pemanggilan berikutnya (setelah /config disimpan)
+    def invalidate(self):
+        self._expires_at = 0.0
@@ -0,0 +1,82 @@
+# Benchmark API analitik absensi (/api/analytics/attendance) pada data besar.
+# Jalankan: python benchmarks/bench_analytics.py --users 2000 --days 1826   (5 tahun x 2000 karyawan)
+# Mengukur request pertama (muat kolom + hitung), memo hit, refresh setelah scan baru,
+# filter satu karyawan dan rentang lain. Database sementara, instance/ tidak disentuh.
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_common  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--database', help='Pakai database yang sudah di-seed (lewati seed)')
+    parser.add_argument('--output', help='Simpan hasil ke file JSON ini')
+    args = parser.parse_args()
+
+    database = bench_common.use_scratch_database(args.database)
+    import app as absensi
+    app = absensi.create_app()
+
+    if args.database:
+        with app.app_context():
+            absensi.upgrade_schema()
+            user_ids = [user_id for (user_id,) in absensi.db.session.query(absensi.User.id)
+                        .filter(absensi.User.username.like('bench%'))]
+    else:
+        started = time.perf_counter()
+        user_ids = bench_common.seed_database(absensi, app, args.users, args.days)
+        print(f"Seed {args.users} user x {args.days} hari: {time.perf_counter() - started:.1f}s")
+    with app.app_context():
+        rows = absensi.Attendance.query.count()
+    print(f"Database: {database}  baris absensi={rows}")
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    today = date.today()
+    full_range = {'start_date': (today - timedelta(days=args.days)).isoformat(), 'end_date': today.isoformat()}
+
+    def timed(label, query):
+        started = time.perf_counter()
+        response = client.get('/api/analytics/attendance', query_string=query)
+        elapsed = time.perf_counter() - started
+        assert response.status_code == 200, response.status_code
+        summary = response.get_json()['summary']
+        print(f"{label:<28} {elapsed * 1000:9.1f}ms  hadir={summary['days_present']} "
+              f"terlambat={summary['late_rate']} jam={summary['avg_hours']}")
+        return elapsed
+
+    results = {
+        'cold': timed('pertama (muat + hitung)', full_range),
+        'memo_hit': timed('memo hit', full_range),
+    }
+
+    # Scan baru hari ini: hanya hari ini yang dimuat ulang
+    with app.app_context():
+        token = absensi.qr_signer.issue(user_ids[0])
+    client.get(f'/qr_scan?token={token}')
+    results['after_scan'] = timed('setelah scan baru', full_range)
+    results['memo_hit_after_scan'] = timed('memo hit lagi', full_range)
+
+    results['single_user'] = timed('filter satu karyawan', dict(full_range, user_id=user_ids[1]))
+    results['last_30_days'] = timed('30 hari terakhir', {})
+    print(f"Cache: {app.extensions['absensi'].analytics_cache.stats()}")
+
+    if args.output:
+        bench_common.write_results(args.output, {
+            'environment': bench_common.environment_info(),
+            'parameters': {'users': args.users, 'days': args.days, 'rows': rows},
+            'seconds': results,
+        })
+        print(f"Hasil disimpan di {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# Benchmark arsip data dingin: ukuran tabel attendance sebelum/sesudah archive-attendance,
+# waktu arsip, dan waktu laporan/export/analitik yang membaca tabel + partisi arsip.
+# Jalankan: python benchmarks/bench_archive.py --users 500 --days 730
+# Database dan direktori arsip sementara, instance/ tidak disentuh.
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_common  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--keep-months', type=int, default=3)
+    parser.add_argument('--output', help='Simpan hasil ke file JSON ini')
+    args = parser.parse_args()
+
+    database = bench_common.use_scratch_database()
+    import app as absensi
+    app = absensi.create_app({'ARCHIVE_DIR': os.path.join(os.path.dirname(database), 'archive')})
+    state = app.extensions['absensi']
+
+    bench_common.seed_database(absensi, app, args.users, args.days)
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    today = date.today()
+    old_range = {'start_date': (today - timedelta(days=args.days)).isoformat(),
+                 'end_date': (today - timedelta(days=args.days - 30)).isoformat()}
+
+    def timed(label, path, query=None):
+        started = time.perf_counter()
+        response = client.get(path, query_string=query)
+        body = response.get_data()
+        elapsed = time.perf_counter() - started
+        assert response.status_code == 200, response.status_code
+        print(f"  {label:<32} {elapsed * 1000:9.1f}ms  {len(body) // 1024} KB")
+        return elapsed
+
+    def measure(title):
+        state.attendance_archive.cache.clear()
+        if state.analytics_cache is not None:
+            state.analytics_cache.clear()
+        print(title)
+        return {
+            'report_latest': timed('laporan halaman pertama', '/attendance_report'),
+            'report_old_month': timed('laporan bulan lama', '/attendance_report', old_range),
+            'export_old_month': timed('export CSV bulan lama', '/attendance_report/export.csv', old_range),
+            'export_all': timed('export CSV semua', '/attendance_report/export.csv'),
+            'analytics_all': timed('analitik seluruh rentang', '/api/analytics/attendance', {
+                'start_date': (today - timedelta(days=args.days)).isoformat(), 'end_date': today.isoformat()}),
+        }
+
+    results = {'before': measure('Sebelum arsip:')}
+    database_bytes = os.path.getsize(database)
+
+    started = time.perf_counter()
+    with app.app_context():
+        archived = absensi.archive_closed_months(args.keep_months)
+        absensi.db.session.close()
+        with absensi.db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.exec_driver_sql('VACUUM')
+        hot_rows = absensi.Attendance.query.count()
+    archive_seconds = time.perf_counter() - started
+    stats = state.attendance_archive.stats()
+    print(f"Arsip {len(archived)} bulan, {stats['rows']} baris dalam {archive_seconds:.1f}s (termasuk VACUUM); "
+          f"sisa di tabel {hot_rows} baris")
+    print(f"Database {database_bytes / 1e6:.1f} MB -> {os.path.getsize(database) / 1e6:.1f} MB, "
+          f"partisi arsip {stats['bytes'] / 1e6:.1f} MB")
+
+    results['after'] = measure('Sesudah arsip:')
+    if args.output:
+        bench_common.write_results(args.output, {
+            'environment': bench_common.environment_info(),
+            'parameters': vars(args),
+            'archive': {'months': len(archived), 'rows': stats['rows'], 'seconds': archive_seconds,
+                        'partition_bytes': stats['bytes'], 'database_bytes_before': database_bytes,
+                        'database_bytes_after': os.path.getsize(database)},
+            'seconds': results,
+        })
+        print(f"Hasil disimpan di {args.output}")
+
+
+if __name__ == '__main__':
+    main()
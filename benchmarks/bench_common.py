@@ -0,0 +1,121 @@
+# Fungsi bersama untuk script benchmark: database sementara, seed data, statistik latency.
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import date, datetime, time, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+BENCH_PASSWORD = 'bench123'
+
+
+# Arahkan app ke database SQLite sementara (DATABASE_URL, juga untuk subprocess); panggil
+# sebelum create_app()
+def use_scratch_database(path=None):
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix='bench-'), 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    return path
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+# Ringkasan satu skenario: latency (detik) -> ms, throughput dari durasi total
+def summarize(latencies, elapsed, errors=0):
+    if not latencies:
+        return {'requests': 0, 'errors': errors}
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2),
+        'max_ms': round(max(latencies) * 1000, 2),
+    }
+
+
+def format_summary(label, summary):
+    if not summary.get('requests'):
+        return f"{label:<20} tidak ada request berhasil (error={summary.get('errors', 0)})"
+    return (f"{label:<20} n={summary['requests']:<6} err={summary['errors']:<4} "
+            f"p50={summary['p50_ms']:8.2f}ms p95={summary['p95_ms']:8.2f}ms "
+            f"p99={summary['p99_ms']:8.2f}ms {summary['throughput_rps']:9.1f} req/s")
+
+
+# Info lingkungan untuk file hasil (supaya hasil antar commit bisa dibandingkan)
+def environment_info():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def write_results(path, results):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+# Isi database: `users` karyawan (password BENCH_PASSWORD) dan riwayat absensi `days` hari
+# sebelum hari ini. Return list user_id karyawan.
+def seed_database(absensi, app, users, days, seed=42, summaries=True):
+    from werkzeug.security import generate_password_hash
+
+    rng = random.Random(seed)
+    db = absensi.db
+    with app.app_context():
+        absensi.upgrade_schema()
+        absensi.create_admin_user()
+
+        password_hash = generate_password_hash(BENCH_PASSWORD)
+        db.session.execute(absensi.User.__table__.insert(), [
+            {'username': f'bench{i}', 'email': f'bench{i}@example.com',
+             'password_hash': password_hash, 'is_admin': False}
+            for i in range(users)
+        ])
+        db.session.commit()
+        user_ids = [user_id for (user_id,) in db.session.query(absensi.User.id)
+                    .filter(absensi.User.username.like('bench%')).order_by(absensi.User.id)]
+
+        today = date.today()
+        rows = []
+        for offset in range(1, days + 1):
+            day = today - timedelta(days=offset)
+            for user_id in user_ids:
+                if rng.random() < 0.1:
+                    continue  # tidak masuk
+                time_in = datetime.combine(day, time(7, 30)) + timedelta(minutes=rng.randint(0, 90))
+                time_out = datetime.combine(day, time(16, 30)) + timedelta(minutes=rng.randint(0, 150))
+                rows.append({'user_id': user_id, 'date': day, 'time_in': time_in,
+                             'time_out': time_out if rng.random() > 0.05 else None, 'status': 'hadir'})
+                if len(rows) >= 5000:
+                    db.session.execute(absensi.Attendance.__table__.insert(), rows)
+                    rows = []
+        if rows:
+            db.session.execute(absensi.Attendance.__table__.insert(), rows)
+        db.session.commit()
+        if summaries:
+            absensi.rebuild_attendance_summaries()
+    return user_ids
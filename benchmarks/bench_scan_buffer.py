@@ -0,0 +1,105 @@
+# Benchmark latency /qr_scan dengan buffer tulis-belakang mati vs hidup.
+# Jalankan: python benchmarks/bench_scan_buffer.py --users 500 --concurrency 16
+# Memakai database sementara (DATABASE_URL), database instance/ tidak disentuh.
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_common  # noqa: E402
+
+workdir = os.path.dirname(bench_common.use_scratch_database())
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+import app as absensi  # noqa: E402
+
+app = absensi.create_app()
+
+
+def seed_users(count, offset):
+    password = generate_password_hash('bench')
+    with app.app_context():
+        absensi.db.session.execute(absensi.User.__table__.insert(), [
+            {'username': f'bench{offset + i}', 'email': f'bench{offset + i}@example.com',
+             'password_hash': password, 'is_admin': False}
+            for i in range(count)
+        ])
+        absensi.db.session.commit()
+        rows = absensi.User.query.filter(absensi.User.username.like('bench%')) \
+            .order_by(absensi.User.id).offset(offset).limit(count).all()
+        return [user.id for user in rows]
+
+
+# Scan semua user sekali dari `concurrency` thread, return list latency (detik) + durasi total
+def run_scans(user_ids, concurrency):
+    with app.app_context():
+        urls = [f'/qr_scan?token={absensi.qr_signer.issue(user_id)}' for user_id in user_ids]
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(chunk):
+        client = app.test_client()
+        local = []
+        for url in chunk:
+            started = time.perf_counter()
+            response = client.get(url)
+            local.append(time.perf_counter() - started)
+            assert response.status_code == 200
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(urls[i::concurrency],)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - started
+
+
+def report(label, latencies, elapsed):
+    print(bench_common.format_summary(label, bench_common.summarize(latencies, elapsed)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--fsync', action='store_true', help='fsync journal setiap scan')
+    args = parser.parse_args()
+
+    app.config['SCAN_JOURNAL_DIR'] = os.path.join(workdir, 'scan_journal')
+    app.config['SCAN_JOURNAL_FSYNC'] = args.fsync
+    with app.app_context():
+        absensi.migrations.upgrade(absensi.db.engine)
+
+    # User berbeda per mode supaya nonce token tidak ditolak sebagai replay
+    direct_users = seed_users(args.users, 0)
+    buffered_users = seed_users(args.users, args.users)
+    print(f"Database: {os.environ['DATABASE_URL']}  users={args.users} concurrency={args.concurrency}")
+
+    app.config['SCAN_BUFFER_ENABLED'] = False
+    report('buffer mati', *run_scans(direct_users, args.concurrency))
+
+    app.config['SCAN_BUFFER_ENABLED'] = True
+    with app.app_context():
+        buffer = absensi.get_scan_buffer()
+    report('buffer hidup', *run_scans(buffered_users, args.concurrency))
+
+    started = time.perf_counter()
+    buffer.stop()
+    print(f"Drain buffer: {buffer.flushed} event ditulis, {buffer.failures} batch gagal/diulang, "
+          f"sisa antrian dikosongkan dalam {time.perf_counter() - started:.3f}s")
+
+    with app.app_context():
+        recorded = absensi.Attendance.query.filter(
+            absensi.Attendance.user_id.in_(buffered_users)).count()
+    print(f"Absensi tercatat (mode buffer): {recorded}/{len(buffered_users)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+# Benchmark startup: waktu `import app` (python -X importtime), cold start worker
+# (import + create_app + start_worker + request pertama) dan perintah CLI, masing-masing
+# di process Python baru. Juga cek library berat (QR/gambar/laporan) tidak ikut diimport.
+# Jalankan: python benchmarks/bench_startup.py --runs 5 --max-import-ms 800
+# Database sementara, instance/ tidak disentuh. Exit code 1 kalau ada cek yang gagal.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_common  # noqa: E402
+
+# Hanya boleh diimport saat pertama dipakai (render QR, analitik, export, slip gaji)
+LAZY_MODULES = ['qrcode', 'PIL', 'pandas', 'numpy', 'openpyxl', 'fpdf']
+
+COLD_START = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+app.start_worker(application)
+ready = time.perf_counter()
+response = application.test_client().get('/login')
+assert response.status_code == 200, response.status_code
+done = time.perf_counter()
+print(json.dumps({'import_ms': (imported - started) * 1000, 'create_app_ms': (ready - imported) * 1000,
+                  'first_request_ms': (done - ready) * 1000, 'total_ms': (done - started) * 1000}))
+"""
+
+
+def run(args, env):
+    started = time.perf_counter()
+    result = subprocess.run(args, cwd=bench_common.ROOT, env=env, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(args[:4])} gagal (exit {result.returncode}):\n{result.stderr[-2000:]}")
+    return result, elapsed
+
+
+# Parse output -X importtime: list (kedalaman, nama, self us, kumulatif us)
+def parse_importtime(stderr):
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+# Satu process `import app`: (kumulatif app ms, import langsung app -> ms, semua modul)
+def measure_import(env):
+    result, elapsed = run([sys.executable, '-X', 'importtime', '-c', 'import app'], env)
+    children = []
+    modules = set()
+    for depth, name, self_us, cumulative_us in parse_importtime(result.stderr):
+        modules.add(name)
+        if depth == 1:
+            children.append((name, cumulative_us / 1000))
+        elif depth == 0:
+            if name == 'app':
+                return cumulative_us / 1000, dict(children), modules, elapsed
+            children = []
+    raise RuntimeError('modul app tidak ada di output -X importtime')
+
+
+def median(values):
+    return round(statistics.median(values), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5, help='Process baru per pengukuran')
+    parser.add_argument('--top', type=int, default=10, help='Jumlah import terlambat yang ditampilkan')
+    parser.add_argument('--max-import-ms', type=float, help='Gagal kalau median import app lebih lambat')
+    parser.add_argument('--output', help='Simpan hasil ke file JSON ini')
+    args = parser.parse_args()
+
+    database = bench_common.use_scratch_database()
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    failures = []
+
+    # Skema dibuat lewat perintah eksplisit, sekali, sebelum worker start
+    init_db = run([sys.executable, '-m', 'flask', '--app', 'app', 'init-db'], env)[1]
+    print(f"Database: {database}  runs={args.runs}")
+    print(f"{'flask init-db':<28} {init_db:8.1f} ms")
+
+    imports, walls, children = [], [], {}
+    loaded = set()
+    for _ in range(args.runs):
+        cumulative, direct, modules, elapsed = measure_import(env)
+        imports.append(cumulative)
+        walls.append(elapsed)
+        for name, ms in direct.items():
+            children.setdefault(name, []).append(ms)
+        loaded |= {name.split('.')[0] for name in modules}
+    print(f"{'import app (importtime)':<28} {median(imports):8.1f} ms   process: {median(walls):.1f} ms")
+    top = sorted(((median(values), name) for name, values in children.items()), reverse=True)[:args.top]
+    for ms, name in top:
+        print(f"    {name:<32} {ms:8.1f} ms")
+
+    heavy = sorted(set(LAZY_MODULES) & loaded)
+    print(f"Library berat ikut diimport: {', '.join(heavy) or '-'}")
+    if heavy:
+        failures.append(f"import app memuat {', '.join(heavy)}")
+    if args.max_import_ms and median(imports) > args.max_import_ms:
+        failures.append(f"import app {median(imports):.1f} ms > {args.max_import_ms} ms")
+
+    cold = []
+    for _ in range(args.runs):
+        result, elapsed = run([sys.executable, '-c', COLD_START], env)
+        cold.append(dict(json.loads(result.stdout.strip().splitlines()[-1]), process_ms=elapsed))
+    cold_start = {key: median([run_result[key] for run_result in cold]) for key in cold[0]}
+    print(f"{'cold start worker':<28} {cold_start['total_ms']:8.1f} ms   "
+          f"(import {cold_start['import_ms']:.1f} + create_app/start_worker {cold_start['create_app_ms']:.1f}"
+          f" + request pertama {cold_start['first_request_ms']:.1f}; process {cold_start['process_ms']:.1f})")
+
+    cli = {}
+    for label, command in [('flask --help', ['-m', 'flask', '--app', 'app', '--help']),
+                           ('add_user.py --help', ['add_user.py', '--help'])]:
+        cli[label] = median([run([sys.executable] + command, env)[1] for _ in range(args.runs)])
+        print(f"{label:<28} {cli[label]:8.1f} ms")
+
+    if args.output:
+        bench_common.write_results(args.output, {
+            'environment': bench_common.environment_info(),
+            'import_app_ms': median(imports),
+            'import_process_ms': median(walls),
+            'top_imports_ms': {name: ms for ms, name in top},
+            'heavy_modules': heavy,
+            'cold_start_ms': cold_start,
+            'cli_ms': dict(cli, init_db=round(init_db, 1)),
+        })
+        print(f"Hasil disimpan di {args.output}")
+
+    for failure in failures:
+        print(f"GAGAL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+# Benchmark beban untuk jalur scan, dashboard dan laporan lewat Flask test client.
+# Jalankan: python benchmarks/bench_suite.py --users 1000 --days 60 --concurrency 8
+#           python benchmarks/bench_suite.py --processes 4 --output hasil.json --compare baseline.json
+# Memakai database SQLite sementara yang di-seed otomatis, database instance/ tidak disentuh.
+# Hasil JSON (commit, parameter, p50/p95/p99, throughput) bisa dibandingkan antar commit.
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_common  # noqa: E402
+
+SCENARIOS = ['qr_scan', 'scan_qr', 'dashboard', 'attendance_report', 'public_attendance']
+
+absensi = None
+app = None  # absensi.create_app(), dibuat di main()
+context = {}
+
+
+def login(client, username, password):
+    response = client.post('/login', data={'username': username, 'password': password})
+    if response.status_code != 302:
+        raise RuntimeError(f'login {username} gagal')
+
+
+# Request ke-i satu skenario; return response
+def send(client, scenario, worker, i):
+    user_ids = context['user_ids']
+    if scenario == 'qr_scan':
+        token = context['tokens'][(worker * 7919 + i) % len(user_ids)]
+        return client.get(f'/qr_scan?token={token}')
+    if scenario == 'scan_qr':
+        return client.post('/scan_qr', json={'action': 'checkin' if i % 2 == 0 else 'checkout'})
+    if scenario == 'dashboard':
+        return client.get('/dashboard')
+    if scenario == 'attendance_report':
+        if i % 2:
+            end = date.today()
+            return client.get('/attendance_report', query_string={
+                'start_date': (end - timedelta(days=7)).isoformat(), 'end_date': end.isoformat()})
+        return client.get('/attendance_report')
+    if scenario == 'public_attendance':
+        index = (worker * 7919 + i) % len(user_ids)
+        return client.get(f"/attendance/{user_ids[index]}/{context['tokens'][index]}")
+    raise ValueError(scenario)
+
+
+# Satu worker (thread atau process): client sendiri, login sesuai skenario, lalu `count` request.
+# Return (list latency detik, jumlah error).
+def run_worker(scenario, worker, count):
+    client = app.test_client()
+    if scenario == 'attendance_report':
+        login(client, 'admin', 'admin123')
+    elif scenario in ('scan_qr', 'dashboard'):
+        user_id = context['user_ids'][worker % len(context['user_ids'])]
+        login(client, context['usernames'][user_id], bench_common.BENCH_PASSWORD)
+
+    latencies = []
+    errors = 0
+    for i in range(count):
+        started = time.perf_counter()
+        try:
+            response = send(client, scenario, worker, i)
+            ok = response.status_code == 200
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - started
+        if ok:
+            latencies.append(elapsed)
+        else:
+            errors += 1
+    return latencies, errors
+
+
+# Worker process (fork): koneksi database milik parent tidak boleh dipakai ulang
+def init_process():
+    with app.app_context():
+        absensi.db.engine.dispose(close=False)
+
+
+def run_scenario(scenario, requests, concurrency, processes):
+    workers = processes or concurrency
+    counts = [requests // workers + (1 if worker < requests % workers else 0) for worker in range(workers)]
+    jobs = [(scenario, worker, count) for worker, count in enumerate(counts)]
+
+    if processes:
+        with multiprocessing.get_context('fork').Pool(processes, initializer=init_process) as pool:
+            started = time.perf_counter()
+            results = pool.starmap(run_worker, jobs)
+            elapsed = time.perf_counter() - started
+    else:
+        with ThreadPoolExecutor(concurrency) as pool:
+            started = time.perf_counter()
+            results = list(pool.map(lambda job: run_worker(*job), jobs))
+            elapsed = time.perf_counter() - started
+
+    latencies = [latency for worker_latencies, errors in results for latency in worker_latencies]
+    return bench_common.summarize(latencies, elapsed, sum(errors for latencies, errors in results))
+
+
+def compare(baseline_path, results):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nDibanding {baseline_path} (commit {baseline['environment'].get('commit')}):")
+    for scenario, summary in results['scenarios'].items():
+        before = baseline['scenarios'].get(scenario)
+        if not before or not before.get('requests') or not summary.get('requests'):
+            continue
+        print(f"{scenario:<20} p95 {before['p95_ms']:8.2f} -> {summary['p95_ms']:8.2f}ms "
+              f"({(summary['p95_ms'] / before['p95_ms'] - 1) * 100:+6.1f}%)  "
+              f"throughput {before['throughput_rps']:8.1f} -> {summary['throughput_rps']:8.1f} req/s "
+              f"({(summary['throughput_rps'] / before['throughput_rps'] - 1) * 100:+6.1f}%)")
+
+
+def main():
+    global absensi, app
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--days', type=int, default=30, help='Hari riwayat absensi per user')
+    parser.add_argument('--requests', type=int, default=500, help='Request per skenario')
+    parser.add_argument('--concurrency', type=int, default=4, help='Thread dalam satu process')
+    parser.add_argument('--processes', type=int, default=0,
+                        help='Pakai N worker process (menggantikan --concurrency)')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--database', help='Path database SQLite (default: direktori sementara)')
+    parser.add_argument('--output', help='Simpan hasil ke file JSON ini')
+    parser.add_argument('--compare', help='File JSON hasil sebelumnya untuk dibandingkan')
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"skenario tidak dikenal: {', '.join(sorted(unknown))}")
+
+    database = bench_common.use_scratch_database(args.database)
+    import app as absensi
+    app = absensi.create_app()
+
+    started = time.perf_counter()
+    user_ids = bench_common.seed_database(absensi, app, args.users, args.days)
+    print(f"Database: {database}  users={args.users} days={args.days} "
+          f"(seed {time.perf_counter() - started:.1f}s)")
+
+    # Token QR sekali pakai dimatikan supaya scan berulang dengan token yang sama ikut diukur
+    absensi.consume_qr_token = lambda *args: True
+    context['user_ids'] = user_ids
+    with app.app_context():
+        context['tokens'] = [absensi.qr_signer.issue(user_id) for user_id in user_ids]
+    context['usernames'] = {user_id: f'bench{i}' for i, user_id in enumerate(user_ids)}
+
+    mode = f'{args.processes} process' if args.processes else f'{args.concurrency} thread'
+    print(f"Mode: {mode}, {args.requests} request per skenario")
+    results = {
+        'environment': bench_common.environment_info(),
+        'parameters': {'users': args.users, 'days': args.days, 'requests': args.requests,
+                       'concurrency': args.concurrency, 'processes': args.processes},
+        'scenarios': {},
+    }
+    for scenario in scenarios:
+        summary = run_scenario(scenario, args.requests, args.concurrency, args.processes)
+        results['scenarios'][scenario] = summary
+        print(bench_common.format_summary(scenario, summary))
+
+    if args.output:
+        bench_common.write_results(args.output, results)
+        print(f"Hasil disimpan di {args.output}")
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
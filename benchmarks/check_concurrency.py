@@ -0,0 +1,174 @@
+# Cek konkurensi profil produksi: beberapa worker process menerima scan /qr_scan bersamaan
+# pada satu database SQLite, tanpa error "database is locked" dan tanpa scan yang hilang.
+# Jalankan: python benchmarks/check_concurrency.py --workers 4 --clients 16 --users 400
+# Default memakai gunicorn (wsgi.py + gunicorn.conf.py) kalau terinstall; --server fork
+# memakai worker process Flask test client. Exit code 1 kalau ada error atau data tidak cocok.
+# Versi kecil (thread, tanpa server) jalan di test suite: tests/test_concurrency.py
+import argparse
+import multiprocessing
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import date
+
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_common  # noqa: E402
+
+absensi = None
+app = None  # absensi.create_app(), dibuat di main()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(workers, threads, port, log_path):
+    env = dict(os.environ, ACCESS_LOG='', WEB_CONCURRENCY=str(workers), THREADS=str(threads),
+               BIND=f'127.0.0.1:{port}', LOG_LEVEL='WARNING')
+    log = open(log_path, 'w')
+    server = subprocess.Popen(['gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'], cwd=bench_common.ROOT,
+                              env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'gunicorn berhenti, lihat {log_path}')
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/login', timeout=1)
+            return server
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError('gunicorn tidak siap dalam 60 detik')
+
+
+# Satu client: tunggu semua client siap (barrier), lalu scan semua token di `paths`
+def run_client(base_url, paths, barrier, results):
+    if base_url is None:
+        with app.app_context():
+            absensi.db.engine.dispose(close=False)  # koneksi warisan parent (fork)
+        client = app.test_client()
+
+        def send(path):
+            response = client.get(path)
+            return response.status_code, response.get_data(as_text=True)
+    else:
+        def send(path):
+            try:
+                with urllib.request.urlopen(base_url + path, timeout=30) as response:
+                    return response.status, response.read().decode()
+            except urllib.error.HTTPError as e:
+                return e.code, e.read().decode(errors='replace')
+
+    latencies = []
+    errors = []
+    barrier.wait()
+    for path in paths:
+        started = time.perf_counter()
+        status, body = send(path)
+        latencies.append(time.perf_counter() - started)
+        if status != 200 or 'berhasil' not in body:
+            errors.append((status, path))
+    results.put((latencies, errors))
+
+
+def run_round(base_url, paths, clients):
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(clients)
+    results = context.Queue()
+    processes = [context.Process(target=run_client, args=(base_url, paths[i::clients], barrier, results))
+                 for i in range(clients)]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    collected = [results.get() for process in processes]
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+    latencies = [latency for client_latencies, errors in collected for latency in client_latencies]
+    errors = [error for client_latencies, client_errors in collected for error in client_errors]
+    return bench_common.summarize(latencies, elapsed, len(errors)), errors
+
+
+def main():
+    global absensi, app
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=400)
+    parser.add_argument('--workers', type=int, default=4, help='Worker process server')
+    parser.add_argument('--threads', type=int, default=4, help='Thread per worker gunicorn')
+    parser.add_argument('--clients', type=int, default=16, help='Client process yang scan bersamaan')
+    parser.add_argument('--server', choices=['gunicorn', 'fork'],
+                        default='gunicorn' if shutil.which('gunicorn') else 'fork')
+    args = parser.parse_args()
+
+    database = bench_common.use_scratch_database()
+    os.environ['QR_TOKEN_ROTATION'] = '3600'  # token tidak berganti selama benchmark
+    import app as absensi
+    app = absensi.create_app()
+    user_ids = bench_common.seed_database(absensi, app, args.users, 0)
+    today = date.today()
+    # Token sekali pakai: check-in dengan token periode sebelumnya (masih berlaku), check-out
+    # dengan token periode sekarang
+    with app.app_context():
+        previous = time.time() - absensi.qr_signer.rotation
+        rounds = {
+            'check-in': [f'/qr_scan?token={absensi.qr_signer.issue(user_id, previous)}' for user_id in user_ids],
+            'check-out': [f'/qr_scan?token={absensi.qr_signer.issue(user_id)}' for user_id in user_ids],
+        }
+
+    server = None
+    base_url = None
+    log_path = os.path.join(os.path.dirname(database), 'server.log')
+    if args.server == 'gunicorn':
+        port = free_port()
+        server = start_gunicorn(args.workers, args.threads, port, log_path)
+        base_url = f'http://127.0.0.1:{port}'
+        print(f"gunicorn: {args.workers} worker x {args.threads} thread di {base_url}")
+    else:
+        args.clients = max(args.clients, args.workers)
+        print(f"fork: {args.clients} worker process dengan Flask test client")
+    print(f"Database: {database}  users={args.users} clients={args.clients}")
+
+    failed = False
+    try:
+        for label, paths in rounds.items():
+            summary, errors = run_round(base_url, paths, args.clients)
+            print(bench_common.format_summary(label, summary))
+            for status, path in errors[:5]:
+                print(f"  gagal: HTTP {status} {path[:60]}")
+            failed = failed or bool(errors)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    with app.app_context():
+        Attendance = absensi.Attendance
+        base = Attendance.query.filter(Attendance.user_id.in_(user_ids), Attendance.date == today)
+        complete = base.filter(Attendance.time_in.isnot(None), Attendance.time_out.isnot(None)).count()
+        journal_mode = absensi.db.session.execute(text('PRAGMA journal_mode')).scalar()
+    print(f"Absensi lengkap (masuk + pulang): {complete}/{len(user_ids)}  journal_mode={journal_mode}")
+
+    locked = 0
+    if os.path.exists(log_path):
+        with open(log_path) as f:
+            locked = f.read().count('database is locked')
+        print(f"Error 'database is locked' di log server: {locked}")
+
+    if failed or locked or complete != len(user_ids):
+        print("GAGAL")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
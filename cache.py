@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+# Cache per-process: LRU dibatasi jumlah entry, tiap entry punya TTL.
+# Entry bisa diberi versi: get dengan versi lain dihitung miss (versi dibaca dari sumber
+# bersama, jadi perubahan di process lain ikut membatalkan entry di process ini).
+# Menyimpan hitungan hit/miss untuk dicek di bawah beban.
+class LRUCache:
+    def __init__(self, max_entries=1024, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # key -> (value, waktu kadaluarsa, versi)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None, version=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at, entry_version = entry
+                if (expires_at is None or expires_at > time.monotonic()) and entry_version == version:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None, version=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at, version)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    # Ambil dari cache, atau hitung dengan loader lalu simpan (None tidak di-cache)
+    def get_or_load(self, key, loader, version=None):
+        value = self.get(key, _MISSING, version)
+        if value is _MISSING:
+            value = loader()
+            if value is not None:
+                self.set(key, value, version=version)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    # Hapus semua key yang cocok dengan predicate
+    def invalidate_where(self, predicate):
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._data),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._data)
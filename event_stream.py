@@ -0,0 +1,53 @@
+import json
+import queue
+import threading
+from collections import defaultdict
+
+
+# Broker event per process untuk Server-Sent Events: setiap tab dashboard yang terbuka
+# punya satu antrian kecil, publish mengirim event ke semua tab milik user tsb.
+# max_connections membatasi jumlah tab per process (None = tanpa batas).
+class EventBroker:
+    def __init__(self, max_queue=16, max_connections=None):
+        self.max_queue = max_queue
+        self.max_connections = max_connections
+        self._subscribers = defaultdict(set)  # user_id -> set antrian
+        self._count = 0
+        self._lock = threading.Lock()
+
+    # Antrian baru untuk satu tab; None kalau batas koneksi sudah penuh
+    def subscribe(self, user_id):
+        subscription = queue.Queue(self.max_queue)
+        with self._lock:
+            if self.max_connections is not None and self._count >= self.max_connections:
+                return None
+            self._subscribers[user_id].add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(user_id)
+            if subscriptions is not None and subscription in subscriptions:
+                subscriptions.discard(subscription)
+                self._count -= 1
+                if not subscriptions:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id, event, data=None):
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.put_nowait((event, data))
+            except queue.Full:
+                pass  # tab lambat: event terbaru cukup diminta ulang lewat API status
+        return len(subscriptions)
+
+    def connections(self):
+        return self._count
+
+
+# Format satu event SSE
+def format_event(event, data=None):
+    return f"event: {event}\ndata: {json.dumps(data or {}, separators=(',', ':'))}\n\n"
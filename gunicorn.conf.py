@@ -0,0 +1,51 @@
+# Konfigurasi gunicorn produksi: gunicorn -c gunicorn.conf.py wsgi:app
+# Semua nilai bisa diubah lewat environment tanpa mengedit file ini.
+# Environment aplikasi yang perlu diisi di produksi:
+#   METRICS_TOKEN  token Bearer untuk scraper /metrics; tanpa ini /metrics hanya untuk admin
+#                  yang login atau request langsung dari localhost
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Thread per worker: setiap stream SSE dashboard (/api/attendance/events) memegang satu
+# thread sampai EVENT_STREAM_MAX_AGE (30 menit). Stream dibatasi EVENT_STREAM_MAX_CONNECTIONS
+# per worker (default THREADS // 2) supaya sisa thread tetap melayani request biasa;
+# dashboard yang ditolak (503) polling /api/attendance/status setiap 30 detik.
+# Ukuran: tab dashboard bersamaan yang dapat SSE = WEB_CONCURRENCY x EVENT_STREAM_MAX_CONNECTIONS,
+# misalnya 4 core -> 9 worker x 8 = 72 tab. Lebih banyak tab: naikkan THREADS (batas ikut naik).
+# Pool DB (DB_POOL_SIZE + DB_MAX_OVERFLOW) mengikuti thread non-SSE; stream tidak menahan koneksi DB.
+worker_class = 'gthread'
+threads = int(os.environ.get('THREADS', 16))
+timeout = int(os.environ.get('WORKER_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+# App diimport di tiap worker setelah fork (bukan di master), supaya thread dan koneksi DB
+# milik worker masing-masing
+preload_app = False
+accesslog = os.environ.get('ACCESS_LOG', '-') or None  # ACCESS_LOG= (kosong) = mati
+loglevel = os.environ.get('LOG_LEVEL', 'info').lower()
+
+
+# Sekali di master, sebelum worker dibuat: tolak start kalau skema belum dimigrasi
+# (flask --app app init-db), lalu build asset statis
+def on_starting(server):
+    from app import build_assets, create_app, db, pending_migrations
+    app = create_app()
+    with app.app_context():
+        pending = pending_migrations()
+        db.engine.dispose()
+    if pending:
+        raise RuntimeError(f"{len(pending)} migrasi skema belum dijalankan: flask --app app init-db")
+    try:
+        build_assets(app.static_folder, app.config['ASSET_DIST_DIR'])
+    except OSError as e:
+        # Folder static read-only: asset tetap disajikan dari file sumber, tanpa versi terkompresi
+        server.log.warning("Build asset gagal: %s", e)
+
+
+# Tulis sisa antrian buffer scan sebelum worker berhenti
+def worker_exit(server, worker):
+    from app import stop_worker
+    if getattr(worker, 'wsgi', None) is not None:  # app dari wsgi:app yang dimuat worker ini
+        stop_worker(worker.wsgi)
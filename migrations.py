@@ -0,0 +1,303 @@
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+# Migrasi skema berurutan. Versi yang sudah jalan dicatat di tabel schema_migrations,
+# jadi setiap langkah hanya dijalankan sekali per database.
+# Tambah migrasi baru di akhir list dengan nomor versi berikutnya.
+# DDL ditulis untuk SQLite (COLLATE NOCASE, tabel bernama user); database lain ditolak
+# aplikasi saat start (app.check_database_url).
+
+
+# 1. Skema awal (sama dengan hasil db.create_all() versi lama)
+def _create_base_tables(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS user (
+            id INTEGER NOT NULL,
+            username VARCHAR(80) NOT NULL,
+            email VARCHAR(120) NOT NULL,
+            password_hash VARCHAR(120) NOT NULL,
+            is_admin BOOLEAN,
+            PRIMARY KEY (id),
+            UNIQUE (username),
+            UNIQUE (email)
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS attendance (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            date DATE NOT NULL,
+            time_in DATETIME,
+            time_out DATETIME,
+            status VARCHAR(20),
+            PRIMARY KEY (id),
+            FOREIGN KEY(user_id) REFERENCES user (id)
+        )
+    """))
+
+
+# 2. Gabungkan baris duplikat (user_id, date) lalu buat unique index
+def _attendance_unique(conn):
+    conn.execute(text("""
+        UPDATE attendance SET
+            time_in = (SELECT MIN(a.time_in) FROM attendance a
+                       WHERE a.user_id = attendance.user_id AND a.date = attendance.date),
+            time_out = (SELECT MAX(a.time_out) FROM attendance a
+                        WHERE a.user_id = attendance.user_id AND a.date = attendance.date)
+        WHERE id IN (SELECT MIN(id) FROM attendance GROUP BY user_id, date HAVING COUNT(*) > 1)
+    """))
+    conn.execute(text("""
+        DELETE FROM attendance
+        WHERE id NOT IN (SELECT MIN(id) FROM attendance GROUP BY user_id, date)
+    """))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_attendance_user_date ON attendance (user_id, date)"
+    ))
+
+
+# 3. Index untuk query panas: riwayat per user (date desc) dan laporan per tanggal
+def _attendance_indexes(conn):
+    conn.execute(text("DROP INDEX IF EXISTS uq_attendance_user_date"))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_attendance_user_date_desc "
+        "ON attendance (user_id, date DESC)"
+    ))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_attendance_date ON attendance (date)"))
+
+
+# 4. Tabel ringkasan absensi harian dan bulanan (diisi ulang oleh rebuild_attendance_summaries)
+def _attendance_summaries(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS attendance_daily_summary (
+            user_id INTEGER NOT NULL,
+            date DATE NOT NULL,
+            checked_in BOOLEAN NOT NULL,
+            checked_out BOOLEAN NOT NULL,
+            is_late BOOLEAN NOT NULL,
+            worked_minutes INTEGER NOT NULL,
+            PRIMARY KEY (user_id, date),
+            FOREIGN KEY(user_id) REFERENCES user (id)
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS attendance_monthly_summary (
+            user_id INTEGER NOT NULL,
+            month DATE NOT NULL,
+            days_present INTEGER NOT NULL,
+            days_complete INTEGER NOT NULL,
+            late_days INTEGER NOT NULL,
+            worked_minutes INTEGER NOT NULL,
+            PRIMARY KEY (user_id, month),
+            FOREIGN KEY(user_id) REFERENCES user (id)
+        )
+    """))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_attendance_daily_summary_date ON attendance_daily_summary (date)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_attendance_monthly_summary_month ON attendance_monthly_summary (month)"
+    ))
+
+
+# 5. Tabel payroll (gaji, hutang, payroll mingguan) + index per karyawan / minggu
+def _payroll_tables(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS employee_salary (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            daily_wage FLOAT,
+            overtime_rate FLOAT,
+            meal_allowance FLOAT,
+            created_at DATETIME,
+            updated_at DATETIME,
+            PRIMARY KEY (id),
+            FOREIGN KEY(user_id) REFERENCES user (id)
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS employee_debt (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            debt_amount FLOAT,
+            weekly_deduction FLOAT,
+            description VARCHAR(200),
+            created_at DATETIME,
+            updated_at DATETIME,
+            PRIMARY KEY (id),
+            FOREIGN KEY(user_id) REFERENCES user (id)
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS weekly_payroll (
+            id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            week_start DATE NOT NULL,
+            week_end DATE NOT NULL,
+            total_days_worked INTEGER,
+            total_late_days INTEGER,
+            total_overtime_hours FLOAT,
+            total_meal_allowances INTEGER,
+            basic_pay FLOAT,
+            overtime_pay FLOAT,
+            meal_pay FLOAT,
+            gross_pay FLOAT,
+            debt_deduction FLOAT,
+            net_pay FLOAT,
+            is_paid BOOLEAN,
+            created_at DATETIME,
+            PRIMARY KEY (id),
+            FOREIGN KEY(user_id) REFERENCES user (id)
+        )
+    """))
+    # Satu baris gaji/hutang per karyawan (simpan yang terbaru kalau ada duplikat)
+    for table in ('employee_salary', 'employee_debt'):
+        conn.execute(text(
+            f"DELETE FROM {table} WHERE id NOT IN (SELECT MAX(id) FROM {table} GROUP BY user_id)"
+        ))
+        conn.execute(text(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS uq_{table}_user ON {table} (user_id)"
+        ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_weekly_payroll_week_user ON weekly_payroll (week_start, user_id)"
+    ))
+
+
+# 6. Index NOCASE untuk pencarian prefix username/email di manajemen user
+def _user_search_indexes(conn):
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_user_username_nocase ON user (username COLLATE NOCASE)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_user_email_nocase ON user (email COLLATE NOCASE)"
+    ))
+
+
+# 7. Event scan yang sudah diterapkan (dedup replay journal / sinkronisasi per event id)
+def _scan_events(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS scan_event (
+            event_id VARCHAR(64) NOT NULL,
+            user_id INTEGER NOT NULL,
+            scanned_at DATETIME NOT NULL,
+            recorded_at DATETIME NOT NULL,
+            PRIMARY KEY (event_id),
+            FOREIGN KEY(user_id) REFERENCES user (id)
+        )
+    """))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_scan_event_recorded_at ON scan_event (recorded_at)"
+    ))
+
+
+# 8. Setting aplikasi yang diubah dari UI (dibaca semua worker, bukan os.environ)
+def _app_settings(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS app_setting (
+            key VARCHAR(64) NOT NULL,
+            value TEXT NOT NULL,
+            updated_at DATETIME NOT NULL,
+            PRIMARY KEY (key)
+        )
+    """))
+
+
+# 9. Nonce token QR yang sudah dipakai (replay ditolak di semua worker lewat primary key)
+def _qr_token_uses(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS qr_token_use (
+            nonce VARCHAR(32) NOT NULL,
+            user_id INTEGER NOT NULL,
+            used_at DATETIME NOT NULL,
+            expires_at DATETIME NOT NULL,
+            PRIMARY KEY (nonce)
+        )
+    """))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_qr_token_use_expires_at ON qr_token_use (expires_at)"
+    ))
+
+
+# 10. Jam kedatangan dan lembur di ringkasan harian (sumber analitik), diisi ulang lewat rebuild
+def _daily_summary_arrival(conn):
+    conn.execute(text("ALTER TABLE attendance_daily_summary ADD COLUMN arrival_minute INTEGER"))
+    conn.execute(text(
+        "ALTER TABLE attendance_daily_summary ADD COLUMN overtime_minutes INTEGER NOT NULL DEFAULT 0"
+    ))
+
+
+# 11. Hasil event scan di scan_event: sync ulang batch kiosk dijawab sama persis
+def _scan_event_outcome(conn):
+    conn.execute(text("ALTER TABLE scan_event ADD COLUMN outcome VARCHAR(16)"))
+    conn.execute(text("ALTER TABLE scan_event ADD COLUMN time_in DATETIME"))
+    conn.execute(text("ALTER TABLE scan_event ADD COLUMN time_out DATETIME"))
+
+
+# 12. Versi cache per user: cache per worker dibatalkan saat user/absensinya berubah di worker lain
+def _cache_versions(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS cache_version (
+            user_id INTEGER NOT NULL,
+            version INTEGER NOT NULL,
+            PRIMARY KEY (user_id)
+        )
+    """))
+
+
+MIGRATIONS = [
+    (1, 'create base tables', _create_base_tables),
+    (2, 'unique attendance per user per day', _attendance_unique),
+    (3, 'attendance user/date indexes', _attendance_indexes),
+    (4, 'attendance summary tables', _attendance_summaries),
+    (5, 'payroll tables', _payroll_tables),
+    (6, 'user search indexes', _user_search_indexes),
+    (7, 'scan event log', _scan_events),
+    (8, 'app settings', _app_settings),
+    (9, 'qr token uses', _qr_token_uses),
+    (10, 'daily summary arrival and overtime', _daily_summary_arrival),
+    (11, 'scan event outcome', _scan_event_outcome),
+    (12, 'cache versions', _cache_versions),
+]
+
+# Versi yang perlu backfill ringkasan setelah diterapkan
+SUMMARY_REBUILD_VERSIONS = {4, 10}
+
+
+def current_version(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER NOT NULL PRIMARY KEY,
+            name VARCHAR(200) NOT NULL,
+            applied_at DATETIME NOT NULL
+        )
+    """))
+    return conn.execute(text("SELECT MAX(version) FROM schema_migrations")).scalar() or 0
+
+
+# Migrasi (versi, nama) yang belum diterapkan, tanpa mengubah database
+def pending(engine):
+    with engine.connect() as conn:
+        version = 0
+        if inspect(conn).has_table('schema_migrations'):
+            version = conn.execute(text("SELECT MAX(version) FROM schema_migrations")).scalar() or 0
+    return [(number, name) for number, name, migrate in MIGRATIONS if number > version]
+
+
+# Jalankan semua migrasi yang belum diterapkan, masing-masing dalam transaksinya sendiri.
+# Return list (versi, nama) migrasi yang baru dijalankan.
+def upgrade(engine):
+    applied = []
+    with engine.begin() as conn:
+        version = current_version(conn)
+
+    for number, name, migrate in MIGRATIONS:
+        if number <= version:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+                {'v': number, 'n': name, 't': datetime.now().isoformat(sep=' ')}
+            )
+        applied.append((number, name))
+    return applied
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+ATTENDANCE_COLUMNS = ['user_id', 'date', 'time_in', 'time_out']
+EMPLOYEE_COLUMNS = ['user_id', 'daily_wage', 'overtime_rate', 'meal_allowance',
+                    'debt_amount', 'weekly_deduction']
+
+MEAL_ALLOWANCE_HOURS = 4  # uang makan diberikan setiap 4 jam lembur
+
+
+# Hitung payroll mingguan semua karyawan sekaligus (vectorized, tanpa loop per karyawan).
+#   attendance: baris Attendance minggu tsb (user_id, date, time_in, time_out)
+#   employees:  satu baris per karyawan (user_id, tarif gaji, hutang)
+#   work_start / work_end: datetime.time jam masuk dan jam pulang normal
+# Return DataFrame satu baris per karyawan dengan kolom-kolom tabel weekly_payroll.
+def compute_weekly_payroll(attendance, employees, work_start, work_end):
+    attendance = pd.DataFrame.from_records(attendance, columns=ATTENDANCE_COLUMNS)
+    employees = pd.DataFrame.from_records(employees, columns=EMPLOYEE_COLUMNS)
+    # Karyawan tanpa baris gaji/hutang (outer join) bernilai None; kolom yang semuanya None
+    # ber-dtype object, jadi dijadikan float dulu sebelum diisi 0
+    employees = employees.set_index('user_id').astype(float).fillna(0)
+
+    attendance = attendance[attendance['time_in'].notna()]
+    time_in = pd.to_datetime(attendance['time_in'])
+    time_out = pd.to_datetime(attendance['time_out'])
+    day = pd.to_datetime(attendance['date'])
+
+    start_at = day + pd.Timedelta(hours=work_start.hour, minutes=work_start.minute)
+    end_at = day + pd.Timedelta(hours=work_end.hour, minutes=work_end.minute)
+
+    # Lembur dihitung dari jam pulang normal (atau jam masuk kalau lebih telat) sampai check-out
+    overtime_from = time_in.where(time_in > end_at, end_at)
+    overtime_hours = ((time_out - overtime_from).dt.total_seconds() / 3600).clip(lower=0).fillna(0)
+
+    per_day = pd.DataFrame({
+        'user_id': attendance['user_id'],
+        'total_days_worked': 1,
+        'total_late_days': (time_in > start_at).astype(int),
+        'total_overtime_hours': overtime_hours,
+        'total_meal_allowances': np.floor(overtime_hours / MEAL_ALLOWANCE_HOURS).astype(int),
+    })
+    totals = per_day.groupby('user_id').sum().reindex(employees.index, fill_value=0)
+
+    result = employees.join(totals)
+    result['total_overtime_hours'] = result['total_overtime_hours'].round(2)
+    result['basic_pay'] = result['total_days_worked'] * result['daily_wage']
+    result['overtime_pay'] = (result['total_overtime_hours'] * result['overtime_rate']).round(0)
+    result['meal_pay'] = result['total_meal_allowances'] * result['meal_allowance']
+    result['gross_pay'] = result['basic_pay'] + result['overtime_pay'] + result['meal_pay']
+
+    # Potongan hutang: potongan mingguan, tapi tidak lebih dari sisa hutang atau gaji kotor
+    deduction = np.minimum(result['weekly_deduction'], result['debt_amount'])
+    result['debt_deduction'] = np.minimum(deduction, result['gross_pay']).clip(lower=0)
+    result['net_pay'] = result['gross_pay'] - result['debt_deduction']
+    result['remaining_debt'] = result['debt_amount'] - result['debt_deduction']
+
+    return result.reset_index()
+
+
+SATUAN = ['', 'satu', 'dua', 'tiga', 'empat', 'lima', 'enam', 'tujuh', 'delapan',
+          'sembilan', 'sepuluh', 'sebelas']
+
+
+# Angka ke kata dalam bahasa Indonesia (filter template |terbilang di slip gaji)
+def terbilang(number):
+    number = int(number)
+    if number < 0:
+        return 'minus ' + terbilang(-number)
+    if number < 12:
+        return SATUAN[number] or 'nol'
+    if number < 20:
+        return terbilang(number - 10) + ' belas'
+    if number < 100:
+        return (terbilang(number // 10) + ' puluh ' + SATUAN[number % 10]).strip()
+    if number < 200:
+        return ('seratus ' + _terbilang_rest(number - 100)).strip()
+    if number < 1000:
+        return (terbilang(number // 100) + ' ratus ' + _terbilang_rest(number % 100)).strip()
+    if number < 2000:
+        return ('seribu ' + _terbilang_rest(number - 1000)).strip()
+
+    for value, name in ((10 ** 12, 'triliun'), (10 ** 9, 'miliar'), (10 ** 6, 'juta'), (1000, 'ribu')):
+        if number >= value:
+            return (terbilang(number // value) + f' {name} ' + _terbilang_rest(number % value)).strip()
+
+
+def _terbilang_rest(number):
+    return terbilang(number) if number else ''
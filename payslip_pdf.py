@@ -0,0 +1,189 @@
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import re
+import unicodedata
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+MANIFEST_NAME = 'manifest.json'
+
+# Font TTF Unicode ikut di repo (nama/keterangan hutang bisa berisi huruf non-Latin-1)
+FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fonts')
+FONT_FAMILY = 'DejaVu'
+FONT_FILES = {'': 'DejaVuSans.ttf', 'B': 'DejaVuSans-Bold.ttf'}
+
+
+# Data slip gaji sebagai dict biasa (bisa di-pickle ke worker process dan di-hash). Hanya
+# field yang tercetak di slip, per karyawan (bukan id payroll): generate ulang payroll
+# mengganti baris weekly_payroll, tapi slip yang isinya sama tidak di-render ulang.
+def payslip_record(payroll):
+    debt = payroll.user.debt_info
+    return {
+        'user_id': payroll.user_id,
+        'username': payroll.user.username,
+        'email': payroll.user.email,
+        'week_start': payroll.week_start.isoformat(),
+        'week_end': payroll.week_end.isoformat(),
+        'created_at': payroll.created_at.strftime('%d/%m/%Y') if payroll.created_at else '',
+        'total_days_worked': payroll.total_days_worked or 0,
+        'total_late_days': payroll.total_late_days or 0,
+        'total_overtime_hours': payroll.total_overtime_hours or 0,
+        'total_meal_allowances': payroll.total_meal_allowances or 0,
+        'basic_pay': payroll.basic_pay or 0,
+        'overtime_pay': payroll.overtime_pay or 0,
+        'meal_pay': payroll.meal_pay or 0,
+        'gross_pay': payroll.gross_pay or 0,
+        'debt_deduction': payroll.debt_deduction or 0,
+        'net_pay': payroll.net_pay or 0,
+        'debt_description': debt.description if debt and debt.description else 'Hutang Karyawan',
+        'debt_remaining': debt.debt_amount if debt else 0,
+    }
+
+
+def record_hash(record):
+    return hashlib.sha256(json.dumps(record, sort_keys=True).encode()).hexdigest()
+
+
+# Username jadi slug ASCII ([A-Za-z0-9_-]) supaya '/', '..' atau huruf lain tidak bisa keluar folder minggu
+def _slug(text):
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^A-Za-z0-9_-]+', '-', text).strip('-')[:40] or 'karyawan'
+
+
+def payslip_filename(record):
+    return f"slip_{record['week_start']}_{_slug(record['username'])}_{record['user_id']}.pdf"
+
+
+def _rupiah(amount):
+    return 'Rp {:,.0f}'.format(amount)
+
+
+# Render satu slip gaji ke PDF (dijalankan di worker process)
+def render_payslip_pdf(record):
+    from fpdf import FPDF
+    from payroll import terbilang
+
+    pdf = FPDF(format='A5')
+    for style, filename in FONT_FILES.items():
+        pdf.add_font(FONT_FAMILY, style, os.path.join(FONT_DIR, filename))
+    pdf.set_auto_page_break(True, margin=10)
+    pdf.add_page()
+
+    pdf.set_font(FONT_FAMILY, 'B', 14)
+    pdf.cell(0, 8, 'SLIP GAJI MINGGUAN', align='C', new_x='LMARGIN', new_y='NEXT')
+    pdf.set_font(FONT_FAMILY, '', 9)
+    pdf.cell(0, 5, f"Periode {record['week_start']} s/d {record['week_end']}", align='C',
+             new_x='LMARGIN', new_y='NEXT')
+    pdf.ln(4)
+
+    def row(label, value, bold=False):
+        pdf.set_font(FONT_FAMILY, 'B' if bold else '', 9)
+        pdf.cell(60, 6, label)
+        pdf.cell(0, 6, value, align='R', new_x='LMARGIN', new_y='NEXT')
+
+    row('Nama Karyawan', record['username'])
+    row('Email', record['email'])
+    row('Tanggal Dibuat', record['created_at'])
+    pdf.ln(2)
+
+    row('Hari Kerja', f"{record['total_days_worked']} hari")
+    row('Terlambat', f"{record['total_late_days']} hari")
+    row('Total Jam Lembur', f"{record['total_overtime_hours']:.1f} jam")
+    row('Uang Makan', f"{record['total_meal_allowances']}x")
+    pdf.ln(2)
+
+    row('Gaji Pokok', _rupiah(record['basic_pay']))
+    row('Upah Lembur', _rupiah(record['overtime_pay']))
+    row('Uang Makan', _rupiah(record['meal_pay']))
+    row('Total Pendapatan', _rupiah(record['gross_pay']), bold=True)
+    if record['debt_deduction'] > 0:
+        row(f"Potongan: {record['debt_description']}", '- ' + _rupiah(record['debt_deduction']))
+        row('Sisa Hutang', _rupiah(record['debt_remaining']))
+    pdf.ln(2)
+
+    row('TAKE HOME PAY', _rupiah(record['net_pay']), bold=True)
+    pdf.set_font(FONT_FAMILY, '', 8)
+    pdf.multi_cell(0, 5, f"{terbilang(int(record['net_pay']))} rupiah")
+
+    return bytes(pdf.output())
+
+
+def _load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# Render banyak slip gaji paralel ke output_dir. Slip yang hash datanya sama dengan
+# run sebelumnya (dan file-nya masih ada) dilewati; PDF yang tidak ada di records lagi dihapus.
+# Return (daftar path file, jumlah yang di-render ulang).
+def render_payslips(records, output_dir, workers=None):
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = _load_manifest(output_dir)
+    current = {payslip_filename(record) for record in records}
+    for filename in os.listdir(output_dir):
+        if filename.endswith('.pdf') and filename not in current:
+            os.remove(os.path.join(output_dir, filename))
+    stale = set(manifest) - current
+    manifest = {filename: digest for filename, digest in manifest.items() if filename in current}
+
+    paths = []
+    pending = []
+    for record in records:
+        filename = payslip_filename(record)
+        path = os.path.join(output_dir, filename)
+        digest = record_hash(record)
+        paths.append(path)
+        if manifest.get(filename) != digest or not os.path.exists(path):
+            pending.append((record, path, filename, digest))
+
+    if pending:
+        # Worker pool pakai start method spawn: fork dari worker gunicorn (gthread) ikut
+        # menyalin lock milik thread lain dan koneksi DB. Satu slip kecil per task;
+        # chunksize mengurangi overhead antar process.
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            chunksize = max(1, len(pending) // ((workers or os.cpu_count() or 1) * 4))
+            rendered = pool.map(render_payslip_pdf, [item[0] for item in pending], chunksize=chunksize)
+            for (record, path, filename, digest), pdf_bytes in zip(pending, rendered):
+                with open(path, 'wb') as f:
+                    f.write(pdf_bytes)
+                manifest[filename] = digest
+
+    if pending or stale:
+        with open(os.path.join(output_dir, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+
+    return paths, len(pending)
+
+
+# Buffer tulis untuk ZipFile yang isinya bisa diambil bertahap (stream zip tanpa seek)
+class _ChunkWriter(io.RawIOBase):
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        return b''.join(chunks)
+
+
+# Generator byte zip berisi file-file PDF, dikirim per file
+def stream_zip(paths):
+    writer = _ChunkWriter()
+    with zipfile.ZipFile(writer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for path in paths:
+            archive.write(path, os.path.basename(path))
+            yield writer.drain()
+    yield writer.drain()
@@ -0,0 +1,117 @@
+import hashlib
+import io
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+MIMETYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+
+# Key konten QR: hash dari payload URL, jadi URL gambar bisa di-cache selamanya
+def qr_key(payload):
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+# Render payload ke bytes PNG/SVG. qrcode (dan Pillow) baru diimport di render pertama.
+def render_qr(payload, fmt='png'):
+    import qrcode
+    import qrcode.image.svg
+
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    qr.add_data(payload)
+    qr.make(fit=True)
+
+    buffer = io.BytesIO()
+    if fmt == 'svg':
+        img = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+        img.save(buffer)
+    else:
+        img = qr.make_image(fill_color="black", back_color="white")
+        img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+# Cache LRU gambar QR yang sudah di-render, dibatasi jumlah entry.
+# on_render(fmt, detik) dipanggil setiap render (untuk metrik waktu render).
+class QRCache:
+    def __init__(self, max_entries=1024, on_render=None):
+        self.max_entries = max_entries
+        self.on_render = on_render
+        self.hits = 0
+        self.misses = 0
+        self._payloads = OrderedDict()  # key -> payload
+        self._images = OrderedDict()    # (key, fmt) -> bytes
+        self._lock = threading.Lock()
+
+    def _touch(self, store, key, value=None):
+        if value is not None:
+            store[key] = value
+        store.move_to_end(key)
+        while len(store) > self.max_entries:
+            store.popitem(last=False)
+
+    # Daftarkan payload dan kembalikan key-nya (tanpa render)
+    def register(self, payload):
+        key = qr_key(payload)
+        with self._lock:
+            self._touch(self._payloads, key, payload)
+        return key
+
+    # Ambil gambar dari cache, render kalau belum ada. None kalau key tidak dikenal
+    def get(self, key, fmt='png'):
+        with self._lock:
+            image = self._images.get((key, fmt))
+            if image is not None:
+                self._touch(self._images, (key, fmt))
+                self.hits += 1
+                return image
+            self.misses += 1
+            payload = self._payloads.get(key)
+        if payload is None:
+            return None
+
+        # Render di luar lock supaya request lain tidak ikut menunggu
+        started = time.perf_counter()
+        image = render_qr(payload, fmt)
+        if self.on_render:
+            self.on_render(fmt, time.perf_counter() - started)
+        with self._lock:
+            self._touch(self._images, (key, fmt), image)
+        return image
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._images),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._images)
+
+
+# Jalankan callback di background setiap pergantian hari (00:00 waktu lokal)
+def start_daily_job(callback, run_now=True):
+    def worker():
+        if run_now:
+            callback()
+        while True:
+            now = datetime.now()
+            tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+            # Tidur sampai lewat tengah malam, lalu jalankan lagi
+            stop.wait((tomorrow - now).total_seconds() + 1)
+            if stop.is_set():
+                return
+            callback()
+
+    stop = threading.Event()
+    thread = threading.Thread(target=worker, name='daily-job', daemon=True)
+    thread.start()
+    return stop
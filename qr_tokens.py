@@ -0,0 +1,58 @@
+import hashlib
+import hmac
+import time
+
+from itsdangerous import BadSignature, URLSafeSerializer
+
+
+class QRTokenError(Exception):
+    pass
+
+
+class QRTokenExpired(QRTokenError):
+    pass
+
+
+# Token QR bertanda tangan HMAC: berisi user id, waktu terbit, kadaluarsa dan nonce.
+# Token berganti setiap `rotation` detik dan berlaku dua periode (QR yang baru saja diganti
+# masih bisa discan). Nonce sekali pakai, dicatat di tabel qr_token_use oleh aplikasi.
+class QRTokenSigner:
+    def __init__(self, secret_key, rotation=120, salt='qr-absensi'):
+        self._secret = secret_key.encode()
+        self._serializer = URLSafeSerializer(secret_key, salt=salt)
+        self.rotation = rotation
+
+    # Nomor periode rotasi pada waktu `now`
+    def slot(self, now=None):
+        return int((time.time() if now is None else now) // self.rotation)
+
+    # Nonce deterministik per user+periode, supaya semua worker membuat QR yang sama (bisa di-cache)
+    def _nonce(self, user_id, slot):
+        message = f"{user_id}:{slot}".encode()
+        return hmac.new(self._secret, message, hashlib.sha256).hexdigest()[:16]
+
+    # Terbitkan token untuk periode rotasi saat ini
+    def issue(self, user_id, now=None):
+        slot = self.slot(now)
+        issued_at = slot * self.rotation
+        return self._serializer.dumps({
+            'u': user_id,
+            'iat': issued_at,
+            'exp': issued_at + 2 * self.rotation,
+            'n': self._nonce(user_id, slot),
+        })
+
+    # Verifikasi tanda tangan (compare_digest) lalu masa berlaku; kembalikan claims
+    def verify(self, token, now=None):
+        try:
+            claims = self._serializer.loads(token)
+        except BadSignature:
+            raise QRTokenError('invalid signature')
+
+        if not isinstance(claims, dict) or not {'u', 'iat', 'exp', 'n'} <= claims.keys():
+            raise QRTokenError('malformed token')
+
+        now = time.time() if now is None else now
+        if not claims['iat'] <= now < claims['exp']:
+            raise QRTokenExpired('token expired')
+        return claims
@@ -0,0 +1,95 @@
+import threading
+import time
+from array import array
+from datetime import datetime
+
+NOT_IN = 0
+IN = 1
+OUT = 2
+STATE_NAMES = ('none', 'in', 'out')
+
+
+def _pad(states, times, size):
+    missing = size - len(states)
+    if missing > 0:
+        states.extend(bytes(missing))
+        times.extend([0.0] * missing)
+
+
+# Index status absensi hari ini per process, disimpan sebagai array per user_id
+# (status: 0 belum masuk / 1 masuk / 2 pulang, time_in: epoch detik, 0 = kosong).
+# Status hanya maju (belum -> masuk -> pulang), jadi index yang tertinggal dari worker lain
+# cukup digabung dengan max; DB tetap sumber kebenaran.
+class TodayRoster:
+    def __init__(self):
+        self.day = None
+        self.built_at = 0.0
+        self._states = array('B')
+        self._time_in = array('d')
+        self._lock = threading.Lock()
+
+    # Bangun ulang dari baris (user_id, time_in, time_out) absensi `day`.
+    # Kalau hari sama, status yang sudah lebih maju di memori dipertahankan.
+    def rebuild(self, day, rows):
+        states = array('B')
+        times = array('d')
+        for user_id, time_in, time_out in rows:
+            _pad(states, times, user_id + 1)
+            if time_in is not None:
+                states[user_id] = OUT if time_out is not None else IN
+                times[user_id] = time_in.timestamp()
+
+        with self._lock:
+            if self.day == day:
+                _pad(states, times, len(self._states))
+                for user_id, state in enumerate(self._states):
+                    if state > states[user_id]:
+                        states[user_id] = state
+                        times[user_id] = self._time_in[user_id]
+            self.day = day
+            self.built_at = time.monotonic()
+            self._states = states
+            self._time_in = times
+
+    def state(self, user_id):
+        states = self._states
+        return states[user_id] if user_id < len(states) else NOT_IN
+
+    def time_in(self, user_id):
+        times = self._time_in
+        if user_id < len(times) and times[user_id]:
+            return datetime.fromtimestamp(times[user_id])
+        return None
+
+    # Catat hasil scan (time_out None = masih di dalam)
+    def record(self, user_id, time_in, time_out=None):
+        with self._lock:
+            _pad(self._states, self._time_in, user_id + 1)
+            state = OUT if time_out is not None else IN
+            if state >= self._states[user_id]:
+                self._states[user_id] = state
+                if time_in is not None:
+                    self._time_in[user_id] = time_in.timestamp()
+
+    def mark_out(self, user_id):
+        with self._lock:
+            _pad(self._states, self._time_in, user_id + 1)
+            self._states[user_id] = OUT
+
+    def forget(self, user_id):
+        with self._lock:
+            if user_id < len(self._states):
+                self._states[user_id] = NOT_IN
+                self._time_in[user_id] = 0.0
+
+    # User yang sedang di lokasi: list (user_id, time_in) urut jam masuk
+    def present(self):
+        with self._lock:
+            present = [(user_id, self._time_in[user_id])
+                       for user_id, state in enumerate(self._states) if state == IN]
+        present.sort(key=lambda item: item[1])
+        return [(user_id, datetime.fromtimestamp(ts)) for user_id, ts in present]
+
+    def counts(self):
+        states = self._states
+        return {'in': states.count(IN), 'out': states.count(OUT)}
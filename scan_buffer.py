@@ -0,0 +1,147 @@
+import glob
+import json
+import logging
+import os
+import threading
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: tidak ada flock, mode buffer tidak didukung
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+# Buffer tulis-belakang untuk scan QR.
+# Setiap scan ditulis dulu ke journal append-only (satu baris JSON), masuk antrian memori,
+# lalu thread writer menerapkan antrian per batch dalam satu transaksi lewat apply_batch.
+# Journal dikunci flock per process; journal milik process yang sudah mati di-replay saat start.
+# apply_batch harus idempotent per event id (replay bisa mengulang event yang sudah tercatat).
+class ScanBuffer:
+    def __init__(self, journal_dir, apply_batch, flush_interval=0.1, max_batch=500, fsync=False):
+        if fcntl is None:
+            raise RuntimeError('Scan buffer membutuhkan fcntl (Linux/macOS)')
+
+        self.journal_dir = journal_dir
+        self.apply_batch = apply_batch
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.fsync = fsync
+        self.flushed = 0
+        self.failures = 0
+
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._journal = None
+        self._thread = None
+
+    # Buka journal process ini, replay journal yatim, lalu jalankan thread writer
+    def start(self):
+        os.makedirs(self.journal_dir, exist_ok=True)
+        self.recover()
+
+        path = os.path.join(self.journal_dir, f'scan-{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl')
+        self._journal = open(path, 'a+', encoding='utf-8')
+        fcntl.flock(self._journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        self._thread = threading.Thread(target=self._run, name='scan-buffer-writer', daemon=True)
+        self._thread.start()
+        return self
+
+    # Terapkan event dari journal yang tidak dipegang process hidup (sisa crash)
+    def recover(self):
+        recovered = 0
+        for path in sorted(glob.glob(os.path.join(self.journal_dir, 'scan-*.jsonl'))):
+            with open(path, 'r+', encoding='utf-8') as journal:
+                try:
+                    fcntl.flock(journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    continue  # masih dipakai process lain
+
+                events = []
+                for line in journal:
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        break  # baris terakhir terpotong saat crash
+                for start in range(0, len(events), self.max_batch):
+                    self.apply_batch(events[start:start + self.max_batch])
+                recovered += len(events)
+            os.remove(path)
+
+        if recovered:
+            logger.info('Scan buffer: %d event dipulihkan dari journal', recovered)
+        return recovered
+
+    # Catat satu scan: tulis ke journal lalu antrikan. Return event yang dicatat.
+    # `fields` tambahan (harus bisa di-JSON) ikut disimpan dan diteruskan ke apply_batch.
+    def submit(self, user_id, scanned_at, event_id=None, **fields):
+        event = {
+            'id': event_id or uuid.uuid4().hex,
+            'user_id': user_id,
+            'scanned_at': scanned_at.isoformat(),
+            **fields,
+        }
+        line = json.dumps(event, separators=(',', ':')) + '\n'
+
+        with self._lock:
+            self._journal.write(line)
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+            self._pending.append(event)
+            full = len(self._pending) >= self.max_batch
+
+        if full:
+            self._wakeup.set()
+        return event
+
+    def pending(self):
+        return len(self._pending)
+
+    # Tulis semua antrian sekarang (dipakai saat shutdown / benchmark)
+    def flush(self):
+        while self._flush_once():
+            pass
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join()
+        self.flush()
+
+    def _flush_once(self):
+        with self._lock:
+            batch = self._pending[:self.max_batch]
+        if not batch:
+            return False
+
+        self.apply_batch(batch)
+
+        with self._lock:
+            del self._pending[:len(batch)]
+            self.flushed += len(batch)
+            # Semua event di journal sudah tercatat di DB: kosongkan journal
+            if not self._pending:
+                self._journal.seek(0)
+                self._journal.truncate()
+        return True
+
+    def _run(self):
+        delay = self.flush_interval
+        while not self._stop.is_set():
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+            try:
+                while self._flush_once():
+                    pass
+                delay = self.flush_interval
+            except Exception:
+                # DB sibuk/error: event tetap di antrian + journal, coba lagi dengan backoff
+                self.failures += 1
+                logger.exception('Scan buffer: gagal menulis batch, dicoba lagi')
+                delay = min(delay * 2, 5.0)
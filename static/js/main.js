@@ -40,9 +40,14 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
-    // Auto-refresh status setiap 30 detik di dashboard
+    // Status dashboard di-push lewat SSE (polling 30 detik kalau browser tidak mendukung
+    // atau server menolak stream)
     if (window.location.pathname === '/dashboard') {
-        setInterval(refreshAttendanceStatus, 30000);
+        if (window.EventSource) {
+            subscribeAttendanceEvents();
+        } else {
+            startAttendancePolling();
+        }
     }
 
     // Initialize tooltips
@@ -85,18 +90,32 @@ function showNotification(message, type = 'info') {
     }, 5000);
 }
 
-// Fungsi untuk refresh status absensi
+// ETag terakhir dari /api/attendance/status
+let attendanceStatusEtag = null;
+
+// Fungsi untuk refresh status absensi (JSON ringan, bukan render ulang dashboard)
 function refreshAttendanceStatus() {
-    fetch('/dashboard')
-        .then(response => response.text())
-        .then(html => {
-            const parser = new DOMParser();
-            const newDoc = parser.parseFromString(html, 'text/html');
-            const newStatus = newDoc.querySelector('.attendance-status');
-            const currentStatus = document.querySelector('.attendance-status');
-            
-            if (newStatus && currentStatus) {
-                currentStatus.innerHTML = newStatus.innerHTML;
+    const headers = {};
+    if (attendanceStatusEtag) {
+        headers['If-None-Match'] = attendanceStatusEtag;
+    }
+
+    fetch('/api/attendance/status', {headers: headers, cache: 'no-store'})
+        .then(response => {
+            // 304 = status belum berubah
+            if (response.status === 304 || !response.ok) {
+                return null;
+            }
+            attendanceStatusEtag = response.headers.get('ETag');
+            return response.json();
+        })
+        .then(data => {
+            const container = document.getElementById('attendanceStatusBody');
+            if (data && container) {
+                container.innerHTML = renderAttendanceStatus(data);
+            }
+            if (data && data.qr) {
+                updateQRCode(data.qr);
             }
         })
         .catch(error => {
@@ -104,6 +123,81 @@ function refreshAttendanceStatus() {
         });
 }
 
+// Fungsi untuk polling status absensi (dan QR terbaru) setiap 30 detik
+function startAttendancePolling() {
+    refreshAttendanceStatus();
+    setInterval(refreshAttendanceStatus, 30000);
+}
+
+// Fungsi untuk berlangganan event absensi (SSE); browser reconnect otomatis kalau putus
+function subscribeAttendanceEvents() {
+    const source = new EventSource('/api/attendance/events');
+    let disconnected = false;
+
+    // Absensi tercatat: ambil status terbaru (ETag, 304 kalau tidak berubah)
+    source.addEventListener('status', refreshAttendanceStatus);
+
+    // Token QR berganti: ganti gambar dan URL tanpa reload halaman
+    source.addEventListener('qr', function(e) {
+        updateQRCode(JSON.parse(e.data));
+    });
+
+    // Setelah reconnect, event yang terlewat diganti satu kali cek status
+    source.addEventListener('open', function() {
+        if (disconnected) {
+            refreshAttendanceStatus();
+        }
+    });
+    source.addEventListener('error', function() {
+        disconnected = true;
+        // Ditolak server (503, batas stream per worker penuh): browser tidak reconnect
+        if (source.readyState === EventSource.CLOSED) {
+            startAttendancePolling();
+        }
+    });
+}
+
+// Fungsi untuk mengganti gambar dan URL QR dashboard ({image, url})
+function updateQRCode(data) {
+    const image = document.querySelector('.qr-code');
+    const urlInput = document.getElementById('qrUrl');
+    if (image && image.getAttribute('src') !== data.image) {
+        image.src = data.image;
+    }
+    if (urlInput) {
+        urlInput.value = data.url;
+        const testLink = urlInput.closest('.url-container').querySelector('a');
+        if (testLink) {
+            testLink.href = data.url;
+        }
+    }
+}
+
+// Fungsi untuk render status absensi dari data JSON
+function renderAttendanceStatus(data) {
+    if (!data.status) {
+        return '<p class="no-attendance">Belum melakukan absensi hari ini</p>';
+    }
+
+    const statusTitle = data.status.charAt(0).toUpperCase() + data.status.slice(1);
+    return `
+        <div class="attendance-status">
+            <div class="status-item">
+                <span class="status-label">Check-in:</span>
+                <span class="status-value">${data.time_in || 'Belum check-in'}</span>
+            </div>
+            <div class="status-item">
+                <span class="status-label">Check-out:</span>
+                <span class="status-value">${data.time_out || 'Belum check-out'}</span>
+            </div>
+            <div class="status-item">
+                <span class="status-label">Status:</span>
+                <span class="status-value status-${data.status}">${statusTitle}</span>
+            </div>
+        </div>
+    `;
+}
+
 // Fungsi untuk simulasi scan QR dengan loading
 function simulateQRScan(action, buttonElement) {
     const originalText = buttonElement.textContent;
@@ -0,0 +1,30 @@
+// Typeahead karyawan: ambil saran dari /api/users/search, simpan id di input hidden
+(function() {
+    const search = document.getElementById('user_search');
+    const options = document.getElementById('user_options');
+    const userId = document.getElementById('user_id');
+    let timer = null;
+    let suggestions = [];
+
+    search.addEventListener('input', function() {
+        const match = suggestions.find(user => user.username === search.value);
+        userId.value = match ? match.id : '';
+
+        clearTimeout(timer);
+        timer = setTimeout(function() {
+            fetch('/api/users/search?q=' + encodeURIComponent(search.value.trim()))
+                .then(response => response.json())
+                .then(users => {
+                    suggestions = users;
+                    options.innerHTML = '';
+                    users.forEach(user => {
+                        const option = document.createElement('option');
+                        option.value = user.username;
+                        option.label = user.email;
+                        options.appendChild(option);
+                    });
+                })
+                .catch(error => console.error('Error searching users:', error));
+        }, 200);
+    });
+})();
@@ -0,0 +1,202 @@
+// Fungsi untuk copy URL QR Code dengan feedback visual
+function copyQRUrl() {
+    const urlInput = document.getElementById('qrUrl');
+    const copyBtn = document.querySelector('.btn-copy');
+
+    // Select dan copy text
+    urlInput.select();
+    urlInput.setSelectionRange(0, 99999);
+
+    // Modern clipboard API dengan fallback
+    if (navigator.clipboard) {
+        navigator.clipboard.writeText(urlInput.value).then(function() {
+            showCopySuccess(copyBtn);
+        }).catch(function() {
+            // Fallback untuk browser lama
+            document.execCommand('copy');
+            showCopySuccess(copyBtn);
+        });
+    } else {
+        // Fallback untuk browser lama
+        document.execCommand('copy');
+        showCopySuccess(copyBtn);
+    }
+}
+
+// Fungsi untuk menampilkan feedback copy berhasil
+function showCopySuccess(button) {
+    const originalText = button.innerHTML;
+    button.innerHTML = '✅ Tersalin!';
+    button.style.background = 'linear-gradient(135deg, #28a745 0%, #20c997 100%)';
+
+    // Show notification
+    showNotification('URL QR Code berhasil di-copy!', 'success');
+
+    // Reset button setelah 2 detik
+    setTimeout(() => {
+        button.innerHTML = originalText;
+        button.style.background = 'linear-gradient(135deg, #17a2b8 0%, #138496 100%)';
+    }, 2000);
+}
+
+// Fungsi untuk menampilkan notifikasi
+function showNotification(message, type = 'info') {
+    // Hapus notifikasi sebelumnya
+    const existingNotifications = document.querySelectorAll('.notification');
+    existingNotifications.forEach(notif => notif.remove());
+
+    const notification = document.createElement('div');
+    notification.className = `notification notification-${type}`;
+
+    const icons = {
+        'success': '✅',
+        'error': '❌',
+        'info': 'ℹ️',
+        'warning': '⚠️'
+    };
+
+    notification.innerHTML = `
+        <span class="notification-icon">${icons[type] || icons.info}</span>
+        <span class="notification-message">${message}</span>
+        <button class="notification-close" onclick="this.parentElement.remove()">×</button>
+    `;
+
+    // Styling notifikasi
+    const colors = {
+        'success': '#28a745',
+        'error': '#dc3545',
+        'info': '#007bff',
+        'warning': '#ffc107'
+    };
+
+    notification.style.cssText = `
+        position: fixed;
+        top: 20px;
+        right: 20px;
+        background: ${colors[type] || colors.info};
+        color: white;
+        padding: 1rem 1.5rem;
+        border-radius: 8px;
+        box-shadow: 0 4px 12px rgba(0,0,0,0.15);
+        z-index: 1000;
+        display: flex;
+        align-items: center;
+        gap: 10px;
+        animation: slideInRight 0.3s ease;
+        max-width: 400px;
+        font-weight: 500;
+    `;
+
+    document.body.appendChild(notification);
+
+    // Auto remove setelah 4 detik
+    setTimeout(() => {
+        notification.style.animation = 'slideOutRight 0.3s ease';
+        setTimeout(() => notification.remove(), 300);
+    }, 4000);
+}
+
+// Fungsi untuk simulasi scan QR Code check-in dengan loading state
+function simulateCheckIn() {
+    const button = document.getElementById('checkinBtn');
+    const originalText = button.innerHTML;
+
+    // Show loading state
+    button.classList.add('btn-loading');
+    button.innerHTML = '🔄 Processing...';
+    button.disabled = true;
+
+    fetch('/scan_qr', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({action: 'checkin'})
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showNotification(data.message, 'success');
+            refreshAttendanceStatus();
+        } else {
+            showNotification(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showNotification('Terjadi kesalahan saat melakukan check-in', 'error');
+    })
+    .finally(() => {
+        // Restore button state
+        button.classList.remove('btn-loading');
+        button.innerHTML = originalText;
+        button.disabled = false;
+    });
+}
+
+// Fungsi untuk simulasi scan QR Code check-out dengan loading state
+function simulateCheckOut() {
+    const button = document.getElementById('checkoutBtn');
+    const originalText = button.innerHTML;
+
+    // Show loading state
+    button.classList.add('btn-loading');
+    button.innerHTML = '🔄 Processing...';
+    button.disabled = true;
+
+    fetch('/scan_qr', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({action: 'checkout'})
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showNotification(data.message, 'success');
+            button.classList.add('btn-success-animated');
+            refreshAttendanceStatus();
+        } else {
+            showNotification(data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showNotification('Terjadi kesalahan saat melakukan check-out', 'error');
+    })
+    .finally(() => {
+        // Restore button state
+        button.classList.remove('btn-loading');
+        button.innerHTML = originalText;
+        button.disabled = false;
+    });
+}
+
+// Keyboard shortcuts
+document.addEventListener('keydown', function(e) {
+    // Ctrl + C untuk copy QR URL
+    if (e.ctrlKey && e.key === 'c' && e.target.id === 'qrUrl') {
+        e.preventDefault();
+        copyQRUrl();
+    }
+
+    // F5 untuk refresh manual
+    if (e.key === 'F5') {
+        showNotification('Refreshing QR Code...', 'info');
+    }
+});
+
+// Visual feedback saat hover QR Code (lebih halus)
+document.querySelector('.qr-code').addEventListener('mouseenter', function() {
+    this.style.transform = 'scale(1.05)';
+});
+
+document.querySelector('.qr-code').addEventListener('mouseleave', function() {
+    this.style.transform = 'scale(1)';
+});
+
+// Tampilkan info loading saat pertama kali load
+window.addEventListener('load', function() {
+    showNotification('QR Code siap untuk di-scan! ', 'success');
+});
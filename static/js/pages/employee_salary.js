@@ -0,0 +1,35 @@
+function formatRupiah(amount) {
+    return new Intl.NumberFormat('id-ID').format(amount);
+}
+
+function updatePreview() {
+    const dailyWage = parseFloat(document.getElementById('daily_wage').value) || 0;
+    const overtimeRate = parseFloat(document.getElementById('overtime_rate').value) || 0;
+    const mealAllowance = parseFloat(document.getElementById('meal_allowance').value) || 0;
+    const weeklyDeduction = parseFloat(document.getElementById('weekly_deduction').value) || 0;
+
+    // Preview calculations (example: 5 days work, 10 hours overtime, 2 meal allowances)
+    const basicPay = dailyWage * 5;
+    const overtimePay = overtimeRate * 10;
+    const mealPay = mealAllowance * 2;
+    const grossPay = basicPay + overtimePay + mealPay;
+    const netPay = grossPay - weeklyDeduction;
+
+    document.getElementById('preview-basic').textContent = 'Rp ' + formatRupiah(basicPay);
+    document.getElementById('preview-overtime').textContent = 'Rp ' + formatRupiah(overtimePay);
+    document.getElementById('preview-meal').textContent = 'Rp ' + formatRupiah(mealPay);
+    document.getElementById('preview-gross').textContent = 'Rp ' + formatRupiah(grossPay);
+    document.getElementById('preview-deduction').textContent = '- Rp ' + formatRupiah(weeklyDeduction);
+    document.getElementById('preview-net').textContent = 'Rp ' + formatRupiah(netPay);
+}
+
+// Update preview when inputs change
+document.addEventListener('DOMContentLoaded', function() {
+    const inputs = ['daily_wage', 'overtime_rate', 'meal_allowance', 'weekly_deduction'];
+    inputs.forEach(id => {
+        document.getElementById(id).addEventListener('input', updatePreview);
+    });
+
+    // Initial preview update
+    updatePreview();
+});
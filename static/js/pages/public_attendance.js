@@ -0,0 +1,17 @@
+// Auto refresh setiap 5 menit
+setTimeout(() => {
+    window.location.reload();
+}, 300000);
+
+// Update title with current time
+function updateTime() {
+    const now = new Date();
+    const timeString = now.toLocaleTimeString('id-ID', {
+        hour: '2-digit',
+        minute: '2-digit'
+    });
+    document.title = `${timeString} - Riwayat ${document.body.dataset.username}`;
+}
+
+updateTime();
+setInterval(updateTime, 60000); // Update every minute
@@ -0,0 +1,35 @@
+function showLoading(button) {
+    if (button.classList.contains('btn-disabled')) {
+        return false;
+    }
+
+    button.classList.add('btn-loading');
+    button.style.opacity = '0.7';
+
+    // Timeout untuk menghindari loading stuck
+    setTimeout(() => {
+        button.classList.remove('btn-loading');
+        button.style.opacity = '1';
+    }, 10000);
+
+    return true;
+}
+
+// Auto refresh setiap 5 menit untuk update status
+setTimeout(() => {
+    window.location.reload();
+}, 300000);
+
+// Show current time
+function updateTime() {
+    const now = new Date();
+    const timeString = now.toLocaleTimeString('id-ID', {
+        hour: '2-digit',
+        minute: '2-digit',
+        second: '2-digit'
+    });
+    document.title = `${timeString} - Absensi ${document.body.dataset.username}`;
+}
+
+updateTime();
+setInterval(updateTime, 1000);
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app as absensi  # noqa: E402
+
+# Database dan folder data yang dipakai bersama semua worker
+SHARED_CONFIG = ('SQLALCHEMY_DATABASE_URI', 'PAYSLIP_DIR', 'ARCHIVE_DIR', 'SCAN_JOURNAL_DIR')
+
+
+# App dengan database dan folder data sementara per sesi test, instance/ tidak disentuh
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp('absensi-test')
+    application = absensi.create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{data_dir / "test.db"}',
+        'PAYSLIP_DIR': str(data_dir / 'payslips'),
+        'ARCHIVE_DIR': str(data_dir / 'archive'),
+        'SCAN_JOURNAL_DIR': str(data_dir / 'scan_journal'),
+    })
+    with application.app_context():
+        absensi.upgrade_schema()
+        absensi.create_admin_user()
+    return application
+
+
+@pytest.fixture
+def app_context(app):
+    with app.app_context():
+        yield
+
+
+# Test client yang sudah login sebagai admin default
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    return client
+
+
+# App kedua di database yang sama: worker gunicorn lain dengan cache per process sendiri
+@pytest.fixture
+def other_worker(app):
+    return absensi.create_app({key: app.config[key] for key in SHARED_CONFIG})
@@ -0,0 +1,55 @@
+import csv
+
+from werkzeug.security import check_password_hash
+
+import app as absensi
+from add_user import import_users, insert_user_batch
+
+ROWS = [
+    ('impor_a', 'impor_a@example.com', 'rahasia1', 'y'),
+    ('impor_b', 'impor_b@example.com', 'rahasia2', ''),
+    ('impor_a', 'impor_lain@example.com', 'rahasia3', ''),   # username duplikat di file
+    ('impor_c', 'impor_b@example.com', 'rahasia4', ''),      # email duplikat di file
+    ('admin', 'impor_admin@example.com', 'rahasia5', ''),    # sudah ada di DB
+    ('impor_d', 'impor_d@example.com', 'pw', ''),            # password terlalu pendek
+    ('impor_e', '', 'rahasia6', ''),                         # kolom kosong
+    ('impor_f', 'impor_f@example.com', 'rahasia7', 'no'),
+]
+
+
+def test_import_users_rejects_and_batches(app, tmp_path, monkeypatch, capsys):
+    source = tmp_path / 'users.csv'
+    with open(source, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['username', 'email', 'password', 'is_admin'])
+        writer.writerows(ROWS)
+    rejects = tmp_path / 'ditolak.csv'
+
+    # Dipanggil sebagai fungsi biasa (tanpa __main__): app dibuat dari DATABASE_URL
+    monkeypatch.setenv('DATABASE_URL', app.config['SQLALCHEMY_DATABASE_URI'])
+    imported, rejected = import_users(str(source), batch_size=2, workers=1, rejects_path=str(rejects))
+
+    assert imported == 3
+    assert [number for number, *_ in rejected] == [4, 5, 6, 7, 8]
+    assert 'password kurang dari 6 karakter' in rejected[3][1]
+    assert '2/3 baris diproses' in capsys.readouterr().out
+    with open(rejects, newline='') as f:
+        assert [row[0] for row in csv.reader(f)] == ['baris', '4', '5', '6', '7', '8']
+
+    with app.app_context():
+        users = {user.username: user for user in absensi.User.query.filter(absensi.User.username.like('impor_%'))}
+        assert sorted(users) == ['impor_a', 'impor_b', 'impor_f']
+        assert users['impor_a'].is_admin and not users['impor_f'].is_admin
+        assert check_password_hash(users['impor_b'].password_hash, 'rahasia2')
+
+
+def test_batch_conflict_falls_back_to_single_rows(app_context):
+    batch = [
+        {'line': 2, 'username': 'batch_baru', 'email': 'batch_baru@example.com', 'password_hash': 'x', 'is_admin': False},
+        {'line': 3, 'username': 'admin', 'email': 'batch_admin@example.com', 'password_hash': 'x', 'is_admin': False},
+    ]
+    rejected = []
+
+    assert insert_user_batch(batch, rejected) == 1
+    assert rejected == [(3, 'username/email sudah ada', 'admin', 'batch_admin@example.com')]
+    assert absensi.User.query.filter_by(username='batch_baru').count() == 1
@@ -0,0 +1,110 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+from flask import current_app
+from werkzeug.security import generate_password_hash
+
+import app as absensi
+from analytics import AttendanceColumns, compute_attendance_analytics
+
+START = date(2024, 3, 4)  # Senin
+END = START + timedelta(days=6)
+
+# (hari ke-, jam masuk, jam pulang atau None); jam pulang >= 24 = lewat tengah malam
+SCANS = {
+    'analitik_a': [(0, '07:55', '17:30'), (1, '08:15', None), (2, '07:30', '25:10')],
+    'analitik_b': [(0, '18:00', '20:00'), (3, '08:00', '16:59'), (4, '09:42', '17:00')],
+}
+
+
+def at(day, clock):
+    hours, minutes = map(int, clock.split(':'))
+    return datetime.combine(day, datetime.min.time()) + timedelta(hours=hours, minutes=minutes)
+
+
+@pytest.fixture(scope='module')
+def user_ids(app):
+    with app.app_context():
+        ids = []
+        for username, scans in SCANS.items():
+            user = absensi.User(username=username, email=f'{username}@example.com',
+                                password_hash=generate_password_hash('rahasia'))
+            absensi.db.session.add(user)
+            absensi.db.session.commit()
+            ids.append(user.id)
+            for offset, time_in, time_out in scans:
+                day = START + timedelta(days=offset)
+                absensi.toggle_attendance(user.id, day, at(day, time_in))
+                if time_out:
+                    absensi.toggle_attendance(user.id, day, at(day, time_out))
+        return ids
+
+
+# Nilai yang diharapkan per baris, dihitung langsung dari tabel attendance
+def raw_rows(user_ids):
+    work_start = datetime.strptime(current_app.config['WORK_START_TIME'], '%H:%M').time()
+    work_end = datetime.strptime(current_app.config['WORK_END_TIME'], '%H:%M').time()
+    rows = set()
+    for row in absensi.Attendance.query.filter(absensi.Attendance.user_id.in_(user_ids),
+                                               absensi.Attendance.date.between(START, END)):
+        worked = overtime = 0
+        if row.time_out:
+            worked = int((row.time_out - row.time_in).total_seconds() // 60)
+            overtime_from = max(row.time_in, datetime.combine(row.date, work_end))
+            overtime = max(int((row.time_out - overtime_from).total_seconds() // 60), 0)
+        rows.add((row.user_id, (row.date - date(1970, 1, 1)).days,
+                  row.time_in.hour * 60 + row.time_in.minute, row.time_out is not None,
+                  row.time_in.time() > work_start, worked, overtime))
+    return rows
+
+
+def decoded_rows(columns):
+    return set(zip(*(array.tolist() for array in columns.arrays())))
+
+
+@pytest.mark.parametrize('rebuild', [False, True], ids=['per-scan', 'rebuild'])
+def test_columns_match_raw_rows(app_context, user_ids, rebuild):
+    if rebuild:
+        absensi.rebuild_attendance_summaries(START, END)
+
+    columns = absensi.load_analytics_columns(START, END)
+
+    assert decoded_rows(columns) == raw_rows(user_ids)
+    assert len(columns) == sum(len(scans) for scans in SCANS.values())
+
+
+def test_reload_days_and_user_filter(app_context, user_ids):
+    day = START + timedelta(days=1)
+    columns = absensi.load_analytics_columns(START, END, user_id=user_ids[0], days=[day])
+
+    assert columns.user_id.tolist() == [user_ids[0]]
+    assert columns.day.tolist() == [(day - date(1970, 1, 1)).days]
+    assert columns.late.tolist() == [True]
+    assert columns.checked_out.tolist() == [False]
+
+
+def test_parse_rejects_truncated_values():
+    assert len(AttendanceColumns.parse(None)) == 0
+    with pytest.raises(ValueError):
+        AttendanceColumns.parse('1,2,3')
+    with pytest.raises(ValueError):
+        AttendanceColumns.parse('1,2,x,1,0,60,0')
+
+
+def test_metrics_from_summary(app_context, user_ids):
+    result = compute_attendance_analytics(absensi.load_analytics_columns(START, END))
+
+    assert result['summary'] == {
+        'employees': 2,
+        'days_present': 6,
+        'late_days': 3,
+        'late_rate': 0.5,
+        'complete_days': 5,
+        'avg_hours': round((575 + 1060 + 120 + 539 + 438) / 60 / 5, 2),
+        'overtime_hours': round((30 + 490 + 120) / 60, 2),
+    }
+    counts = np.array(result['heatmap']['counts'])
+    assert counts.sum() == 6
+    assert counts[0, 7] == 1 and counts[0, 18] == 1  # Senin 07:55 dan 18:00
+    assert counts[4, 9] == 1                          # Jumat 09:42
@@ -0,0 +1,42 @@
+from sqlalchemy import text
+
+import app as absensi
+
+
+def make_app(tmp_path, name, **config):
+    return absensi.create_app(dict(config, SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / name}'))
+
+
+def test_apps_do_not_share_config_database_or_state(tmp_path):
+    first = make_app(tmp_path, 'first.db', QR_TOKEN_ROTATION=60)
+    second = make_app(tmp_path, 'second.db', QR_TOKEN_ROTATION=300, SQLITE_JOURNAL_MODE='DELETE')
+
+    for application in (first, second):
+        with application.app_context():
+            absensi.init_database()
+    with first.app_context():
+        absensi.db.session.add(absensi.User(username='hanya_di_first', email='first@example.com',
+                                            password_hash='x'))
+        absensi.db.session.commit()
+        assert absensi.qr_signer.rotation == 60
+        assert absensi.db.session.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+
+    with second.app_context():
+        assert absensi.User.query.filter_by(username='hanya_di_first').first() is None
+        assert absensi.qr_signer.rotation == 300
+        assert absensi.db.session.execute(text('PRAGMA journal_mode')).scalar() == 'delete'
+
+    assert first.extensions['absensi'] is not second.extensions['absensi']
+    assert first.extensions['absensi'].user_cache is not second.extensions['absensi'].user_cache
+
+
+def test_routes_come_from_blueprint(tmp_path):
+    application = make_app(tmp_path, 'routes.db')
+    with application.app_context():
+        absensi.init_database()
+
+    client = application.test_client()
+    assert client.get('/login').status_code == 200
+    response = client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    assert response.headers['Location'].endswith('/dashboard')
+    assert 'main.dashboard' in application.view_functions
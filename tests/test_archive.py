@@ -0,0 +1,118 @@
+import re
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import app as absensi
+
+CURRENT_MONTH = date.today().replace(day=1)
+PREVIOUS_MONTH = (CURRENT_MONTH - timedelta(days=1)).replace(day=1)
+
+# (tanggal, jam masuk, jam pulang atau None); Januari dan Februari 2023 diarsip, dua bulan terakhir tidak
+SCANS = [
+    (date(2023, 1, 9), '07:50', '17:00'),
+    (date(2023, 1, 10), '08:20', '17:15'),
+    (date(2023, 1, 11), '07:55', '16:40'),
+    (date(2023, 1, 12), '08:00', '18:30'),
+    (date(2023, 2, 6), '07:45', '17:05'),
+    (date(2023, 2, 7), '08:10', None),
+    (PREVIOUS_MONTH, '07:58', '17:01'),
+    (CURRENT_MONTH, '08:03', None),
+]
+PAGE_SIZE = 3
+
+
+def at(day, clock):
+    return datetime.combine(day, datetime.strptime(clock, '%H:%M').time())
+
+
+# App dengan database dan arsip sendiri: archive_closed_months memindah semua bulan lama
+@pytest.fixture
+def archive_app(tmp_path):
+    application = absensi.create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "arsip.db"}',
+        'ARCHIVE_DIR': str(tmp_path / 'archive'),
+        'REPORT_PAGE_SIZE': PAGE_SIZE,
+    })
+    with application.app_context():
+        absensi.upgrade_schema()
+        absensi.create_admin_user()
+        user = absensi.User(username='arsip', email='arsip@example.com', password_hash='x')
+        absensi.db.session.add(user)
+        absensi.db.session.commit()
+        for day, time_in, time_out in SCANS:
+            absensi.toggle_attendance(user.id, day, at(day, time_in))
+            if time_out:
+                absensi.toggle_attendance(user.id, day, at(day, time_out))
+        application.config['TEST_USER_ID'] = user.id
+    return application
+
+
+def report_pages(application, user_id):
+    client = application.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    pages = []
+    cursor = None
+    while True:
+        html = client.get('/attendance_report', query_string={'user_id': user_id, 'after': cursor}).get_data(as_text=True)
+        rows = re.findall(r'<td>(\d\d/\d\d/\d{4})</td>\s*<td>arsip</td>', html)
+        pages.append([datetime.strptime(row, '%d/%m/%Y').date() for row in rows])
+        match = re.search(r'after=([0-9-]+_\d+)', html)
+        if not match:
+            return pages
+        cursor = match.group(1)
+
+
+def test_archive_moves_closed_months_and_keeps_summaries(archive_app):
+    user_id = archive_app.config['TEST_USER_ID']
+    with archive_app.app_context():
+        totals = absensi.attendance_summary_totals(user_id=user_id)
+
+        archived = absensi.archive_closed_months(keep_months=3)
+
+        assert [(month.isoformat(), count) for month, count, entry in archived] == [('2023-01-01', 4), ('2023-02-01', 2)]
+        assert sorted(row.date for row in absensi.Attendance.query.filter_by(user_id=user_id)) == \
+            sorted({PREVIOUS_MONTH, CURRENT_MONTH})
+        assert [row.date for row in absensi.attendance_archive.rows(user_id=user_id)] == \
+            [day for day, *_ in reversed(SCANS[:6])]
+        assert absensi.attendance_summary_totals(user_id=user_id) == totals
+        # Arsip ulang tanpa perubahan tidak memindah apa-apa
+        assert absensi.archive_closed_months(keep_months=3) == []
+
+
+def test_report_pages_across_archive_and_table(archive_app):
+    user_id = archive_app.config['TEST_USER_ID']
+    expected = sorted((day for day, *_ in SCANS), reverse=True)
+    before = report_pages(archive_app, user_id)
+
+    with archive_app.app_context():
+        absensi.archive_closed_months(keep_months=3)
+    pages = report_pages(archive_app, user_id)
+
+    assert pages == before
+    assert [len(page) for page in pages] == [3, 3, 2]
+    assert [day for page in pages for day in page] == expected
+
+
+def test_late_scan_restores_archived_row(archive_app):
+    user_id = archive_app.config['TEST_USER_ID']
+    day = date(2023, 2, 7)
+    with archive_app.app_context():
+        absensi.archive_closed_months(keep_months=3)
+        archived_row = next(absensi.attendance_archive.rows(day, day, user_id))
+
+        # Kiosk offline baru sync check-out hari itu setelah bulannya diarsip
+        results = absensi.record_scan_events([{'id': 'telat-1', 'user_id': user_id,
+                                               'scanned_at': at(day, '17:20').isoformat()}])
+        assert tuple(results['telat-1']) == (at(day, '08:10'), at(day, '17:20'))
+        restored = absensi.Attendance.query.filter_by(user_id=user_id, date=day).one()
+        assert restored.id == archived_row.id
+
+    # Laporan menampilkan hari itu sekali, versi tabel (sudah check-out)
+    assert [day for page in report_pages(archive_app, user_id) for day in page].count(day) == 1
+
+    with archive_app.app_context():
+        absensi.archive_closed_months(keep_months=3)
+        assert absensi.Attendance.query.filter_by(user_id=user_id, date=day).count() == 0
+        rows = list(absensi.attendance_archive.rows(day, day, user_id))
+        assert [(row.id, row.time_out) for row in rows] == [(archived_row.id, at(day, '17:20'))]
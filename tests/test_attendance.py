@@ -0,0 +1,87 @@
+from datetime import date, datetime, time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError
+
+import app as absensi
+import migrations
+
+DAY = date(2023, 5, 8)
+
+
+def at(hour, minute=0):
+    return datetime.combine(DAY, time(hour, minute))
+
+
+@pytest.fixture
+def user_id(app_context, request):
+    username = f'absen_{request.node.name}'[:80]
+    user = absensi.User(username=username, email=f'{username}@example.com', password_hash='x')
+    absensi.db.session.add(user)
+    absensi.db.session.commit()
+    return user.id
+
+
+def attendance_rows(user_id):
+    return absensi.Attendance.query.filter_by(user_id=user_id, date=DAY).all()
+
+
+def test_double_check_in_keeps_first_time_in(user_id):
+    assert absensi.check_in(user_id, DAY, at(7, 55))
+    assert not absensi.check_in(user_id, DAY, at(8, 30))
+
+    rows = attendance_rows(user_id)
+    assert len(rows) == 1
+    assert rows[0].time_in == at(7, 55) and rows[0].time_out is None
+    summary = absensi.AttendanceDailySummary.query.filter_by(user_id=user_id, date=DAY).one()
+    assert not summary.is_late
+
+
+def test_check_out_without_check_in(user_id):
+    assert not absensi.check_out(user_id, DAY, at(17))
+    assert attendance_rows(user_id) == []
+
+    assert absensi.check_in(user_id, DAY, at(8))
+    assert absensi.check_out(user_id, DAY, at(17))
+    assert not absensi.check_out(user_id, DAY, at(18))
+    assert attendance_rows(user_id)[0].time_out == at(17)
+
+
+def test_toggle_checks_in_then_out_then_stops(user_id):
+    assert tuple(absensi.toggle_attendance(user_id, DAY, at(8))) == (at(8), None)
+    assert tuple(absensi.toggle_attendance(user_id, DAY, at(17))) == (at(8), at(17))
+    assert absensi.toggle_attendance(user_id, DAY, at(18)) is None
+
+    rows = attendance_rows(user_id)
+    assert len(rows) == 1 and (rows[0].time_in, rows[0].time_out) == (at(8), at(17))
+
+
+# Database lama (skema versi 1) dengan baris ganda per user per hari
+def test_migration_merges_duplicates_and_adds_unique_index(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "lama.db"}')
+    with engine.begin() as conn:
+        migrations.current_version(conn)
+        migrations._create_base_tables(conn)
+        conn.execute(text("INSERT INTO schema_migrations VALUES (1, 'create base tables', '2023-01-01')"))
+        conn.execute(text("INSERT INTO user (id, username, email, password_hash) VALUES (1, 'lama', 'lama@x', 'x')"))
+        conn.execute(text("""
+            INSERT INTO attendance (user_id, date, time_in, time_out, status) VALUES
+                (1, '2023-05-08', '2023-05-08 08:10:00.000000', NULL, 'hadir'),
+                (1, '2023-05-08', '2023-05-08 07:50:00.000000', '2023-05-08 17:05:00.000000', 'hadir'),
+                (1, '2023-05-09', '2023-05-09 08:00:00.000000', NULL, 'hadir')
+        """))
+
+    migrations.upgrade(engine)
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT date, time_in, time_out FROM attendance ORDER BY date")).all()
+        assert [tuple(row) for row in rows] == [
+            ('2023-05-08', '2023-05-08 07:50:00.000000', '2023-05-08 17:05:00.000000'),
+            ('2023-05-09', '2023-05-09 08:00:00.000000', None),
+        ]
+        indexes = {row.name: row.unique for row in conn.execute(text("PRAGMA index_list(attendance)"))}
+        assert indexes['uq_attendance_user_date_desc'] == 1
+        with pytest.raises(IntegrityError):
+            conn.execute(text("INSERT INTO attendance (user_id, date) VALUES (1, '2023-05-09')"))
+    engine.dispose()
@@ -0,0 +1,74 @@
+from datetime import date, datetime
+
+import app as absensi
+from cache import LRUCache
+
+
+def test_lru_entry_with_other_version_is_a_miss():
+    cache = LRUCache(max_entries=2)
+    cache.set('a', 1, version=3)
+
+    assert cache.get('a', version=3) == 1
+    assert cache.get('a', version=4) is None
+    assert cache.get_or_load('a', lambda: 2, version=4) == 2
+    assert cache.get('a', version=4) == 2
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def load_username(application, user_id):
+    with application.app_context():
+        user = absensi.load_user(str(user_id))
+        return user.username if user else None
+
+
+def test_user_change_in_other_worker_invalidates_loader(app, other_worker):
+    with app.app_context():
+        user = absensi.User(username='cache_lama', email='cache_lama@example.com', password_hash='x')
+        absensi.db.session.add(user)
+        absensi.db.session.commit()
+        user_id = user.id
+
+    assert load_username(app, user_id) == 'cache_lama'
+    assert load_username(app, user_id) == 'cache_lama'
+    assert app.extensions['absensi'].user_cache.hits >= 1
+
+    # Worker lain mengubah lalu menghapus user: worker ini langsung melihatnya (tanpa tunggu TTL)
+    with other_worker.app_context():
+        absensi.db.session.get(absensi.User, user_id).username = 'cache_baru'
+        absensi.db.session.commit()
+        absensi.invalidate_user(user_id)
+    assert load_username(app, user_id) == 'cache_baru'
+
+    with other_worker.app_context():
+        absensi.db.session.delete(absensi.db.session.get(absensi.User, user_id))
+        absensi.db.session.commit()
+        absensi.invalidate_user(user_id)
+    assert load_username(app, user_id) is None
+
+
+def test_scan_in_other_worker_invalidates_history_page(app, other_worker):
+    with app.app_context():
+        user = absensi.User(username='cache_riwayat', email='cache_riwayat@example.com', password_hash='x')
+        absensi.db.session.add(user)
+        absensi.db.session.commit()
+        user_id = user.id
+    client = app.test_client()
+    url = f'/attendance/{user_id}/riwayat'
+
+    empty = client.get(url)
+    assert client.get(url).data == empty.data
+    page_hits = app.extensions['absensi'].page_cache.hits
+
+    # Scan lewat worker lain: halaman di worker ini langsung berisi scan tsb
+    with other_worker.app_context():
+        absensi.toggle_attendance(user_id, date(2023, 7, 3), datetime(2023, 7, 3, 7, 41))
+    page = client.get(url)
+    assert b'03/07/2023' in page.data and b'07:41' in page.data
+    assert page.headers['ETag'] != empty.headers['ETag']
+
+    # Scan di worker ini sendiri (check-out)
+    with app.app_context():
+        absensi.toggle_attendance(user_id, date(2023, 7, 3), datetime(2023, 7, 3, 17, 52))
+    assert b'17:52' in client.get(url).data
+    assert client.get(url).data == client.get(url).data
+    assert app.extensions['absensi'].page_cache.hits > page_hits
@@ -0,0 +1,72 @@
+import threading
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+import app as absensi
+
+THREADS = 4
+USERS = 20
+
+
+# Database WAL sendiri dan dua app (dua worker) di atasnya; versi penuh: benchmarks/check_concurrency.py
+@pytest.fixture
+def workers(tmp_path):
+    config = {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "konkuren.db"}', 'SQLITE_JOURNAL_MODE': 'WAL'}
+    first = absensi.create_app(config)
+    with first.app_context():
+        absensi.upgrade_schema()
+        users = [absensi.User(username=f'konkuren{i}', email=f'konkuren{i}@example.com', password_hash='x')
+                 for i in range(USERS)]
+        absensi.db.session.add_all(users)
+        absensi.db.session.commit()
+        first.config['TEST_USER_IDS'] = [user.id for user in users]
+    return first, absensi.create_app(config)
+
+
+# Semua thread check-in lalu check-out semua user bersamaan; return (hasil per user, error)
+def run_threads(apps, action, user_ids, today, now):
+    barrier = threading.Barrier(THREADS)
+    results = {user_id: [] for user_id in user_ids}
+    errors = []
+
+    def worker(application):
+        with application.app_context():
+            barrier.wait()
+            for user_id in user_ids:
+                try:
+                    results[user_id].append(action(user_id, today, now))
+                except Exception as e:
+                    absensi.db.session.rollback()
+                    errors.append(repr(e))
+
+    threads = [threading.Thread(target=worker, args=(apps[i % len(apps)],)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_check_ins_without_lock_errors(workers):
+    user_ids = workers[0].config['TEST_USER_IDS']
+    today = date.today()
+    now = datetime.combine(today, datetime.min.time()) + timedelta(hours=8)
+
+    results, errors = run_threads(workers, absensi.check_in, user_ids, today, now)
+    assert errors == []
+    # Tepat satu thread berhasil check-in per user, sisanya ditolak sebagai check-in ganda
+    assert all(sorted(outcomes) == [False] * (THREADS - 1) + [True] for outcomes in results.values())
+
+    results, errors = run_threads(workers, absensi.check_out, user_ids, today, now + timedelta(hours=9))
+    assert errors == []
+    assert all(outcomes.count(True) == 1 for outcomes in results.values())
+
+    with workers[1].app_context():
+        assert absensi.db.session.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        complete = absensi.Attendance.query.filter(absensi.Attendance.date == today,
+                                                   absensi.Attendance.time_out.isnot(None)).count()
+        assert complete == USERS
+        summaries = absensi.AttendanceDailySummary.query.filter_by(date=today, checked_out=True).count()
+        assert summaries == USERS
@@ -0,0 +1,64 @@
+from datetime import date, datetime
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+import app as absensi
+
+
+@pytest.fixture
+def employee(app, monkeypatch, request):
+    # QR tidak berganti selama test (payload status ikut berisi URL QR)
+    monkeypatch.setattr(app.extensions['absensi'].qr_signer, 'rotation', 10 ** 9)
+    with app.app_context():
+        username = f'etag_{request.node.name}'[:80]
+        user = absensi.User(username=username, email=f'{username}@example.com',
+                            password_hash=generate_password_hash('rahasia'))
+        absensi.db.session.add(user)
+        absensi.db.session.commit()
+        user_id = user.id
+    client = app.test_client()
+    client.post('/login', data={'username': username, 'password': 'rahasia'})
+    return user_id, client
+
+
+def test_status_api_returns_304_until_attendance_changes(app, employee):
+    user_id, client = employee
+
+    first = client.get('/api/attendance/status')
+    assert first.status_code == 200 and not first.get_json()['checked_in']
+    etag = first.headers['ETag']
+
+    unchanged = client.get('/api/attendance/status', headers={'If-None-Match': etag})
+    assert unchanged.status_code == 304 and unchanged.data == b''
+
+    with app.app_context():
+        absensi.toggle_attendance(user_id, date.today(), datetime.now())
+    changed = client.get('/api/attendance/status', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.get_json()['checked_in']
+    assert changed.headers['ETag'] != etag
+    assert client.get('/api/attendance/status',
+                      headers={'If-None-Match': changed.headers['ETag']}).status_code == 304
+
+
+@pytest.mark.parametrize('url', ['/attendance', '/attendance/{user_id}/riwayat'])
+def test_history_page_returns_304_until_new_scan(app, other_worker, employee, url):
+    user_id, client = employee
+    url = url.format(user_id=user_id)
+    day = date(2023, 8, 7)
+    with app.app_context():
+        absensi.toggle_attendance(user_id, day, datetime(2023, 8, 7, 8, 5))
+
+    first = client.get(url)
+    assert first.status_code == 200
+    etag, last_modified = first.headers['ETag'], first.headers['Last-Modified']
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+    assert client.get(url, headers={'If-Modified-Since': last_modified}).status_code == 304
+
+    # Check-out lewat worker lain: halaman cache worker ini tidak berlaku lagi
+    with other_worker.app_context():
+        absensi.toggle_attendance(user_id, day, datetime(2023, 8, 7, 17, 10))
+    changed = client.get(url, headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and b'17:10' in changed.data
+    assert changed.headers['ETag'] != etag
+    assert client.get(url, headers={'If-None-Match': changed.headers['ETag']}).status_code == 304
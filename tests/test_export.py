@@ -0,0 +1,40 @@
+import csv
+import io
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as absensi
+
+DAY = datetime(2022, 3, 15)
+
+
+@pytest.fixture(scope='module')
+def export_user(app):
+    with app.app_context():
+        user = absensi.User(username='ekspor', email='ekspor@example.com', password_hash='x')
+        absensi.db.session.add(user)
+        absensi.db.session.commit()
+        absensi.toggle_attendance(user.id, DAY.date(), DAY + timedelta(hours=8))
+        absensi.toggle_attendance(user.id, DAY.date(), DAY + timedelta(hours=17))
+        return user.id
+
+
+def test_csv_export_streams(admin_client, export_user):
+    response = admin_client.get('/attendance_report/export.csv', query_string={'user_id': export_user})
+    assert response.is_streamed
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows == [absensi.REPORT_EXPORT_HEADER, ['2022-03-15', 'ekspor', '08:00:00', '17:00:00', '540', 'hadir']]
+
+
+# XLSX di-spool dulu (zip baru lengkap setelah save), jadi ukurannya dikirim di Content-Length
+def test_xlsx_export_is_spooled_with_length(admin_client, export_user):
+    from openpyxl import load_workbook
+
+    response = admin_client.get('/attendance_report/export.xlsx',
+                                query_string={'user_id': export_user})
+    data = response.get_data()
+    assert response.content_length == len(data)
+    sheet = load_workbook(io.BytesIO(data), read_only=True).active
+    assert [list(row) for row in sheet.iter_rows(values_only=True)] == [
+        absensi.REPORT_EXPORT_HEADER, ['2022-03-15', 'ekspor', '08:00:00', '17:00:00', 540, 'hadir']]
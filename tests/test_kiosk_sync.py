@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as absensi
+
+MORNING = datetime(2023, 6, 5, 8, 0)
+EVENING = datetime(2023, 6, 5, 17, 30)
+
+
+@pytest.fixture
+def kiosk_user(app, request):
+    with app.app_context():
+        username = f'kiosk_{request.node.name}'
+        user = absensi.User(username=username, email=f'{username}@example.com', password_hash='x')
+        absensi.db.session.add(user)
+        absensi.db.session.commit()
+        return user.id
+
+
+def event(app, event_id, user_id, scanned_at):
+    token = app.extensions['absensi'].qr_signer.issue(user_id, now=scanned_at.timestamp())
+    return {'id': event_id, 'token': token, 'scanned_at': scanned_at.isoformat()}
+
+
+def sync(client, events):
+    response = client.post('/api/kiosk/sync', json={'events': events})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_replayed_batch_gets_identical_response(app, admin_client, kiosk_user):
+    batch = [event(app, f'replay-{kiosk_user}-1', kiosk_user, MORNING),
+             event(app, f'replay-{kiosk_user}-2', kiosk_user, EVENING)]
+
+    first = sync(admin_client, batch)
+    assert [result['status'] for result in first['results']] == ['check_in', 'check_out']
+    assert first['results'][1]['time_out'] == EVENING.isoformat()
+
+    # Kiosk tidak menerima jawaban lalu mengirim batch yang sama lagi
+    assert sync(admin_client, batch) == first
+
+    with app.app_context():
+        rows = absensi.Attendance.query.filter_by(user_id=kiosk_user).all()
+        assert [(row.time_in, row.time_out) for row in rows] == [(MORNING, EVENING)]
+
+
+def test_batch_with_valid_and_invalid_events(app, admin_client, kiosk_user):
+    prefix = f'mixed-{kiosk_user}'
+    check_in = event(app, f'{prefix}-in', kiosk_user, MORNING)
+    batch = [
+        check_in,
+        dict(check_in, id=f'{prefix}-same-token'),                          # token sudah dipakai
+        check_in,                                                           # id ganda di batch
+        event(app, f'{prefix}-future', kiosk_user, datetime.now() + timedelta(hours=1)),
+        dict(event(app, f'{prefix}-bad-time', kiosk_user, MORNING), scanned_at='kemarin'),
+        dict(event(app, f'{prefix}-tampered', kiosk_user, MORNING + timedelta(minutes=5)), token='rusak'),
+        {'token': check_in['token'], 'scanned_at': MORNING.isoformat()},    # tanpa id
+        event(app, f'{prefix}-out', kiosk_user, EVENING),
+        event(app, f'{prefix}-after-out', kiosk_user, EVENING + timedelta(minutes=5)),
+    ]
+
+    first = sync(admin_client, batch)
+    assert [(result['status'], result.get('reason')) for result in first['results']] == [
+        ('check_in', None),
+        ('rejected', 'QR Code sudah digunakan'),
+        ('duplicate', None),
+        ('rejected', 'scanned_at di masa depan'),
+        ('rejected', 'scanned_at bukan waktu ISO 8601'),
+        ('rejected', 'QR Code tidak valid'),
+        ('rejected', 'id event tidak valid'),
+        ('check_out', None),
+        ('ignored', 'Absensi hari itu sudah selesai atau scan sebelum check-in'),
+    ]
+    assert first['summary'] == {'check_in': 1, 'check_out': 1, 'duplicate': 1, 'ignored': 1, 'rejected': 5}
+    assert sync(admin_client, batch) == first
+
+    with app.app_context():
+        assert absensi.Attendance.query.filter_by(user_id=kiosk_user).count() == 1
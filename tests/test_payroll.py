@@ -0,0 +1,69 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from payroll import compute_weekly_payroll, terbilang
+
+MONDAY = date(2024, 3, 4)
+
+
+def at(day, hour, minute=0):
+    return datetime.combine(MONDAY + timedelta(days=day), time(hour, minute))
+
+
+# (user_id, gaji harian, upah lembur/jam, uang makan, hutang, potongan mingguan)
+EMPLOYEES = [
+    (1, 100000, 20000, 25000, 150000, 100000),
+    (2, None, None, None, 0, None),        # belum ada data gaji/hutang
+    (3, 10000, 10000, 25000, 30000, 50000),
+    (4, 100000, 20000, 25000, 0, None),    # tidak masuk sama sekali
+]
+
+# (user_id, jam masuk, jam pulang)
+ATTENDANCE = [
+    (1, at(0, 7, 50), at(0, 21, 30)),   # lembur 4,5 jam -> 1x uang makan
+    (1, at(1, 8, 10), at(1, 17)),       # terlambat
+    (1, at(2, 9), None),                # terlambat, belum check-out
+    (2, at(0, 8), at(0, 17)),           # tepat jam 08:00 tidak terlambat
+    (3, at(0, 18), at(0, 19)),          # masuk setelah jam pulang: lembur dari jam masuk
+]
+
+# Dihitung manual dari aturan payroll
+EXPECTED = {
+    1: dict(total_days_worked=3, total_late_days=2, total_overtime_hours=4.5, total_meal_allowances=1,
+            basic_pay=300000, overtime_pay=90000, meal_pay=25000, gross_pay=415000,
+            debt_deduction=100000, net_pay=315000, remaining_debt=50000),
+    2: dict(total_days_worked=1, total_late_days=0, total_overtime_hours=0, total_meal_allowances=0,
+            basic_pay=0, overtime_pay=0, meal_pay=0, gross_pay=0,
+            debt_deduction=0, net_pay=0, remaining_debt=0),
+    # Potongan dibatasi gaji kotor (20000), bukan potongan mingguan atau sisa hutang
+    3: dict(total_days_worked=1, total_late_days=1, total_overtime_hours=1, total_meal_allowances=0,
+            basic_pay=10000, overtime_pay=10000, meal_pay=0, gross_pay=20000,
+            debt_deduction=20000, net_pay=0, remaining_debt=10000),
+    4: dict(total_days_worked=0, total_late_days=0, total_overtime_hours=0, total_meal_allowances=0,
+            basic_pay=0, overtime_pay=0, meal_pay=0, gross_pay=0,
+            debt_deduction=0, net_pay=0, remaining_debt=0),
+}
+
+
+def payroll_rows(employees):
+    attendance = [(user_id, time_in.date(), time_in, time_out) for user_id, time_in, time_out in ATTENDANCE]
+    result = compute_weekly_payroll(attendance, employees, time(8), time(17))
+    return {record.pop('user_id'): record for record in result.to_dict('records')}
+
+
+@pytest.mark.filterwarnings('error')
+@pytest.mark.parametrize('user_ids', [[1, 2, 3, 4], [2]], ids=['all', 'only-without-salary'])
+def test_weekly_payroll_matches_hand_computed_values(user_ids):
+    rows = payroll_rows([employee for employee in EMPLOYEES if employee[0] in user_ids])
+
+    assert sorted(rows) == user_ids
+    for user_id in user_ids:
+        expected = EXPECTED[user_id]
+        assert {key: rows[user_id][key] for key in expected} == pytest.approx(expected), user_id
+
+
+def test_terbilang():
+    assert terbilang(0) == 'nol'
+    assert terbilang(115) == 'seratus lima belas'
+    assert terbilang(1250000) == 'satu juta dua ratus lima puluh ribu'
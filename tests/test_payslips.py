@@ -0,0 +1,81 @@
+import os
+from datetime import datetime, timedelta
+
+import app as absensi
+from payslip_pdf import MANIFEST_NAME, payslip_filename, render_payslips
+
+
+def record(user_id, username, **fields):
+    return dict({
+        'user_id': user_id, 'username': username, 'email': f'{user_id}@example.com',
+        'week_start': '2024-03-04', 'week_end': '2024-03-10', 'created_at': '11/03/2024',
+        'total_days_worked': 5, 'total_late_days': 1, 'total_overtime_hours': 2.5,
+        'total_meal_allowances': 5, 'basic_pay': 500000, 'overtime_pay': 50000, 'meal_pay': 75000,
+        'gross_pay': 625000, 'debt_deduction': 25000, 'net_pay': 600000,
+        'debt_description': 'Kasbon', 'debt_remaining': 100000,
+    }, **fields)
+
+
+def test_filename_stays_inside_week_dir():
+    for username in ['../../etc/passwd', 'a/b', '..', 'Çağrı Şahin', '山田']:
+        filename = payslip_filename(record(7, username))
+        assert os.path.basename(filename) == filename
+        assert '..' not in filename
+        assert filename.startswith('slip_2024-03-04_') and filename.endswith('_7.pdf')
+    assert payslip_filename(record(7, 'José Núñez')) == 'slip_2024-03-04_Jose-Nunez_7.pdf'
+
+
+def test_render_unicode_and_prune_stale(tmp_path):
+    output_dir = str(tmp_path)
+    records = [record(1, 'Çağrı Şahin', debt_description='Pinjaman ‘darurat’ – Ağustos'),
+               record(2, 'budi')]
+
+    paths, rendered = render_payslips(records, output_dir, workers=1)
+    assert rendered == 2
+    for path in paths:
+        with open(path, 'rb') as f:
+            assert f.read(5) == b'%PDF-'
+
+    # Payroll minggu itu dibuat ulang tanpa budi: slip lama dihapus, slip yang sama tidak di-render
+    paths, rendered = render_payslips(records[:1], output_dir, workers=1)
+    assert rendered == 0
+    assert sorted(os.listdir(output_dir)) == sorted([MANIFEST_NAME, os.path.basename(paths[0])])
+
+
+def test_dashboard_links_payslips_of_shown_week(app, admin_client):
+    with app.app_context():
+        user = absensi.User(username='slip_dashboard', email='slip_dashboard@example.com', password_hash='x')
+        absensi.db.session.add(user)
+        absensi.db.session.flush()
+        week_start, week_end = absensi.payroll_week(-60)
+        absensi.db.session.add(absensi.Payroll(user_id=user.id, week_start=week_start, week_end=week_end,
+                                               total_days_worked=5, gross_pay=500000, net_pay=500000))
+        absensi.db.session.commit()
+
+    response = admin_client.get('/payroll?week_offset=-60')
+    assert response.status_code == 200
+    assert b'/payroll/payslips.zip?week_offset=-60' in response.data
+
+
+def test_regenerated_payroll_reuses_unchanged_slips(app_context, tmp_path):
+    user = absensi.User(username='slip_ulang', email='slip_ulang@example.com', password_hash='x')
+    absensi.db.session.add(user)
+    absensi.db.session.flush()
+    absensi.db.session.add(absensi.EmployeeSalary(user_id=user.id, daily_wage=100000, overtime_rate=20000))
+    absensi.db.session.commit()
+    week_start, week_end = absensi.payroll_week(-61)
+    absensi.toggle_attendance(user.id, week_start, datetime.combine(week_start, datetime.min.time()) + timedelta(hours=8))
+
+    absensi.generate_weekly_payroll(week_start, week_end)
+    paths, rendered = absensi.render_week_payslips(week_start, str(tmp_path))
+    assert rendered == len(paths) > 0
+
+    # Generate ulang tanpa perubahan: baris payroll baru, slip tetap dipakai
+    absensi.generate_weekly_payroll(week_start, week_end)
+    assert absensi.render_week_payslips(week_start, str(tmp_path)) == (paths, 0)
+
+    # Gaji berubah: hanya slip karyawan itu yang di-render ulang
+    user.salary_info.daily_wage = 150000
+    absensi.db.session.commit()
+    absensi.generate_weekly_payroll(week_start, week_end)
+    assert absensi.render_week_payslips(week_start, str(tmp_path))[1] == 1
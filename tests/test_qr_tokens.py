@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+import app as absensi
+from qr_tokens import QRTokenError, QRTokenExpired, QRTokenSigner
+
+ROTATION = 120
+NOW = 1_700_000_000.0
+
+
+def test_verify_accepts_current_and_previous_window():
+    signer = QRTokenSigner('rahasia', rotation=ROTATION)
+
+    assert signer.verify(signer.issue(7, now=NOW), now=NOW)['u'] == 7
+    # QR yang baru saja berganti masih bisa discan
+    assert signer.verify(signer.issue(7, now=NOW - ROTATION), now=NOW)['u'] == 7
+    assert signer.issue(7, now=NOW) != signer.issue(7, now=NOW - ROTATION)
+
+
+def test_verify_rejects_expired_tampered_and_foreign_tokens():
+    signer = QRTokenSigner('rahasia', rotation=ROTATION)
+    token = signer.issue(7, now=NOW)
+
+    with pytest.raises(QRTokenExpired):
+        signer.verify(signer.issue(7, now=NOW - 2 * ROTATION), now=NOW)
+    with pytest.raises(QRTokenExpired):
+        signer.verify(token, now=NOW - ROTATION)  # belum terbit
+    # Isi token diganti user lain, tanda tangan lama dipertahankan
+    forged = signer.issue(8, now=NOW).rsplit('.', 1)[0] + '.' + token.rsplit('.', 1)[1]
+    with pytest.raises(QRTokenError):
+        signer.verify(forged, now=NOW)
+    with pytest.raises(QRTokenError):
+        QRTokenSigner('kunci-lain', rotation=ROTATION).verify(token, now=NOW)
+
+
+@pytest.fixture
+def scan_user(app):
+    with app.app_context():
+        user = absensi.User(username='qr_sekali_pakai', email='qr_sekali_pakai@example.com', password_hash='x')
+        absensi.db.session.add(user)
+        absensi.db.session.commit()
+        return user.id
+
+
+def scan(client, token):
+    return client.get('/qr_scan', query_string={'token': token}).get_data(as_text=True)
+
+
+def test_scan_token_is_single_use(app, scan_user):
+    client = app.test_client()
+    signer = app.extensions['absensi'].qr_signer
+    now = time.time()
+    token = signer.issue(scan_user, now=now)
+
+    assert 'Check-in berhasil' in scan(client, token)
+    assert 'QR Code sudah digunakan' in scan(client, token)
+    # Token periode sebelumnya masih berlaku (nonce-nya berbeda), jadi dipakai untuk check-out
+    assert 'Check-out berhasil' in scan(client, signer.issue(scan_user, now=now - signer.rotation))
+    assert 'sudah kadaluarsa' in scan(client, signer.issue(scan_user, now=now - 2 * signer.rotation))
+    assert 'tidak valid' in scan(client, token + 'x')
+
+    with app.app_context():
+        assert absensi.QRTokenUse.query.filter_by(user_id=scan_user).count() == 2
+        assert absensi.Attendance.query.filter_by(user_id=scan_user).count() == 1
@@ -0,0 +1,29 @@
+import re
+
+import pytest
+
+import app as absensi
+
+# Index yang harus dipakai setiap query panas (app.hot_queries)
+EXPECTED_INDEXES = {
+    'riwayat per user': ['uq_attendance_user_date_desc'],
+    'laporan rentang tanggal': ['ix_attendance_date'],
+    'laporan terbaru': ['ix_attendance_date'],
+    'laporan halaman berikutnya': ['ix_attendance_date'],
+    'laporan per karyawan': ['uq_attendance_user_date_desc'],
+    'cari karyawan': ['ix_user_username_nocase', 'ix_user_email_nocase'],
+    'manajemen user': ['ix_user_username_nocase', 'ix_user_email_nocase'],
+}
+
+
+def test_every_hot_query_is_checked(app_context):
+    assert set(absensi.hot_queries()) == set(EXPECTED_INDEXES)
+
+
+@pytest.mark.parametrize('name', EXPECTED_INDEXES)
+def test_hot_query_uses_index(app_context, name):
+    details = absensi.explain_query_plan(absensi.hot_queries()[name])
+
+    assert absensi.full_table_scans(details) == [], details
+    for index in EXPECTED_INDEXES[name]:
+        assert any(re.search(rf'\bINDEX {index}\b', detail) for detail in details), details
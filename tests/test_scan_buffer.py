@@ -0,0 +1,72 @@
+import glob
+import os
+import shutil
+import signal
+import subprocess
+import sys
+
+import pytest
+
+import app as absensi
+from scan_buffer import ScanBuffer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Process lain mencatat scan ke journal lalu mati sebelum writer sempat menulis ke DB
+CRASHING_PROCESS = """
+import os, signal, sys
+from datetime import datetime
+from scan_buffer import ScanBuffer
+
+buffer = ScanBuffer(sys.argv[1], apply_batch=lambda events: None, flush_interval=3600).start()
+user_id = int(sys.argv[2])
+for event_id, clock in [('crash-1', '08:01'), ('crash-2', '17:02'), ('crash-3', '18:03')]:
+    buffer.submit(user_id, datetime.fromisoformat(f'2023-09-04 {clock}'), event_id=event_id)
+buffer._journal.write('{"id": "crash-4", "user_')  # baris terakhir terpotong
+buffer._journal.flush()
+os.kill(os.getpid(), signal.SIGKILL)
+"""
+
+
+@pytest.fixture
+def crashed_journal(app, tmp_path):
+    with app.app_context():
+        user = absensi.User(username='journal_crash', email='journal_crash@example.com', password_hash='x')
+        absensi.db.session.add(user)
+        absensi.db.session.commit()
+        user_id = user.id
+    journal_dir = str(tmp_path / 'journal')
+    result = subprocess.run([sys.executable, '-c', CRASHING_PROCESS, journal_dir, str(user_id)], cwd=ROOT)
+    assert result.returncode == -signal.SIGKILL
+    return journal_dir, user_id
+
+
+def test_crashed_journal_is_replayed_exactly_once(app, tmp_path, crashed_journal):
+    journal_dir, user_id = crashed_journal
+    backup_dir = str(tmp_path / 'backup')
+    shutil.copytree(journal_dir, backup_dir)
+    batches = []
+
+    def apply_batch(events):
+        batches.append([event['id'] for event in events])
+        absensi.write_scan_batch(app, events)
+
+    # Restart: journal yatim diterapkan sebelum buffer baru menerima scan
+    buffer = ScanBuffer(journal_dir, apply_batch, max_batch=2).start()
+    buffer.stop()
+    assert batches == [['crash-1', 'crash-2'], ['crash-3']]
+    assert [os.path.getsize(path) for path in glob.glob(os.path.join(journal_dir, 'scan-*.jsonl'))] == [0]
+
+    # Restart berikutnya tidak menerapkan apa-apa lagi
+    assert ScanBuffer(journal_dir, apply_batch).recover() == 0
+    assert len(batches) == 2
+
+    # Journal yang sama di-replay ulang (mis. crash sebelum file dihapus): event sudah tercatat
+    assert ScanBuffer(backup_dir, apply_batch).recover() == 3
+
+    with app.app_context():
+        rows = absensi.Attendance.query.filter_by(user_id=user_id).all()
+        assert [(row.time_in.strftime('%H:%M'), row.time_out.strftime('%H:%M')) for row in rows] == [('08:01', '17:02')]
+        events = absensi.ScanEvent.query.filter_by(user_id=user_id).order_by(absensi.ScanEvent.event_id).all()
+        assert [(event.event_id, event.outcome) for event in events] == [
+            ('crash-1', 'check_in'), ('crash-2', 'check_out'), ('crash-3', 'ignored')]
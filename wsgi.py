@@ -0,0 +1,7 @@
+# Entry point WSGI produksi (multi-process). Skema dibuat sekali lewat perintah, lalu jalankan:
+#   DATABASE_URL=sqlite:////path/ke/database.db flask --app app init-db
+#   DATABASE_URL=sqlite:////path/ke/database.db gunicorn -c gunicorn.conf.py wsgi:app
+from app import create_app, start_worker
+
+app = create_app()
+start_worker(app)